@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CmdbConfig(AppConfig):
     name = 'cmdb'
+
+    def ready(self):
+        from .archive import on_connection_created
+
+        # 新建数据库连接时挂载冷数据归档库
+        connection_created.connect(on_connection_created, dispatch_uid='cmdb_attach_archive')
@@ -0,0 +1,174 @@
+"""
+冷配置历史归档
+
+早于 CMDB_ARCHIVE_AFTER_DAYS 天的非最新配置由 archive_configs 命令移入 CMDB_ARCHIVE_DATABASE
+指定的SQLite文件，主库只保留设备、最新配置与近期历史。
+每个连接建立时以 ATTACH 挂载归档库（模式名 archive），并创建临时视图
+cmdb_archived_deviceconfig 供 ArchivedDeviceConfig 只读访问；历史查询通过
+history_queryset 把主库与归档库 UNION ALL 合并，调用方无需关心配置位于哪个文件。
+
+归档库只保存配置行（配置文本与解析结果config_json）。从配置提取出的对象（VS、池、接口等）
+只服务于当前配置的查询，归档时直接从主库删除，不复制；对象级变更记录 ConfigChange 留在主库，
+/api/config-changes/ 仍能按时间范围查询全部历史，其 config/previous 可能指向已归档的配置。
+归档库不受 compact_configs 的保留策略管理，已归档的历史不会被压缩删除。
+"""
+import logging
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .retention import raw_delete_cascade
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA = 'archive'
+ARCHIVE_VIEW = 'cmdb_archived_deviceconfig'
+ARCHIVE_CHUNK_SIZE = 500
+
+
+def archive_enabled(conn=None):
+    """是否配置了归档库，归档只支持SQLite"""
+    conn = conn or connection
+    return bool(getattr(settings, 'CMDB_ARCHIVE_DATABASE', None)) and conn.vendor == 'sqlite'
+
+
+def _columns(cursor, schema, table):
+    cursor.execute(f'PRAGMA {schema}.table_info("{table}")')
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _ensure_schema(cursor):
+    """
+    按主库表结构创建或补齐归档配置表
+    归档表不带外键约束（设备表只在主库），以id唯一索引和外键列索引支撑查询；
+    主库迁移新增的列在下次挂载时补到归档表
+    """
+    from cmdb.models import DeviceConfig
+
+    table = DeviceConfig._meta.db_table
+    main_columns = _columns(cursor, 'main', table)
+    archive_columns = _columns(cursor, ARCHIVE_SCHEMA, table)
+    if not archive_columns:
+        cursor.execute(f'CREATE TABLE {ARCHIVE_SCHEMA}."{table}" AS SELECT * FROM main."{table}" WHERE 0')
+        cursor.execute(f'CREATE UNIQUE INDEX {ARCHIVE_SCHEMA}."{table}_pk" ON "{table}" ("id")')
+        for field in DeviceConfig._meta.concrete_fields:
+            if field.is_relation:
+                cursor.execute(
+                    f'CREATE INDEX {ARCHIVE_SCHEMA}."{table}_{field.column}" ON "{table}" ("{field.column}")'
+                )
+        return
+    for column in main_columns:
+        if column not in archive_columns:
+            cursor.execute(f'ALTER TABLE {ARCHIVE_SCHEMA}."{table}" ADD COLUMN "{column}"')
+
+
+def attach_archive(conn=None):
+    """
+    挂载归档库并准备归档表与只读视图，重复调用无副作用
+    ATTACH 不能在事务中执行，主库尚未迁移时跳过
+    """
+    conn = conn or connection
+    if not archive_enabled(conn):
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA database_list')
+        if ARCHIVE_SCHEMA not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f'ATTACH DATABASE %s AS {ARCHIVE_SCHEMA}', [str(settings.CMDB_ARCHIVE_DATABASE)])
+        else:
+            cursor.execute('SELECT 1 FROM sqlite_temp_master WHERE type = %s AND name = %s', ['view', ARCHIVE_VIEW])
+            if cursor.fetchone() is not None:
+                return True
+        cursor.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'cmdb_deviceconfig'")
+        if cursor.fetchone() is None:
+            return False
+        _ensure_schema(cursor)
+        from cmdb.models import DeviceConfig
+
+        columns = ', '.join(f'"{field.column}"' for field in DeviceConfig._meta.concrete_fields)
+        cursor.execute(
+            f'CREATE TEMP VIEW IF NOT EXISTS "{ARCHIVE_VIEW}" AS '
+            f'SELECT {columns} FROM {ARCHIVE_SCHEMA}."cmdb_deviceconfig"'
+        )
+    return True
+
+
+def on_connection_created(sender, connection, **kwargs):
+    """connection_created 信号处理函数"""
+    attach_archive(connection)
+
+
+def history_queryset(**filters):
+    """
+    同时覆盖主库与归档库的配置查询，按时间倒序
+
+    Args:
+        filters: 同时作用于DeviceConfig与ArchivedDeviceConfig的过滤条件，如 device=、pk__in=
+
+    Returns:
+        DeviceConfig实例的查询集；未启用归档时就是普通查询集，启用时为UNION结果，不能再调用filter
+    """
+    from cmdb.models import ArchivedDeviceConfig, DeviceConfig
+
+    queryset = DeviceConfig.objects.filter(**filters)
+    if not attach_archive():
+        return queryset.order_by('-time', '-id')
+    # 两个模型的字段顺序一致，UNION结果按第一个查询集的模型构造实例
+    archived = ArchivedDeviceConfig.objects.filter(**filters)
+    return queryset.order_by().union(archived.order_by(), all=True).order_by('-time', '-id')
+
+
+def select_archivable_configs(after_days=None, now=None):
+    """早于阈值的非最新配置主键"""
+    from cmdb.models import DeviceConfig
+
+    if after_days is None:
+        after_days = getattr(settings, 'CMDB_ARCHIVE_AFTER_DAYS', 365)
+    cutoff = (now or timezone.now()) - timedelta(days=after_days)
+    return (
+        DeviceConfig.objects.filter(latest=False, time__lt=cutoff)
+        .order_by('id').values_list('id', flat=True).iterator(chunk_size=5000)
+    )
+
+
+def archive_configs(config_ids, chunk_size=ARCHIVE_CHUNK_SIZE, on_chunk=None):
+    """
+    分批把配置复制到归档库，并从主库删除配置及其提取出的对象，ConfigChange 保留在主库
+
+    Args:
+        config_ids: 可迭代的配置主键
+        on_chunk: 每批提交后调用 on_chunk(本批数量, 累计行数字典)
+
+    Returns:
+        {模型名: 从主库删除的行数}，DeviceConfig 即归档的配置数
+    """
+    from cmdb.models import ConfigChange, DeviceConfig
+    from cmdb.search import get_search_engine
+
+    if not attach_archive():
+        raise ValueError('未配置 CMDB_ARCHIVE_DATABASE 或数据库不是SQLite')
+    counts = {}
+    config_ids = iter(config_ids)
+    while True:
+        chunk = list(islice(config_ids, chunk_size))
+        if not chunk:
+            break
+        # 同一连接上的跨库事务，复制与删除一起提交
+        with transaction.atomic(), connection.cursor() as cursor:
+            queryset = DeviceConfig._base_manager.filter(pk__in=chunk, latest=False)
+            fields = DeviceConfig._meta.concrete_fields
+            sql, params = queryset.order_by().values_list(*(f.attname for f in fields)).query.sql_with_params()
+            columns = ', '.join(f'"{field.column}"' for field in fields)
+            # OR REPLACE 使中断后重跑同一批不会在归档库留下重复行
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}."{DeviceConfig._meta.db_table}" ({columns}) {sql}', params
+            )
+            get_search_engine().remove_configs(queryset.values_list('pk', flat=True))
+            # 变更记录不删除也不置空previous，保留与归档配置的关联
+            raw_delete_cascade(DeviceConfig, queryset, counts, keep=(ConfigChange,))
+        if on_chunk:
+            on_chunk(len(chunk), counts)
+    logger.info(f'归档完成: {({name: count for name, count in counts.items() if count})}')
+    return counts
@@ -0,0 +1,128 @@
+"""
+设备连接熔断与指数退避
+
+连续连接失败达到 threshold 次的设备进入熔断（open）：退避期内批量采集直接跳过，
+不再消耗一次完整的Netmiko连接超时；退避时间从 base_minutes 起随失败次数加倍，最长 max_hours。
+退避期满后进入半开（half_open），下一次批量采集放行一次探测，成功即恢复（closed），失败则退避加倍。
+单台设备的人工采集不受熔断限制，结果同样记录。
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+DEFAULT_BREAKER = {
+    'threshold': 3,
+    'base_minutes': 15,
+    'max_hours': 24,
+}
+# 一次连接失败的估计耗时（Netmiko连接超时秒数），用于估算跳过设备节省的时间
+FAILED_FETCH_SECONDS = 30
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def breaker_policy(**overrides):
+    """合并 settings.CMDB_BREAKER 与调用方参数，值为None的参数不覆盖配置"""
+    policy = {**DEFAULT_BREAKER, **getattr(settings, 'CMDB_BREAKER', {})}
+    policy.update({key: value for key, value in overrides.items() if value is not None})
+    return policy
+
+
+def retry_at(device, policy=None):
+    """
+    熔断设备的退避截止时间
+
+    Returns:
+        datetime；未熔断的设备返回None
+    """
+    policy = policy or breaker_policy()
+    if device.connect_failures < policy['threshold'] or device.connect_failed_at is None:
+        return None
+    # 超过上限后不再计算幂，避免失败次数很大时溢出
+    exponent = min(device.connect_failures - policy['threshold'], 32)
+    backoff = min(
+        timedelta(minutes=policy['base_minutes']) * 2 ** exponent,
+        timedelta(hours=policy['max_hours']),
+    )
+    return device.connect_failed_at + backoff
+
+
+def breaker_state(device, now=None, policy=None):
+    """返回设备的熔断状态：CLOSED、OPEN 或 HALF_OPEN"""
+    until = retry_at(device, policy)
+    if until is None:
+        return CLOSED
+    return OPEN if (now or timezone.now()) < until else HALF_OPEN
+
+
+def plan_batch(devices, now=None, policy=None):
+    """
+    按熔断状态安排批量采集
+
+    熔断中的设备跳过；最近失败过的设备（含半开探测）排在最前面，
+    可能耗满超时的采集与其它设备并行进行，批次总耗时不再由末尾的不可达设备决定。
+
+    Returns:
+        (要采集的设备列表, 跳过的设备列表)
+    """
+    now = now or timezone.now()
+    policy = policy or breaker_policy()
+    suspect, healthy, skipped = [], [], []
+    for device in devices:
+        state = breaker_state(device, now, policy)
+        if state == OPEN:
+            skipped.append(device)
+        elif device.connect_failures:
+            suspect.append(device)
+        else:
+            healthy.append(device)
+    return suspect + healthy, skipped
+
+
+def estimate_saved_seconds(skipped_count, concurrency):
+    """按每台跳过的设备耗满一次连接超时、以 concurrency 并发执行，估算节省的批次耗时（秒）"""
+    if not skipped_count:
+        return 0
+    return math.ceil(skipped_count / max(concurrency, 1)) * FAILED_FETCH_SECONDS
+
+
+def skipped_result(device, policy=None):
+    """跳过熔断设备时返回的结果字典，格式与 async_fetch_config 一致"""
+    until = timezone.localtime(retry_at(device, policy))
+    return {
+        "success": False,
+        "skipped": True,
+        "message": f"{device.hostname}连续{device.connect_failures}次连接失败，"
+                   f"{until:%Y-%m-%d %H:%M:%S}前跳过批量采集",
+    }
+
+
+async def record_fetch_result(device, success):
+    """
+    记录一次采集的连接结果，同时更新传入的设备对象
+
+    Args:
+        device: Device对象
+        success: 是否成功连接并取得配置
+    """
+    from .models import Device
+
+    if success:
+        # 大多数设备没有失败记录，不必为每次成功都写库
+        if device.connect_failures or device.connect_failed_at is not None:
+            await Device.objects.filter(pk=device.pk).aupdate(connect_failures=0, connect_failed_at=None)
+            device.connect_failures = 0
+            device.connect_failed_at = None
+        return
+
+    now = timezone.now()
+    await Device.objects.filter(pk=device.pk).aupdate(
+        connect_failures=F('connect_failures') + 1, connect_failed_at=now
+    )
+    device.connect_failures += 1
+    device.connect_failed_at = now
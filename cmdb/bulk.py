@@ -0,0 +1,82 @@
+"""
+提取对象的批量写入
+
+PostgreSQL（psycopg 3）下用 COPY 写入：先从序列批量取号并回填主键，再以 COPY 流式写入，
+后续对象的外键可以直接引用这些主键；其它数据库或数量较少时使用 bulk_create。
+"""
+import logging
+
+from django.db import connections, router
+
+logger = logging.getLogger(__name__)
+
+# 少于该行数时COPY的额外往返不划算，直接使用bulk_create
+COPY_MIN_ROWS = 200
+
+
+def copy_supported(using):
+    """当前连接是否可以使用COPY快速路径"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    # psycopg2 没有 cursor.copy，回退到 bulk_create
+    return is_psycopg3
+
+
+def bulk_insert(model, objects, batch_size=None, copy=None):
+    """
+    批量插入并为对象回填主键
+
+    Args:
+        model: 模型类
+        objects: 未保存的模型实例列表，外键可以引用此前已插入的对象
+        batch_size: bulk_create每条INSERT的最大行数
+        copy: True/False 强制或禁用COPY，None时按数据库和行数自动选择
+
+    Returns:
+        objects
+    """
+    if not objects:
+        return objects
+    using = router.db_for_write(model)
+    if copy is None:
+        copy = len(objects) >= COPY_MIN_ROWS and copy_supported(using)
+    if not copy:
+        return model.objects.bulk_create(objects, batch_size=batch_size)
+    _copy_insert(model, objects, using)
+    return objects
+
+
+def _copy_insert(model, objects, using):
+    connection = connections[using]
+    opts = model._meta
+    fields = opts.concrete_fields
+    table = connection.ops.quote_name(opts.db_table)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+            [opts.db_table, opts.pk.column, len(objects)],
+        )
+        for obj, (pk,) in zip(objects, cursor.fetchall()):
+            obj.pk = pk
+
+        rows = []
+        for obj in objects:
+            # 与bulk_create一致：外键取关联对象保存后的主键，字段经 pre_save/get_db_prep_save 转换
+            obj._prepare_related_fields_for_save(operation_name='bulk_insert')
+            rows.append([
+                field.get_db_prep_save(field.pre_save(obj, add=True), connection=connection)
+                for field in fields
+            ])
+        with cursor.cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row(row)
+
+    for obj in objects:
+        obj._state.adding = False
+        obj._state.db = using
+    logger.debug(f'COPY写入{opts.db_table} {len(objects)} 行')
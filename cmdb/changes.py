@@ -0,0 +1,172 @@
+"""
+配置版本之间的对象级（语义）变更
+
+以各对象的自然标识（VS名、pool名、接口名等）比较相邻两个版本提取出的对象，
+新版本保存时计算一次并写入ConfigChange，查询时不再重新比较。
+不经过save()批量写入的历史版本（如 ingest_config_backups）由 record_history_changes 补算。
+尚未解析的版本（CMDB_PARSE_POLICY='latest'）没有对象可比较，不记录变更。
+"""
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# 由其它字段推导出的列，不作为变更内容
+DERIVED_FIELDS = {'ip_start', 'ip_end', 'ip_prefixlen', 'endpoint'}
+
+
+def _identity(obj):
+    """对象在同一配置内的自然标识"""
+    model_name = obj._meta.model_name
+    if model_name == 'interface':
+        return obj.interface
+    if model_name == 'ltmpoolmember':
+        return f'{obj.pool.name} {obj.name}'
+    if model_name == 'gtmpoolmember':
+        return f'{obj.pool.type} {obj.pool.name} {obj.server}:{obj.vs_name}'
+    if model_name in ('gtmpool', 'gtmwideip'):
+        return f'{obj.type} {obj.name}'
+    return obj.name
+
+
+def _fields(obj):
+    return {
+        field.name: getattr(obj, field.attname)
+        for field in obj._meta.concrete_fields
+        if not field.primary_key and not field.is_relation and field.name not in DERIVED_FIELDS
+    }
+
+
+def object_snapshot(config):
+    """
+    根据config_json构造 {(对象类型, 标识): 字段字典}，不读写数据库中的提取结果
+    """
+    snapshot = {}
+    for model, objects in config._build_objects().items():
+        for obj in objects:
+            snapshot[(model._meta.model_name, _identity(obj))] = _fields(obj)
+    return snapshot
+
+
+def compare_snapshots(old, new):
+    """
+    比较两个快照
+
+    Returns:
+        [(对象类型, 标识, 动作, 变更内容)]，新增对象记录全部字段，修改对象记录 {字段: [旧值, 新值]}
+    """
+    changes = []
+    for key in sorted(old.keys() | new.keys()):
+        if key not in new:
+            changes.append((*key, 'removed', {}))
+        elif key not in old:
+            changes.append((*key, 'added', new[key]))
+        else:
+            modified = {
+                name: [old[key].get(name), value]
+                for name, value in new[key].items()
+                if old[key].get(name) != value
+            }
+            if modified:
+                changes.append((*key, 'modified', modified))
+    return changes
+
+
+def _change_records(config, previous, changes):
+    from cmdb.models import ConfigChange
+
+    return [
+        ConfigChange(
+            device_id=config.device_id,
+            config=config,
+            previous=previous,
+            time=config.time,
+            object_type=object_type,
+            object_name=object_name[:255],
+            action=action,
+            changes=detail,
+        )
+        for object_type, object_name, action, detail in changes
+    ]
+
+
+def _summary(changes):
+    return dict(Counter(f'{object_type} {action}' for object_type, _, action, _ in changes))
+
+
+def record_changes(config):
+    """
+    计算配置与同一设备上一版本之间的对象级变更并写入数据库
+
+    Returns:
+        变更摘要 {"对象类型 动作": 数量}，没有上一版本或未解析时返回None
+    """
+    from cmdb.models import ConfigChange, DeviceConfig
+
+    if not config.config_json:
+        return None
+    previous = (
+        DeviceConfig.objects.select_related('device')
+        .filter(device_id=config.device_id, time__lte=config.time)
+        .exclude(pk=config.pk).order_by('-time', '-id').first()
+    )
+    if previous is None:
+        return None
+    previous.ensure_parsed()
+
+    changes = compare_snapshots(object_snapshot(previous), object_snapshot(config))
+    ConfigChange.objects.bulk_create(_change_records(config, previous, changes), batch_size=500)
+    summary = _summary(changes)
+    logger.debug(f'配置{config.pk}相对{previous.pk}的对象变更: {summary}')
+    return summary
+
+
+def record_history_changes(config_ids):
+    """
+    为批量写入的历史配置补算对象级变更
+    按设备与时间顺序把每个写入的版本与上一版本比较；写入位置之后的原有版本的上一版本随之改变，一并重算
+
+    Args:
+        config_ids: 批量写入的配置主键
+
+    Returns:
+        {配置主键: 变更摘要}，只包含config_ids中计算了变更的配置
+    """
+    from cmdb.models import ConfigChange, DeviceConfig
+
+    config_ids = set(config_ids)
+    device_ids = set(DeviceConfig.objects.filter(pk__in=config_ids).values_list('device_id', flat=True))
+    summaries = {}
+    for device_id in device_ids:
+        versions = list(
+            DeviceConfig.objects.filter(device_id=device_id).order_by('time', 'id').values_list('id', flat=True)
+        )
+        # (配置, 上一版本)，第一个版本没有上一版本
+        pairs = []
+        for index, pk in enumerate(versions[1:], start=1):
+            if pk in config_ids or versions[index - 1] in config_ids:
+                pairs.append((pk, versions[index - 1]))
+        if not pairs:
+            continue
+
+        configs = DeviceConfig.objects.select_related('device').in_bulk({pk for pair in pairs for pk in pair})
+        snapshots = {}
+
+        def snapshot(config):
+            if config.pk not in snapshots:
+                snapshots[config.pk] = object_snapshot(config)
+            return snapshots[config.pk]
+
+        records = []
+        for pk, previous_pk in pairs:
+            config, previous = configs[pk], configs[previous_pk]
+            if not config.config_json:
+                continue
+            previous.ensure_parsed()
+            changes = compare_snapshots(snapshot(previous), snapshot(config))
+            records.extend(_change_records(config, previous, changes))
+            if pk in config_ids:
+                summaries[pk] = _summary(changes)
+        ConfigChange.objects.filter(config_id__in=[pk for pk, _ in pairs]).delete()
+        ConfigChange.objects.bulk_create(records, batch_size=500)
+    return summaries
@@ -0,0 +1,240 @@
+"""
+配置文本差异比较
+
+两份配置通常只有少量行不同：先去掉公共的首尾部分，再以两侧都只出现一次的行为锚点
+（patience diff），锚点之间的小片段才交给 difflib 做序列比较，多MB的F5配置也接近线性耗时。
+结果按两份原始配置内容的摘要缓存。
+"""
+import difflib
+from bisect import bisect_left
+from collections import Counter
+
+from django.core.cache import cache
+
+from .utils import config_digest
+
+DIFF_CACHE_TIMEOUT = 24 * 3600
+DIFF_MODES = ('unified', 'side-by-side')
+# whitespace参数：none 严格比较；trailing 忽略行尾空白；all 忽略所有空白差异
+WHITESPACE_MODES = ('none', 'trailing', 'all')
+
+
+def _compare_key(line, whitespace):
+    if whitespace == 'all':
+        return ' '.join(line.split())
+    if whitespace == 'trailing':
+        return line.rstrip()
+    return line
+
+
+def _common_affix(a_keys, b_keys):
+    """返回公共前缀与公共后缀的行数"""
+    limit = min(len(a_keys), len(b_keys))
+    prefix = 0
+    while prefix < limit and a_keys[prefix] == b_keys[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a_keys[-1 - suffix] == b_keys[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def diff_opcodes(a_lines, b_lines, whitespace='none'):
+    """
+    计算两组行之间的编辑操作
+
+    Returns:
+        与 difflib.SequenceMatcher.get_opcodes 相同格式的列表，下标针对完整的输入
+    """
+    if whitespace == 'none':
+        a_keys, b_keys = a_lines, b_lines
+    else:
+        a_keys = [_compare_key(line, whitespace) for line in a_lines]
+        b_keys = [_compare_key(line, whitespace) for line in b_lines]
+    prefix, suffix = _common_affix(a_keys, b_keys)
+    a_end, b_end = len(a_keys) - suffix, len(b_keys) - suffix
+
+    opcodes = []
+    # 当前相同区域的起点，遇到真正的差异时才输出，避免锚点间大量零碎的equal
+    equal_i, equal_j = 0, 0
+    i, j = prefix, prefix
+    anchors = _unique_anchors(a_keys, b_keys, prefix, a_end, prefix, b_end)
+    anchors.append((a_end, b_end))
+    for anchor_i, anchor_j in anchors:
+        if anchor_i - i != anchor_j - j or a_keys[i:anchor_i] != b_keys[j:anchor_j]:
+            for op in _gap_opcodes(a_keys, b_keys, i, anchor_i, j, anchor_j):
+                if op[0] == 'equal':
+                    continue
+                if equal_i < op[1]:
+                    opcodes.append(('equal', equal_i, op[1], equal_j, op[3]))
+                opcodes.append(op)
+                equal_i, equal_j = op[2], op[4]
+        i, j = anchor_i + 1, anchor_j + 1
+    if equal_i < len(a_keys):
+        opcodes.append(('equal', equal_i, len(a_keys), equal_j, len(b_keys)))
+    return opcodes
+
+
+def _unique_anchors(a_keys, b_keys, a_lo, a_hi, b_lo, b_hi):
+    """两侧各只出现一次的行中，取b中下标递增的最长子序列作为锚点"""
+    a_count = Counter(a_keys[a_lo:a_hi])
+    b_count = Counter(b_keys[b_lo:b_hi])
+    b_index = {
+        key: j for j, key in enumerate(b_keys[b_lo:b_hi], b_lo)
+        if b_count[key] == 1 and a_count[key] == 1
+    }
+    pairs = [(i, b_index[key]) for i, key in enumerate(a_keys[a_lo:a_hi], a_lo) if key in b_index]
+    if all(first[1] < second[1] for first, second in zip(pairs, pairs[1:])):
+        return pairs
+
+    # 存在行移动时，用耐心排序求最长递增子序列
+    tails, tail_pairs, previous = [], [], {}
+    for pair in pairs:
+        position = bisect_left(tails, pair[1])
+        if position == len(tails):
+            tails.append(pair[1])
+            tail_pairs.append(pair)
+        else:
+            tails[position] = pair[1]
+            tail_pairs[position] = pair
+        previous[pair] = tail_pairs[position - 1] if position else None
+    anchors = []
+    pair = tail_pairs[-1] if tail_pairs else None
+    while pair is not None:
+        anchors.append(pair)
+        pair = previous[pair]
+    return anchors[::-1]
+
+
+def _gap_opcodes(a_keys, b_keys, a_lo, a_hi, b_lo, b_hi):
+    """锚点之间的片段用difflib比较，下标换算回完整输入"""
+    if a_lo == a_hi:
+        return [('insert', a_lo, a_hi, b_lo, b_hi)]
+    if b_lo == b_hi:
+        return [('delete', a_lo, a_hi, b_lo, b_hi)]
+    matcher = difflib.SequenceMatcher(None, a_keys[a_lo:a_hi], b_keys[b_lo:b_hi], autojunk=False)
+    return [
+        (tag, i1 + a_lo, i2 + a_lo, j1 + b_lo, j2 + b_lo)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+    ]
+
+
+def _group_opcodes(opcodes, context):
+    """按上下文行数把编辑操作分组，逻辑同 difflib.SequenceMatcher.get_grouped_opcodes，context为None时不截断"""
+    if all(tag == 'equal' for tag, *_ in opcodes):
+        return []
+    if context is None:
+        return [opcodes]
+    codes = list(opcodes)
+    tag, i1, i2, j1, j2 = codes[0]
+    if tag == 'equal':
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    tag, i1, i2, j1, j2 = codes[-1]
+    if tag == 'equal':
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+
+    groups, group = [], []
+    for tag, i1, i2, j1, j2 in codes:
+        # 相邻变化之间的相同行超过两倍上下文时拆分为新的块
+        if tag == 'equal' and i2 - i1 > context * 2:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        groups.append(group)
+    return groups
+
+
+def _format_range(start, stop):
+    """统一格式的行范围，写法同 difflib.unified_diff"""
+    length = stop - start
+    if length == 1:
+        return f'{start + 1}'
+    if not length:
+        return f'{start},0'
+    return f'{start + 1},{length}'
+
+
+def _unified(a_lines, b_lines, groups):
+    lines = []
+    for group in groups:
+        first, last = group[0], group[-1]
+        lines.append(f'@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@')
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                lines.extend(' ' + line for line in a_lines[i1:i2])
+                continue
+            lines.extend('-' + line for line in a_lines[i1:i2])
+            lines.extend('+' + line for line in b_lines[j1:j2])
+    return '\n'.join(lines)
+
+
+def _side_by_side(a_lines, b_lines, groups):
+    hunks = []
+    for group in groups:
+        rows = []
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                rows.extend(
+                    {"tag": tag, "left_no": i + 1, "left": a_lines[i], "right_no": j + 1, "right": b_lines[j]}
+                    for i, j in zip(range(i1, i2), range(j1, j2))
+                )
+                continue
+            # 替换块左右按行对齐，多出的行另一侧留空
+            for offset in range(max(i2 - i1, j2 - j1)):
+                i, j = i1 + offset, j1 + offset
+                rows.append({
+                    "tag": tag,
+                    "left_no": i + 1 if i < i2 else None,
+                    "left": a_lines[i] if i < i2 else None,
+                    "right_no": j + 1 if j < j2 else None,
+                    "right": b_lines[j] if j < j2 else None,
+                })
+        hunks.append(rows)
+    return hunks
+
+
+def diff_configs(a_text, b_text, mode='unified', context=3, whitespace='none', a_label='a', b_label='b'):
+    """
+    比较两份配置文本，结果按两份内容的摘要缓存
+
+    Args:
+        mode: unified 返回统一格式文本；side-by-side 返回左右对照的行列表
+        context: 变化处前后保留的上下文行数，None表示输出全文
+        whitespace: none / trailing / all，见 WHITESPACE_MODES
+
+    Returns:
+        dict，包含 added、removed 行数，以及 diff（unified）或 hunks（side-by-side）
+    """
+    if mode not in DIFF_MODES:
+        raise ValueError(f'不支持的diff模式: {mode}')
+    if whitespace not in WHITESPACE_MODES:
+        raise ValueError(f'不支持的空白比较模式: {whitespace}')
+
+    # 缓存不含标签，相同内容的不同版本对共用结果
+    key = f'config-diff:{config_digest(a_text)}:{config_digest(b_text)}:{mode}:{context}:{whitespace}'
+    result = cache.get(key)
+    if result is None:
+        result = _compute(a_text, b_text, mode, context, whitespace)
+        cache.set(key, result, DIFF_CACHE_TIMEOUT)
+    if mode == 'unified' and result["diff"]:
+        result = {**result, "diff": f'--- {a_label}\n+++ {b_label}\n' + result["diff"]}
+    return result
+
+
+def _compute(a_text, b_text, mode, context, whitespace):
+    a_lines, b_lines = a_text.splitlines(), b_text.splitlines()
+    opcodes = diff_opcodes(a_lines, b_lines, whitespace)
+    groups = _group_opcodes(opcodes, context)
+    result = {
+        "added": sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag != 'equal'),
+        "removed": sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag != 'equal'),
+        "hunk_count": len(groups),
+    }
+    if mode == 'unified':
+        result["diff"] = _unified(a_lines, b_lines, groups)
+    else:
+        result["hunks"] = _side_by_side(a_lines, b_lines, groups)
+    return result
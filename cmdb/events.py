@@ -0,0 +1,70 @@
+"""
+配置变更事件流
+
+每次保存新配置或某个版本成为最新版本时追加一条ChangeEvent，与配置写入处于同一事务。
+下游以事件ID作为游标增量同步：/api/changes/?after=<上次收到的最大ID>。
+"""
+import asyncio
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+EVENT_PAGE_SIZE = 500
+# 长轮询最长等待秒数与检查间隔
+LONG_POLL_MAX_SECONDS = 30
+LONG_POLL_INTERVAL = 0.5
+# 非SQLite数据库中并发事务可能不按ID顺序提交，暂缓返回刚写入的事件，避免游标跳过尚未提交的ID
+EVENT_SETTLE_SECONDS = 1
+
+
+def append_event(event_type, config, summary=None):
+    """
+    追加一条配置变更事件
+
+    Args:
+        event_type: ChangeEvent.EVENT_TYPES 之一
+        config: 相关的DeviceConfig，需已保存
+        summary: 对象级变更摘要
+    """
+    from cmdb.models import ChangeEvent
+
+    return ChangeEvent.objects.create(
+        event_type=event_type,
+        device_id=config.device_id,
+        hostname=config.device.hostname,
+        config_id=config.pk,
+        config_hash=config.config_hash,
+        latest=config.latest,
+        summary=summary or {},
+    )
+
+
+def _events_after(after, limit):
+    from cmdb.models import ChangeEvent
+
+    queryset = ChangeEvent.objects.filter(pk__gt=after).order_by('pk')
+    if connection.vendor != 'sqlite':
+        queryset = queryset.filter(time__lt=timezone.now() - timedelta(seconds=EVENT_SETTLE_SECONDS))
+    return list(queryset.values(
+        'id', 'time', 'event_type', 'device_id', 'hostname', 'config_id', 'config_hash', 'latest', 'summary'
+    )[:limit])
+
+
+async def wait_for_events(after, limit=EVENT_PAGE_SIZE, timeout=0):
+    """
+    获取游标之后的事件，没有新事件时最多等待timeout秒（长轮询）
+
+    Returns:
+        事件字典列表，按ID升序
+    """
+    from asgiref.sync import sync_to_async
+
+    fetch = sync_to_async(_events_after)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(timeout, LONG_POLL_MAX_SECONDS)
+    while True:
+        events = await fetch(after, limit)
+        if events or loop.time() >= deadline:
+            return events
+        await asyncio.sleep(LONG_POLL_INTERVAL)
@@ -0,0 +1,320 @@
+"""
+清单与解析对象的流式导出
+
+按固定大小分块读取查询集（PostgreSQL下为服务端游标），逐块编码为
+CSV / NDJSON / Parquet / Arrow 字节流，内存占用与总行数无关。
+"""
+import csv
+import io
+import json
+import logging
+from typing import Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from cmdb.models import Device, Interface, LtmPool, LtmVirtualServer
+
+logger = logging.getLogger(__name__)
+
+# 每次从数据库游标读取并编码的行数
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+}
+
+# 导出资源定义：model为数据来源，fields为导出列（列名 -> ORM路径），
+# latest_field不为空时表示该资源挂在DeviceConfig下，默认只导出最新配置中的对象
+EXPORT_RESOURCES = {
+    'devices': {
+        'model': Device,
+        'fields': {
+            'id': 'id',
+            'hostname': 'hostname',
+            'address': 'address',
+            'device_type': 'device_type',
+            'connect_failed_at': 'connect_failed_at',
+        },
+        'device_field': 'id',
+        'device_type_field': 'device_type',
+        'latest_field': None,
+    },
+    'interfaces': {
+        'model': Interface,
+        'fields': {
+            'id': 'id',
+            'config_id': 'config_id',
+            'device_id': 'config__device_id',
+            'device_name': 'config__device__hostname',
+            'interface': 'interface',
+            'description': 'description',
+            'enabled': 'enabled',
+            'vrf': 'vrf',
+            'mode': 'mode',
+            'type': 'type',
+            'access_vlan': 'access_vlan',
+            'combo_type': 'combo_type',
+            'ip_address': 'ip_address',
+            'subnet_mask': 'subnet_mask',
+        },
+        'device_field': 'config__device_id',
+        'device_type_field': 'config__device__device_type',
+        'latest_field': 'config__latest',
+    },
+    'virtuals': {
+        'model': LtmVirtualServer,
+        'fields': {
+            'id': 'id',
+            'config_id': 'config_id',
+            'device_id': 'config__device_id',
+            'device_name': 'config__device__hostname',
+            'name': 'name',
+            'vs_address': 'vs_address',
+            'vs_port': 'vs_port',
+            'mask': 'mask',
+            'protocol': 'protocol',
+            'source': 'source',
+            'pool': 'pool',
+            'snat_type': 'snat_type',
+            'snat_pool': 'snat_pool',
+            'persist': 'persist',
+            'profiles': 'profiles',
+            'rules': 'rules',
+        },
+        'device_field': 'config__device_id',
+        'device_type_field': 'config__device__device_type',
+        'latest_field': 'config__latest',
+    },
+    'pools': {
+        'model': LtmPool,
+        'fields': {
+            'id': 'id',
+            'config_id': 'config_id',
+            'device_id': 'config__device_id',
+            'device_name': 'config__device__hostname',
+            'name': 'name',
+            'mode': 'mode',
+            'monitors': 'monitors',
+        },
+        'device_field': 'config__device_id',
+        'device_type_field': 'config__device__device_type',
+        'latest_field': 'config__latest',
+    },
+}
+
+
+class _ChunkSink:
+    """
+    供pyarrow写入的最小文件对象，写入的数据在每个批次之后被取走
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def get_export_queryset(resource: str, latest_only: bool = True, device_ids=None, device_type=None):
+    """
+    构造导出用的查询集
+
+    Args:
+        resource: 资源名称，见 EXPORT_RESOURCES
+        latest_only: 是否只导出各设备最新配置中的对象
+        device_ids: 可选的设备ID列表
+        device_type: 可选的设备类型过滤
+
+    Returns:
+        (查询集, 列名列表) 元组，查询集以values_list形式返回元组
+    """
+    if resource not in EXPORT_RESOURCES:
+        raise ValueError(f"不支持的导出资源: {resource}")
+
+    spec = EXPORT_RESOURCES[resource]
+    columns = list(spec['fields'].keys())
+    queryset = spec['model'].objects.all()
+
+    if spec['latest_field'] and latest_only:
+        queryset = queryset.filter(**{spec['latest_field']: True})
+    if device_ids:
+        queryset = queryset.filter(**{f"{spec['device_field']}__in": device_ids})
+    if device_type:
+        queryset = queryset.filter(**{spec['device_type_field']: device_type})
+
+    # 只取导出列，避免实例化模型对象；按主键排序保证分块读取稳定
+    annotations = {
+        column: F(path) for column, path in spec['fields'].items() if column != path
+    }
+    queryset = queryset.annotate(**annotations).order_by('pk').values_list(*columns)
+    return queryset, columns
+
+
+def _iter_chunks(rows, chunk_size: int) -> Iterator[list]:
+    """将行迭代器切分为固定大小的批次"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_queryset_chunks(queryset, chunk_size: int) -> Iterator[list]:
+    """以服务端游标分块读取查询集"""
+    return _iter_chunks(queryset.iterator(chunk_size=chunk_size), chunk_size)
+
+
+def _stream_csv(queryset, columns, chunk_size) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in _iter_queryset_chunks(queryset, chunk_size):
+        writer.writerows(
+            [json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value for value in row]
+            for row in chunk
+        )
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+    # 仅有表头时也要输出
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def stream_ndjson(rows, columns, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    将元组行迭代器编码为NDJSON字节流，每批行合并为一个字节块输出
+
+    Args:
+        rows: 可迭代的元组行，顺序与columns一致
+        columns: 列名列表
+        chunk_size: 每个字节块包含的行数
+
+    Returns:
+        字节块迭代器
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in _iter_chunks(rows, chunk_size):
+        lines = [encoder.encode(dict(zip(columns, row))) for row in chunk]
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _stream_ndjson(queryset, columns, chunk_size) -> Iterator[bytes]:
+    return stream_ndjson(queryset.iterator(chunk_size=chunk_size), columns, chunk_size)
+
+
+def _arrow_schema(resource: str, columns):
+    """根据模型字段类型构造固定的Arrow schema，避免各批次推断出不同类型"""
+    import pyarrow as pa
+
+    spec = EXPORT_RESOURCES[resource]
+    model = spec['model']
+    type_map = {
+        'AutoField': pa.int64(),
+        'BigAutoField': pa.int64(),
+        'IntegerField': pa.int64(),
+        'ForeignKey': pa.int64(),
+        'BooleanField': pa.bool_(),
+        'DateTimeField': pa.timestamp('us', tz='UTC'),
+    }
+    fields = []
+    for column in columns:
+        path = spec['fields'][column].split('__')
+        field_model = model
+        for part in path[:-1]:
+            field_model = field_model._meta.get_field(part).related_model
+        field = field_model._meta.get_field(path[-1])
+        fields.append(pa.field(column, type_map.get(field.get_internal_type(), pa.string())))
+    return pa.schema(fields)
+
+
+def _stream_arrow(resource, queryset, columns, chunk_size, file_format) -> Iterator[bytes]:
+    # 在生成器外导入，缺少依赖时调用方可以在开始输出前得到异常
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("导出Parquet/Arrow格式需要安装pyarrow: pip install network-ops[export]") from e
+
+    return _iter_arrow(pa, pq, resource, queryset, columns, chunk_size, file_format)
+
+
+def _iter_arrow(pa, pq, resource, queryset, columns, chunk_size, file_format) -> Iterator[bytes]:
+    schema = _arrow_schema(resource, columns)
+    string_columns = {
+        index for index, field in enumerate(schema) if pa.types.is_string(field.type)
+    }
+    sink = _ChunkSink()
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    try:
+        for chunk in _iter_queryset_chunks(queryset, chunk_size):
+            arrays = []
+            for index, column in enumerate(zip(*chunk)):
+                if index in string_columns:
+                    column = [
+                        json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict))
+                        else (None if value is None else str(value))
+                        for value in column
+                    ]
+                arrays.append(pa.array(column, type=schema.field(index).type))
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(resource: str, file_format: str, queryset, columns,
+                  chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    将查询集编码为指定格式的字节流
+
+    Args:
+        resource: 资源名称
+        file_format: 导出格式，csv / ndjson / parquet / arrow
+        queryset: get_export_queryset 返回的查询集
+        columns: 列名列表
+        chunk_size: 每批读取与编码的行数
+
+    Returns:
+        字节块迭代器
+    """
+    if file_format == 'csv':
+        return _stream_csv(queryset, columns, chunk_size)
+    if file_format == 'ndjson':
+        return _stream_ndjson(queryset, columns, chunk_size)
+    if file_format in ('parquet', 'arrow'):
+        return _stream_arrow(resource, queryset, columns, chunk_size, file_format)
+    raise ValueError(f"不支持的导出格式: {file_format}")
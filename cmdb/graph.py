@@ -0,0 +1,135 @@
+"""
+LTM依赖图查询
+
+提取配置时VS→pool→member→node已解析为外键，这里基于外键做正向（VS到后端）
+与反向（后端到VS）遍历。结果缓存在Django cache中，缓存键带有代数，
+任何配置提取或最新版本变化时递增代数使旧结果失效；多进程部署需配置共享的缓存后端。
+"""
+from django.core.cache import cache
+
+from .utils import ip_interval, ip_network_of
+
+GRAPH_CACHE_TIMEOUT = 300
+_GENERATION_KEY = 'ltm-graph:generation'
+
+
+def _generation():
+    return cache.get_or_set(_GENERATION_KEY, 0, None)
+
+
+def invalidate_graph_cache():
+    """配置对象或最新版本变化后调用，使已缓存的依赖图失效"""
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 1, None)
+
+
+def _cached(key, compute):
+    key = f'ltm-graph:{_generation()}:{key}'
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, GRAPH_CACHE_TIMEOUT)
+    return result
+
+
+def virtual_server_graph(vs_id):
+    """
+    正向遍历：VS → pool → member → node
+
+    Returns:
+        VS及其后端的嵌套字典，VS不存在时返回None
+    """
+    from cmdb.models import LtmPoolMember, LtmVirtualServer
+
+    def compute():
+        vs = (
+            LtmVirtualServer.objects.select_related('config__device', 'pool_ref')
+            .filter(pk=vs_id).first()
+        )
+        if vs is None:
+            return None
+        pool = None
+        if vs.pool_ref is not None:
+            members = LtmPoolMember.objects.select_related('node').filter(pool_id=vs.pool_ref_id).order_by('name')
+            pool = {
+                "id": vs.pool_ref.id,
+                "name": vs.pool_ref.name,
+                "mode": vs.pool_ref.mode,
+                "monitors": vs.pool_ref.monitors,
+                "members": [
+                    {
+                        "id": member.id,
+                        "name": member.name,
+                        "address": member.address,
+                        "port": member.port,
+                        "node": {"id": member.node.id, "name": member.node.name, "address": member.node.address}
+                        if member.node else None,
+                    }
+                    for member in members
+                ],
+            }
+        return {
+            "id": vs.id,
+            "name": vs.name,
+            "device_id": vs.config.device_id,
+            "device_name": vs.config.device.hostname,
+            "config_id": vs.config_id,
+            "vs_address": vs.vs_address,
+            "vs_port": vs.vs_port,
+            "pool_name": vs.pool,
+            "pool": pool,
+        }
+
+    return _cached(f'vs:{vs_id}', compute)
+
+
+def virtual_servers_for_backend(address, history=False):
+    """
+    反向遍历：查找流量会转发到指定后端的所有VS（影响范围）
+
+    Args:
+        address: 后端IP或网段，网段时匹配落在其中的所有成员
+        history: 是否包含历史配置，默认只查最新配置
+
+    Returns:
+        VS列表，每项附带命中的pool成员
+    """
+    from cmdb.models import LtmPoolMember
+
+    network = ip_network_of(address)
+    if network is None:
+        raise ValueError(f'无效的IP地址或网段: {address}')
+    start, end, _ = ip_interval(network)
+
+    def compute():
+        members = LtmPoolMember.objects.filter(
+            ip_start__gte=start, ip_end__lte=end, pool__virtual_servers__isnull=False
+        )
+        if not history:
+            members = members.filter(pool__config__latest=True)
+        rows = members.values_list(
+            'pool__virtual_servers__id', 'pool__virtual_servers__name',
+            'pool__virtual_servers__vs_address', 'pool__virtual_servers__vs_port',
+            'pool__config__device_id', 'pool__config__device__hostname', 'pool__name',
+            'name', 'address', 'port',
+        ).order_by('pool__config__device__hostname', 'pool__virtual_servers__name', 'name')
+
+        virtuals = {}
+        for (vs_id, vs_name, vs_address, vs_port, device_id, hostname, pool_name,
+             member_name, member_address, member_port) in rows:
+            entry = virtuals.setdefault(vs_id, {
+                "id": vs_id,
+                "name": vs_name,
+                "vs_address": vs_address,
+                "vs_port": vs_port,
+                "device_id": device_id,
+                "device_name": hostname,
+                "pool": pool_name,
+                "members": [],
+            })
+            entry["members"].append({"name": member_name, "address": member_address, "port": member_port})
+        return list(virtuals.values())
+
+    return _cached(f'backend:{network}:{int(history)}', compute)
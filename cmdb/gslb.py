@@ -0,0 +1,162 @@
+"""
+GTM与LTM跨设备关联
+
+GTM pool成员经server解析出的 地址:端口 与LTM VS的 地址:端口 做哈希连接，
+结果预先写入GtmLtmLink。某台设备的配置变化时只重算该设备涉及的地址:端口，
+不做全量重建。
+"""
+import logging
+from itertools import islice
+
+from django.db import transaction
+
+from .bulk import bulk_insert
+
+logger = logging.getLogger(__name__)
+
+# 每批重算的地址:端口数量，避免IN子句过长
+LINK_BATCH_SIZE = 500
+
+
+def refresh_links(device_ids):
+    """
+    设备有新的最新配置或配置对象重新提取后调用，增量重算相关的关联
+
+    受影响的地址:端口包括：这些设备已有关联涉及的地址:端口（可能已失效），
+    以及这些设备最新配置中GTM成员与LTM VS的地址:端口
+    """
+    from cmdb.models import GtmLtmLink, GtmPoolMember, LtmVirtualServer
+
+    device_ids = list(device_ids)
+    if not device_ids:
+        return 0
+    endpoints = set(
+        GtmLtmLink.objects.filter(gtm_member__config__device_id__in=device_ids).values_list('endpoint', flat=True)
+    )
+    endpoints.update(
+        GtmLtmLink.objects.filter(ltm_vs__config__device_id__in=device_ids).values_list('endpoint', flat=True)
+    )
+    endpoints.update(
+        GtmPoolMember.objects.filter(config__device_id__in=device_ids, config__latest=True, endpoint__isnull=False)
+        .values_list('endpoint', flat=True)
+    )
+    endpoints.update(
+        LtmVirtualServer.objects.filter(config__device_id__in=device_ids, config__latest=True, endpoint__isnull=False)
+        .values_list('endpoint', flat=True)
+    )
+    return rebuild_links(endpoints)
+
+
+def rebuild_links(endpoints=None):
+    """
+    重算指定地址:端口的关联，endpoints为None时全量重建
+
+    Returns:
+        写入的关联数
+    """
+    from cmdb.models import GtmLtmLink, GtmPoolMember, LtmVirtualServer
+
+    if endpoints is None:
+        with transaction.atomic():
+            GtmLtmLink.objects.all().delete()
+        endpoints = set(
+            GtmPoolMember.objects.filter(config__latest=True, endpoint__isnull=False)
+            .values_list('endpoint', flat=True)
+        )
+
+    created = 0
+    endpoints = iter(sorted(endpoints))
+    while True:
+        batch = list(islice(endpoints, LINK_BATCH_SIZE))
+        if not batch:
+            break
+        # 构建端：LTM VS按地址:端口分桶；探测端：逐个GTM成员查桶
+        virtuals = {}
+        for vs_id, endpoint in LtmVirtualServer.objects.filter(
+            endpoint__in=batch, config__latest=True
+        ).values_list('id', 'endpoint'):
+            virtuals.setdefault(endpoint, []).append(vs_id)
+        links = [
+            GtmLtmLink(endpoint=endpoint, gtm_member_id=member_id, ltm_vs_id=vs_id)
+            for member_id, endpoint in GtmPoolMember.objects.filter(
+                endpoint__in=batch, config__latest=True
+            ).values_list('id', 'endpoint')
+            for vs_id in virtuals.get(endpoint, [])
+        ]
+        with transaction.atomic():
+            GtmLtmLink.objects.filter(endpoint__in=batch).delete()
+            bulk_insert(GtmLtmLink, links)
+        created += len(links)
+    logger.debug(f'GTM-LTM关联重算完成，写入 {created} 条')
+    return created
+
+
+def consistency_report(wideip=None):
+    """
+    GTM与LTM一致性报告
+
+    Args:
+        wideip: 只输出指定名称的wideip链路
+
+    Returns:
+        dict，包含 dangling_members（找不到LTM VS的GTM成员）、
+        unreferenced_virtuals（未被任何GTM成员引用的LTM VS）、
+        chains（wideip → GTM pool → 成员 → LTM VS → LTM pool成员）
+    """
+    from cmdb.models import GtmPool, GtmPoolMember, GtmWideip, LtmPoolMember, LtmVirtualServer
+
+    dangling = list(
+        GtmPoolMember.objects.filter(config__latest=True, ltm_links__isnull=True)
+        .values('id', 'config__device__hostname', 'pool__name', 'server', 'vs_name', 'endpoint', 'enabled')
+        .order_by('config__device__hostname', 'pool__name', 'vs_name')
+    )
+    unreferenced = list(
+        LtmVirtualServer.objects.filter(config__latest=True, gtm_links__isnull=True)
+        .values('id', 'config__device__hostname', 'name', 'endpoint')
+        .order_by('config__device__hostname', 'name')
+    )
+
+    wideips = GtmWideip.objects.filter(config__latest=True).select_related('config__device').order_by('name')
+    if wideip:
+        wideips = wideips.filter(name=wideip)
+    wideips = list(wideips)
+    config_ids = {w.config_id for w in wideips}
+
+    pools, pool_by_id = {}, {}
+    for pool_id, config_id, pool_type, name in GtmPool.objects.filter(config_id__in=config_ids).values_list(
+        'id', 'config_id', 'type', 'name'
+    ):
+        pool_by_id[pool_id] = pools[(config_id, pool_type, name)] = {"name": name, "members": []}
+
+    members = {}
+    for member in GtmPoolMember.objects.filter(pool_id__in=pool_by_id).order_by('id'):
+        entry = {"server": member.server, "vs_name": member.vs_name, "endpoint": member.endpoint,
+                 "enabled": member.enabled, "virtuals": []}
+        members[member.id] = entry
+        pool_by_id[member.pool_id]["members"].append(entry)
+
+    virtuals = {}
+    for member_id, vs_id, hostname, vs_name, pool_id in LtmVirtualServer.objects.filter(
+        gtm_links__gtm_member_id__in=members
+    ).values_list('gtm_links__gtm_member_id', 'id', 'config__device__hostname', 'name', 'pool_ref_id'):
+        entry = virtuals.setdefault(vs_id, {"device": hostname, "name": vs_name, "pool_id": pool_id, "backends": []})
+        members[member_id]["virtuals"].append(entry)
+    backend_pools = {entry["pool_id"] for entry in virtuals.values() if entry["pool_id"]}
+    backends = {}
+    for pool_id, name, address, port in LtmPoolMember.objects.filter(pool_id__in=backend_pools).values_list(
+        'pool_id', 'name', 'address', 'port'
+    ):
+        backends.setdefault(pool_id, []).append({"name": name, "address": address, "port": port})
+    for entry in virtuals.values():
+        entry["backends"] = backends.get(entry.pop("pool_id"), [])
+
+    chains = [
+        {
+            "wideip": w.name,
+            "type": w.type,
+            "device": w.config.device.hostname,
+            "pools": [pools.get((w.config_id, w.type, name), {"name": name, "members": []}) for name in w.pools or []],
+        }
+        for w in wideips
+    ]
+    return {"dangling_members": dangling, "unreferenced_virtuals": unreferenced, "chains": chains}
@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from cmdb.archive import ARCHIVE_CHUNK_SIZE, archive_configs, archive_enabled, select_archivable_configs
+from cmdb.retention import incremental_vacuum
+
+
+class Command(BaseCommand):
+    """把冷的历史配置移入归档库"""
+    help = (
+        '把早于 CMDB_ARCHIVE_AFTER_DAYS 天的非最新配置移入 CMDB_ARCHIVE_DATABASE，提取对象从主库删除，'
+        '对象级变更记录留在主库；归档库不受 compact_configs 保留策略管理'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after-days', type=int, default=None, help='归档早于该天数的历史配置')
+        parser.add_argument('--chunk-size', type=int, default=ARCHIVE_CHUNK_SIZE, help='每个事务归档的配置数')
+        parser.add_argument('--pause', type=float, default=0, help='每批之间暂停的秒数，给在线请求让出写锁')
+        parser.add_argument('--dry-run', action='store_true', help='只统计待归档的配置数')
+        parser.add_argument('--no-vacuum', action='store_true', help='归档后不对主库执行增量清理')
+
+    def handle(self, *args, **options):
+        if not archive_enabled():
+            raise CommandError('未配置 CMDB_ARCHIVE_DATABASE 或数据库不是SQLite')
+        config_ids = list(select_archivable_configs(options['after_days']))
+        if options['dry_run']:
+            self.stdout.write(f'待归档历史配置 {len(config_ids)} 个')
+            return
+
+        start = time.monotonic()
+        archived = 0
+
+        def progress(count, _):
+            nonlocal archived
+            archived += count
+            self.stdout.write(f'已归档 {archived}/{len(config_ids)} 个历史配置')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        counts = archive_configs(config_ids, chunk_size=options['chunk_size'], on_chunk=progress)
+        detail = '，'.join(f'{name} {count}' for name, count in sorted(counts.items()) if count)
+        self.stdout.write(self.style.SUCCESS(
+            f'归档完成，耗时 {time.monotonic() - start:.1f} 秒：{detail or "无需归档的配置"}'
+        ))
+        if not options['no_vacuum'] and config_ids:
+            reclaimed = incremental_vacuum()
+            if reclaimed:
+                self.stdout.write(self.style.SUCCESS(f'主库回收 {reclaimed / 1024 / 1024:.1f} MB'))
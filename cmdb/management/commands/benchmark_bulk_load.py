@@ -0,0 +1,121 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from cmdb.bulk import bulk_insert, copy_supported
+from cmdb.models import Device, DeviceConfig
+from cmdb.retention import raw_delete_cascade
+from cmdb.utils import config_parser
+from cmdb.management.commands.benchmark_config_writes import _sample_config
+
+BENCH_PREFIX = 'bench-bulk-'
+
+
+def _f5_config(apps):
+    """生成包含 apps 组 node/pool/VS 的F5 LTM模拟配置"""
+    blocks = []
+    for app in range(apps):
+        backend = f'10.200.{app // 250}.{app % 250 + 1}'
+        blocks.append(f"""ltm node /Common/{backend} {{
+    address {backend}
+}}
+ltm pool /Common/app{app}_pool {{
+    load-balancing-mode round-robin
+    members {{
+        /Common/{backend}:8080 {{
+            address {backend}
+        }}
+    }}
+    monitor /Common/http
+}}
+ltm virtual /Common/app{app}_vs {{
+    destination /Common/10.30.{app // 250}.{app % 250 + 1}:443
+    ip-protocol tcp
+    mask 255.255.255.255
+    pool /Common/app{app}_pool
+}}
+""")
+    return ''.join(blocks)
+
+
+class Command(BaseCommand):
+    """提取对象批量写入基准测试"""
+    help = '在模拟设备群上比较 bulk_create 与 COPY 写入提取对象的耗时；请在一次性数据库上运行，会创建并删除临时数据'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--devices', type=int, default=10000, help='模拟设备数')
+        parser.add_argument('--f5-ratio', type=float, default=0.1, help='F5设备所占比例')
+        parser.add_argument('--interfaces', type=int, default=48, help='每台交换机的接口数')
+        parser.add_argument('--f5-apps', type=int, default=50, help='每台F5的应用（node/pool/VS）组数')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每次bulk_extract的配置数')
+        parser.add_argument('--method', choices=['insert', 'copy', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        methods = ['insert', 'copy'] if options['method'] == 'both' else [options['method']]
+        if 'copy' in methods and not copy_supported(connection.alias):
+            self.stdout.write(self.style.WARNING(f'{connection.vendor} 不支持COPY，只测试bulk_create'))
+            methods.remove('copy')
+
+        # 每种设备只解析一次，所有设备复用解析结果，只测量写入
+        shapes = {
+            'h3c_switch': config_parser.parse_config(_sample_config(0, options['interfaces']), 'h3c_switch'),
+            'f5_ltm': config_parser.parse_config(_f5_config(options['f5_apps']), 'f5_ltm'),
+        }
+        f5_every = round(1 / options['f5_ratio']) if options['f5_ratio'] else 0
+        self.stdout.write(
+            f"{connection.vendor}：{options['devices']} 台设备，F5占比 {options['f5_ratio']:.0%}，"
+            f"交换机 {options['interfaces']} 个接口，F5 {options['f5_apps']} 组应用"
+        )
+
+        for method in methods:
+            config_ids = self._create_fleet(options['devices'], f5_every, shapes)
+            try:
+                rows, elapsed = self._extract(config_ids, options['chunk_size'], copy=method == 'copy')
+            finally:
+                self._cleanup()
+            self.stdout.write(self.style.SUCCESS(
+                f'{method:>6}: 写入 {rows} 行，耗时 {elapsed:.2f} 秒，{rows / elapsed:.0f} 行/秒'
+            ))
+
+    def _create_fleet(self, count, f5_every, shapes):
+        self._cleanup()
+        devices = [
+            Device(
+                hostname=f'{BENCH_PREFIX}{i}', address=f'198.18.{i // 250 % 250}.{i % 250 + 1}',
+                username='bench', password='bench',
+                device_type='f5_ltm' if f5_every and i % f5_every == 0 else 'h3c_switch',
+            )
+            for i in range(count)
+        ]
+        bulk_insert(Device, devices, batch_size=1000)
+        devices = Device.objects.filter(hostname__startswith=BENCH_PREFIX).only('id', 'device_type')
+        configs = [
+            DeviceConfig(device=device, config_text='', config_json=shapes[device.device_type], latest=False)
+            for device in devices
+        ]
+        with transaction.atomic():
+            bulk_insert(DeviceConfig, configs, batch_size=1000)
+        return [config.pk for config in configs]
+
+    @staticmethod
+    def _extract(config_ids, chunk_size, copy):
+        rows = 0
+        elapsed = 0.0
+        for offset in range(0, len(config_ids), chunk_size):
+            configs = list(DeviceConfig.objects.filter(pk__in=config_ids[offset:offset + chunk_size]))
+            # 对象构造不计入写入耗时
+            built = [config._build_objects() for config in configs]
+            start = time.monotonic()
+            with transaction.atomic():
+                for model in DeviceConfig.extracted_models():
+                    objects = [obj for objects in built for obj in objects.get(model, [])]
+                    bulk_insert(model, objects, batch_size=1000, copy=copy)
+                    rows += len(objects)
+            elapsed += time.monotonic() - start
+        return rows, elapsed
+
+    @staticmethod
+    def _cleanup():
+        configs = DeviceConfig._base_manager.filter(device__hostname__startswith=BENCH_PREFIX)
+        with transaction.atomic():
+            raw_delete_cascade(DeviceConfig, configs, {})
+            Device.objects.filter(hostname__startswith=BENCH_PREFIX)._raw_delete(connection.alias)
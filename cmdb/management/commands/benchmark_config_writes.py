@@ -0,0 +1,100 @@
+import asyncio
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from cmdb.models import Device, DeviceConfig
+from cmdb.retention import delete_configs
+from cmdb.writer import WRITE_BATCH_SIZE, ConfigWriter
+
+BENCH_PREFIX = 'bench-writer-'
+
+
+def _sample_config(index, interfaces):
+    """生成H3C格式的模拟配置，每个设备内容不同"""
+    lines = [f' sysname {BENCH_PREFIX}{index}', '#']
+    for port in range(interfaces):
+        lines += [
+            f'interface GigabitEthernet1/0/{port + 1}',
+            f' description bench {index}-{port}',
+            f' ip address 10.{index // 250 % 250}.{index % 250}.{port % 250} 255.255.255.0',
+            '#',
+        ]
+    return '\n'.join(lines)
+
+
+class Command(BaseCommand):
+    """配置并发写入基准测试"""
+    help = '模拟大量并发采集同时保存配置，比较逐条写入与单写者队列的吞吐量；会创建并删除临时设备'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fetchers', type=int, default=200, help='并发采集协程数')
+        parser.add_argument('--per-fetcher', type=int, default=5, help='每个采集协程保存的配置数')
+        parser.add_argument('--interfaces', type=int, default=48, help='每份模拟配置的接口数')
+        parser.add_argument('--latency', type=float, default=0.05, help='模拟采集耗时上限（秒）')
+        parser.add_argument('--batch-size', type=int, default=WRITE_BATCH_SIZE, help='队列每个事务的配置数')
+        parser.add_argument('--mode', choices=['direct', 'queue', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        modes = ['direct', 'queue'] if options['mode'] == 'both' else [options['mode']]
+        self.stdout.write(
+            f"{connection.vendor} {connection.settings_dict['NAME']}，"
+            f"{options['fetchers']} 个并发采集，每个保存 {options['per_fetcher']} 份配置"
+        )
+        for mode in modes:
+            devices = self._create_devices(options['fetchers'] * options['per_fetcher'])
+            try:
+                elapsed, saved, failed, batches = asyncio.run(self._run(mode, devices, options))
+            finally:
+                config_ids = DeviceConfig.objects.filter(
+                    device__hostname__startswith=BENCH_PREFIX
+                ).values_list('id', flat=True)
+                DeviceConfig.objects.filter(id__in=config_ids).update(latest=False)
+                delete_configs(list(config_ids))
+                Device.objects.filter(hostname__startswith=BENCH_PREFIX).delete()
+            self.stdout.write(self.style.SUCCESS(
+                f'{mode:>6}: 保存 {saved} 份，失败 {failed} 份，耗时 {elapsed:.2f} 秒，'
+                f'{saved / elapsed:.1f} 份/秒' + (f'，{batches} 个事务' if batches else '')
+            ))
+
+    @staticmethod
+    def _create_devices(count):
+        Device.objects.filter(hostname__startswith=BENCH_PREFIX).delete()
+        Device.objects.bulk_create([
+            Device(
+                hostname=f'{BENCH_PREFIX}{i}', address=f'198.18.{i // 250 % 250}.{i % 250 + 1}',
+                username='bench', password='bench', device_type='h3c_switch',
+            )
+            for i in range(count)
+        ])
+        return list(Device.objects.filter(hostname__startswith=BENCH_PREFIX).order_by('id'))
+
+    async def _run(self, mode, devices, options):
+        per_fetcher = options['per_fetcher']
+        failed = 0
+
+        async def fetcher(index, writer):
+            nonlocal failed
+            for device in devices[index * per_fetcher:(index + 1) * per_fetcher]:
+                # 模拟网络采集耗时
+                await asyncio.sleep(random.uniform(0, options['latency']))
+                config = DeviceConfig(device=device, config_text=_sample_config(device.pk, options['interfaces']))
+                try:
+                    if writer is None:
+                        await config.asave()
+                    else:
+                        await writer.save(config)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'保存失败: {e}')
+
+        start = time.monotonic()
+        if mode == 'direct':
+            await asyncio.gather(*[fetcher(i, None) for i in range(options['fetchers'])])
+            batches = 0
+        else:
+            async with ConfigWriter(batch_size=options['batch_size']) as writer:
+                await asyncio.gather(*[fetcher(i, writer) for i in range(options['fetchers'])])
+            batches = writer.batches
+        elapsed = time.monotonic() - start
+        return elapsed, len(devices) - failed, failed, batches
@@ -0,0 +1,83 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from cmdb.retention import (
+    COMPACT_CHUNK_SIZE, delete_configs, enable_incremental_vacuum, incremental_vacuum, retention_policy,
+    select_expired_configs, sqlite_space,
+)
+
+
+def _size(num_bytes):
+    return f'{num_bytes / 1024 / 1024:.1f} MB'
+
+
+class Command(BaseCommand):
+    """按保留策略压缩配置历史"""
+    help = '按 CMDB_RETENTION 删除主库中过期的历史配置及其提取对象（不涉及已归档的配置），SQLite下随后执行增量清理回收空间'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-all-days', type=int, default=None, help='该天数内的版本全部保留')
+        parser.add_argument('--daily-days', type=int, default=None, help='该天数内每天保留一份，更早的每周一份')
+        parser.add_argument('--weekly-days', type=int, default=None, help='超过该天数的历史版本全部删除')
+        parser.add_argument('--chunk-size', type=int, default=COMPACT_CHUNK_SIZE, help='每个事务删除的配置数')
+        parser.add_argument('--pause', type=float, default=0, help='每批之间暂停的秒数，给在线请求让出写锁')
+        parser.add_argument('--dry-run', action='store_true', help='只统计待删除的配置数，不修改数据库')
+        parser.add_argument('--no-vacuum', action='store_true', help='删除后不执行增量清理')
+        parser.add_argument(
+            '--enable-incremental-vacuum', action='store_true',
+            help='将SQLite切换为增量清理模式，会执行一次独占数据库的完整VACUUM',
+        )
+
+    def handle(self, *args, **options):
+        policy = retention_policy(
+            keep_all_days=options['keep_all_days'],
+            daily_days=options['daily_days'],
+            weekly_days=options['weekly_days'],
+        )
+        if policy['keep_all_days'] < 0 or policy['daily_days'] < policy['keep_all_days']:
+            raise CommandError('保留策略无效：daily_days 不能小于 keep_all_days')
+        if policy['weekly_days'] is not None and policy['weekly_days'] < policy['daily_days']:
+            raise CommandError('保留策略无效：weekly_days 不能小于 daily_days')
+
+        expired = list(select_expired_configs(policy))
+        if options['dry_run']:
+            self.stdout.write(f'保留策略 {policy}，待删除历史配置 {len(expired)} 个')
+            return
+
+        is_sqlite = connection.vendor == 'sqlite'
+        if is_sqlite and options['enable_incremental_vacuum'] and sqlite_space()['auto_vacuum'] != 2:
+            self.stdout.write(self.style.WARNING('切换为增量清理模式，执行完整VACUUM期间数据库不可写'))
+            enable_incremental_vacuum()
+        before = sqlite_space() if is_sqlite else None
+
+        start = time.monotonic()
+        deleted = 0
+
+        def progress(count, _):
+            nonlocal deleted
+            deleted += count
+            self.stdout.write(f'已删除 {deleted}/{len(expired)} 个历史配置')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        counts = delete_configs(expired, chunk_size=options['chunk_size'], on_chunk=progress)
+        detail = '，'.join(f'{name} {count}' for name, count in sorted(counts.items()) if count)
+        self.stdout.write(self.style.SUCCESS(
+            f'删除完成，耗时 {time.monotonic() - start:.1f} 秒：{detail or "无过期配置"}'
+        ))
+
+        if not is_sqlite or options['no_vacuum']:
+            return
+        if before['auto_vacuum'] != 2:
+            freelist = sqlite_space()['freelist_count'] * before['page_size']
+            self.stdout.write(self.style.WARNING(
+                f'数据库未启用增量清理，{_size(freelist)} 空闲页留待复用；'
+                f'可使用 --enable-incremental-vacuum 切换'
+            ))
+            return
+        reclaimed = incremental_vacuum()
+        after = sqlite_space()
+        self.stdout.write(self.style.SUCCESS(
+            f'增量清理完成，回收 {_size(reclaimed)}，数据库 '
+            f'{_size(before["page_count"] * before["page_size"])} → {_size(after["page_count"] * after["page_size"])}'
+        ))
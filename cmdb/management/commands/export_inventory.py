@@ -0,0 +1,50 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from cmdb.exporters import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORT_RESOURCES, get_export_queryset, stream_export
+
+
+class Command(BaseCommand):
+    """流式导出设备清单及解析对象到文件"""
+    help = '流式导出设备、接口、Virtual Server、Pool为CSV/NDJSON/Parquet/Arrow'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=list(EXPORT_RESOURCES.keys()), help='要导出的资源')
+        parser.add_argument('--format', dest='file_format', choices=list(EXPORT_FORMATS.keys()), default='csv',
+                            help='导出格式，默认csv')
+        parser.add_argument('--output', '-o', default='-', help='输出文件路径，默认输出到标准输出')
+        parser.add_argument('--history', action='store_true', help='包含历史配置中的对象，默认只导出最新配置')
+        parser.add_argument('--device-type', help='按设备类型过滤')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='每批读取的行数')
+
+    def handle(self, *args, **options):
+        resource = options['resource']
+        file_format = options['file_format']
+        output = options['output']
+
+        queryset, columns = get_export_queryset(
+            resource,
+            latest_only=not options['history'],
+            device_type=options['device_type'],
+        )
+        try:
+            chunks = stream_export(resource, file_format, queryset, columns, chunk_size=options['chunk_size'])
+        except ImportError as e:
+            raise CommandError(str(e))
+
+        start = time.monotonic()
+        written = 0
+        stream = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+                written += len(chunk)
+        finally:
+            if output != '-':
+                stream.close()
+
+        if output != '-':
+            elapsed = time.monotonic() - start
+            self.stdout.write(self.style.SUCCESS(
+                f'导出完成: {resource} -> {output}，{written} 字节，耗时 {elapsed:.2f} 秒'
+            ))
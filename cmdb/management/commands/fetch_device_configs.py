@@ -1,6 +1,40 @@
+import asyncio
+import fnmatch
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
 from django.core.management.base import BaseCommand
-import requests
-from cmdb.models import Device, DeviceConfig
+from django.utils import timezone
+from cmdb.breaker import estimate_saved_seconds, plan_batch
+from cmdb.models import Device
+from cmdb.services import FETCH_CONCURRENCY, fetch_configs_concurrently
+
+# 断点文件在累计这么多个新完成的设备或距上次写入超过这么多秒后写入一次，结束或中断时再写入一次
+CHECKPOINT_FLUSH_EVERY = 100
+CHECKPOINT_FLUSH_SECONDS = 10
+
+
+def _percentile(values, percent):
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def _format_seconds(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m{seconds % 60:02d}s'
+    return f'{seconds}s'
+
 
 class Command(BaseCommand):
     """
@@ -8,50 +42,155 @@ class Command(BaseCommand):
     """
     help = 'Fetch device configurations from network devices using FastAPI'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', '-c', type=int, default=FETCH_CONCURRENCY,
+                            help=f'同时采集的设备数，默认{FETCH_CONCURRENCY}')
+        parser.add_argument('--device-type', action='append', dest='device_types',
+                            help='只采集指定设备类型，可重复指定')
+        parser.add_argument('--hostname', action='append', dest='hostname_globs',
+                            help='主机名通配符，如 "core-*"，可重复指定')
+        parser.add_argument('--stale-hours', type=float,
+                            help='只采集最近N小时内没有保存过配置的设备')
+        parser.add_argument('--checkpoint', type=str,
+                            help='断点文件路径，中断后使用同一文件重新运行会跳过已成功的设备')
+        parser.add_argument('--restart', action='store_true',
+                            help='忽略已有的断点文件，从头开始')
+        parser.add_argument('--ignore-breaker', action='store_true',
+                            help='不跳过连续连接失败而熔断的设备')
+        parser.add_argument('--no-probe', action='store_true',
+                            help='采集前不探测SSH端口（默认按 CMDB_FETCH_PROBE 设置探测）')
+
+    def _select_devices(self, options):
+        devices = Device.objects.all().order_by('id')
+        if options['device_types']:
+            devices = devices.filter(device_type__in=options['device_types'])
+        if options['stale_hours'] is not None:
+            fresh_since = timezone.now() - timedelta(hours=options['stale_hours'])
+            devices = devices.exclude(configs__time__gte=fresh_since)
+        devices = list(devices.distinct())
+
+        if options['hostname_globs']:
+            devices = [
+                device for device in devices
+                if any(fnmatch.fnmatch(device.hostname, pattern) for pattern in options['hostname_globs'])
+            ]
+        return devices
+
+    @staticmethod
+    def _load_checkpoint(path):
+        if path is None or not path.exists():
+            return set()
+        with path.open('r', encoding='utf-8') as f:
+            return set(json.load(f).get('done', []))
+
+    @staticmethod
+    def _save_checkpoint(path, done):
+        # 先写临时文件再替换，避免中断时留下损坏的断点文件
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump({'done': sorted(done), 'updated_at': timezone.now().isoformat()}, f)
+        os.replace(tmp_path, path)
+
     def handle(self, *args, **options):
         """
         执行命令逻辑
         """
-        # 获取所有设备
-        devices = Device.objects.all()
+        checkpoint = Path(options['checkpoint']) if options['checkpoint'] else None
+        if checkpoint is not None and options['restart'] and checkpoint.exists():
+            checkpoint.unlink()
+        done = self._load_checkpoint(checkpoint)
+
+        devices = self._select_devices(options)
+        pending = [device for device in devices if device.id not in done]
         self.stdout.write(f'Found {len(devices)} devices to process')
-        
-        # FastAPI接口地址
-        fastapi_url = 'http://localhost:8001/get-device-config'
-        
-        for device in devices:
-            self.stdout.write(f'Processing device: {device.hostname} ({device.address})')
-            
+        if done:
+            self.stdout.write(f'断点续传: 跳过已完成的 {len(devices) - len(pending)} 个设备')
+        skipped = []
+        if not options['ignore_breaker']:
+            # 熔断中的设备跳过，最近失败过的设备排在最前面
+            pending, skipped = plan_batch(pending)
+            if skipped:
+                self.stdout.write(f'熔断: 跳过连续连接失败的 {len(skipped)} 个设备')
+        probes = {device.id for device in pending if device.connect_failures}
+        recovered = 0
+
+        total = len(pending)
+        started = time.monotonic()
+        timings = defaultdict(list)
+        failures = defaultdict(int)
+        # 探测不可达的设备单独统计，不计入采集耗时分位数
+        unreachable = defaultdict(int)
+        finished = 0
+        # 尚未写入断点文件的完成数与上次写入时间
+        unsaved = 0
+        flushed_at = started
+
+        def flush_checkpoint():
+            nonlocal unsaved, flushed_at
+            if checkpoint is not None and unsaved:
+                self._save_checkpoint(checkpoint, done)
+            unsaved = 0
+            flushed_at = time.monotonic()
+
+        def on_result(device, result, elapsed):
+            nonlocal finished, recovered, unsaved
+            finished += 1
+            if elapsed is None:
+                unreachable[device.device_type] += 1
+                line = self.style.ERROR(f'DOWN {device.hostname}: {result.get("message")}')
+            elif result.get('success'):
+                timings[device.device_type].append(elapsed)
+                recovered += device.id in probes
+                done.add(device.id)
+                unsaved += 1
+                # 每个设备都重写断点文件会阻塞事件循环，按数量或时间间隔批量写入
+                if unsaved >= CHECKPOINT_FLUSH_EVERY or time.monotonic() - flushed_at >= CHECKPOINT_FLUSH_SECONDS:
+                    flush_checkpoint()
+                line = self.style.SUCCESS(f'OK   {device.hostname} {elapsed:.1f}s')
+            else:
+                timings[device.device_type].append(elapsed)
+                failures[device.device_type] += 1
+                line = self.style.ERROR(f'FAIL {device.hostname} {elapsed:.1f}s: {result.get("message")}')
+
+            spent = time.monotonic() - started
+            eta = spent / finished * (total - finished)
+            self.stdout.write(f'[{finished}/{total} {finished * 100 // total}% ETA {_format_seconds(eta)}] {line}')
+
+        if pending:
             try:
-                # 准备设备信息
-                device_info = {
-                    'hostname': device.hostname,
-                    'address': device.address,
-                    'username': device.username,
-                    'password': device.password,
-                    'device_type': device.device_type
-                }
-                
-                # 调用FastAPI接口获取配置
-                response = requests.post(fastapi_url, json=device_info, timeout=60)
-                response.raise_for_status()  # 如果请求失败，抛出异常
-                
-                # 解析响应
-                result = response.json()
-                
-                if result['success']:
-                    # 保存配置到数据库
-                    DeviceConfig.objects.create(
-                        device=device,
-                        config=result['config']
-                    )
-                    self.stdout.write(self.style.SUCCESS(f'Successfully fetched config for {device.hostname}'))
-                else:
-                    self.stdout.write(self.style.ERROR(f'Failed to fetch config for {device.hostname}: {result.get("detail", "Unknown error")}'))
-                    
-            except requests.exceptions.RequestException as e:
-                self.stdout.write(self.style.ERROR(f'Network error for {device.hostname}: {str(e)}'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error processing {device.hostname}: {str(e)}'))
-        
-        self.stdout.write(self.style.SUCCESS('Configuration fetch completed'))
+                asyncio.run(fetch_configs_concurrently(
+                    pending, options['concurrency'], on_result, probe=False if options['no_probe'] else None
+                ))
+            finally:
+                flush_checkpoint()
+
+        self.stdout.write('\n设备类型          数量    失败  不可达    p50(s)   p95(s)')
+        for device_type in sorted(timings.keys() | unreachable.keys()):
+            values = timings[device_type]
+            self.stdout.write(
+                f'{device_type:<16}{len(values):>6}{failures[device_type]:>8}{unreachable[device_type]:>8}'
+                f'{_percentile(values, 50):>10.2f}{_percentile(values, 95):>9.2f}'
+            )
+
+        if unreachable:
+            self.stdout.write(f'\nSSH端口探测不可达 {sum(unreachable.values())} 个设备，未进入采集')
+        if probes:
+            self.stdout.write(f'\n此前连接失败的设备 {len(probes)} 个：恢复 {recovered} 个，仍失败 {len(probes) - recovered} 个')
+        if skipped:
+            # 与 batch_fetch_configs 相同，按本次批量采集的并发数估算
+            saved = estimate_saved_seconds(len(skipped), options['concurrency'])
+            self.stdout.write(
+                f'熔断跳过 {len(skipped)} 个设备，按每个设备耗满一次连接超时估计节省约 {_format_seconds(saved)}'
+            )
+
+        failed = sum(failures.values()) + sum(unreachable.values())
+        elapsed = time.monotonic() - started
+        if failed:
+            hint = '，使用相同的 --checkpoint 重新运行可只重试失败设备' if checkpoint is not None else ''
+            self.stdout.write(self.style.WARNING(
+                f'Configuration fetch completed with {failed} failures in {_format_seconds(elapsed)}{hint}'
+            ))
+        else:
+            if checkpoint is not None and checkpoint.exists():
+                checkpoint.unlink()
+            self.stdout.write(self.style.SUCCESS(f'Configuration fetch completed in {_format_seconds(elapsed)}'))
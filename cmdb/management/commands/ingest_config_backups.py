@@ -0,0 +1,261 @@
+import ipaddress
+import logging
+import re
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+from pathlib import Path, PurePosixPath
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from cmdb.models import Device, DeviceConfig
+from cmdb.bulk import bulk_insert
+from cmdb.changes import record_history_changes
+from cmdb.events import append_event
+from cmdb.graph import invalidate_graph_cache
+from cmdb.gslb import refresh_links
+from cmdb.search import get_search_engine
+from cmdb.utils import config_normalizer, config_parser, parse_config_safe
+
+# 文件名中常见的备份后缀，匹配设备前去掉
+BACKUP_SUFFIXES = {'.xsh', '.txt', '.log', '.cfg', '.conf', '.bak', '.config'}
+# 主机名与日期等信息之间常见的分隔符
+NAME_SEPARATORS = '_-. @'
+logger = logging.getLogger(__name__)
+
+IP_PATTERN = re.compile(r'(?<![\d.])(\d{1,3}(?:\.\d{1,3}){3})(?![\d.])')
+
+
+def _decode(data: bytes) -> str:
+    """配置备份可能来自不同终端，优先UTF-8，失败时按GB18030解码"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('gb18030', errors='replace')
+
+
+class _BackupSource:
+    """统一遍历目录或tar/zip归档中的备份文件，产出 (路径, 修改时间, 读取函数)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __iter__(self):
+        if self.path.is_dir():
+            for file_path in sorted(self.path.rglob('*')):
+                if file_path.is_file():
+                    mtime = datetime.fromtimestamp(file_path.stat().st_mtime, tz=dt_timezone.utc)
+                    yield PurePosixPath(file_path.relative_to(self.path).as_posix()), mtime, file_path.read_bytes
+        elif tarfile.is_tarfile(self.path):
+            with tarfile.open(self.path, 'r:*') as archive:
+                for member in archive:
+                    if member.isfile():
+                        mtime = datetime.fromtimestamp(member.mtime, tz=dt_timezone.utc)
+                        # 立即读取，tar流只能顺序访问
+                        data = archive.extractfile(member).read()
+                        yield PurePosixPath(member.name), mtime, (lambda data=data: data)
+        elif zipfile.is_zipfile(self.path):
+            with zipfile.ZipFile(self.path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        mtime = datetime(*info.date_time, tzinfo=dt_timezone.utc)
+                        yield PurePosixPath(info.filename), mtime, (lambda name=info.filename: archive.read(name))
+        else:
+            raise CommandError(f'{self.path} 既不是目录也不是tar/zip归档')
+
+
+class DeviceMatcher:
+    """根据文件名或所在目录名将备份文件匹配到设备（主机名或IP地址）"""
+
+    def __init__(self):
+        self.by_hostname = {}
+        self.by_address = {}
+        for device in Device.objects.only('id', 'hostname', 'address', 'device_type'):
+            self.by_hostname[device.hostname.lower()] = device
+            self.by_address[device.address] = device
+
+    @staticmethod
+    def _stem(name: str) -> str:
+        while True:
+            suffix = PurePosixPath(name).suffix.lower()
+            if suffix not in BACKUP_SUFFIXES:
+                return name
+            name = name[:-len(suffix)]
+
+    def _match_name(self, name: str):
+        stem = self._stem(name)
+        lowered = stem.lower()
+        if lowered in self.by_hostname:
+            return self.by_hostname[lowered]
+        if stem in self.by_address:
+            return self.by_address[stem]
+
+        for candidate in IP_PATTERN.findall(stem):
+            try:
+                ipaddress.ip_address(candidate)
+            except ValueError:
+                continue
+            if candidate in self.by_address:
+                return self.by_address[candidate]
+
+        # 取分隔符前最长的前缀作为主机名，如 core-sw01_20230101.log
+        for index in range(len(lowered) - 1, 0, -1):
+            if lowered[index] in NAME_SEPARATORS and lowered[:index] in self.by_hostname:
+                return self.by_hostname[lowered[:index]]
+        return None
+
+    def match(self, path: PurePosixPath):
+        device = self._match_name(path.name)
+        if device is None and len(path.parts) > 1:
+            device = self._match_name(path.parent.name)
+        return device
+
+
+class Command(BaseCommand):
+    """从目录或归档批量导入历史配置备份"""
+    help = '从目录或tar/zip归档批量导入历史配置备份，按主机名或IP匹配设备，并记录对象级变更与created事件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='备份目录或tar/tar.gz/zip归档路径')
+        parser.add_argument('--workers', type=int, default=None, help='解析进程数，默认为CPU核数')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每个事务写入的配置数')
+        parser.add_argument('--dry-run', action='store_true', help='只匹配与去重，不解析也不写入数据库')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'{path} 不存在')
+
+        matcher = DeviceMatcher()
+        stats = {'files': 0, 'unmatched': 0, 'duplicates': 0, 'inserted': 0, 'parse_failed': 0}
+        unmatched_samples = []
+        seen = set()
+        touched_devices = set()
+        start = time.monotonic()
+
+        files = iter(_BackupSource(path))
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            while True:
+                batch = list(islice(files, options['batch_size']))
+                if not batch:
+                    break
+
+                candidates = []
+                for file_path, mtime, read in batch:
+                    stats['files'] += 1
+                    device = matcher.match(file_path)
+                    if device is None:
+                        stats['unmatched'] += 1
+                        if len(unmatched_samples) < 20:
+                            unmatched_samples.append(str(file_path))
+                        continue
+                    config_text = _decode(read())
+                    digest = config_normalizer.digest(config_text, device.device_type)
+                    if (device.id, digest) in seen:
+                        stats['duplicates'] += 1
+                        continue
+                    seen.add((device.id, digest))
+                    candidates.append((device, mtime, config_text, digest))
+
+                # 与库中已有的配置去重
+                existing = set(
+                    DeviceConfig.objects.filter(
+                        device_id__in={device.id for device, *_ in candidates},
+                        config_hash__in={digest for *_, digest in candidates},
+                    ).values_list('device_id', 'config_hash')
+                )
+                new_configs = [item for item in candidates if (item[0].id, item[3]) not in existing]
+                stats['duplicates'] += len(candidates) - len(new_configs)
+
+                if options['dry_run']:
+                    stats['inserted'] += len(new_configs)
+                    continue
+                if not new_configs:
+                    continue
+
+                # 导入的都是历史版本，按解析策略决定是否立即解析
+                if DeviceConfig.parse_eagerly(latest=False):
+                    parsed = executor.map(
+                        parse_config_safe,
+                        [(config_text, device.device_type) for device, _, config_text, _ in new_configs],
+                        chunksize=8,
+                    )
+                else:
+                    parsed = [None] * len(new_configs)
+                objects = []
+                for (device, mtime, config_text, digest), config_json in zip(new_configs, parsed):
+                    if config_json is None and DeviceConfig.parse_eagerly(latest=False):
+                        stats['parse_failed'] += 1
+                    objects.append(DeviceConfig(
+                        device=device,
+                        config_text=config_text,
+                        config_json=config_json,
+                        config_hash=digest,
+                        template_version=config_parser.get_template_version(device.device_type) if config_json else '',
+                        latest=False,
+                        time=mtime,
+                    ))
+
+                # 批量写入不调用save()，解析结果、对象提取、对象级变更与事件在此一并写入；PostgreSQL下使用COPY
+                with transaction.atomic():
+                    bulk_insert(DeviceConfig, objects, batch_size=500)
+                    DeviceConfig.bulk_extract([obj for obj in objects if obj.config_json])
+                    summaries = record_history_changes(obj.pk for obj in objects)
+                    for obj in sorted(objects, key=lambda obj: (obj.time, obj.pk)):
+                        append_event('created', obj, summaries.get(obj.pk))
+                    get_search_engine().sync_configs(obj.pk for obj in objects)
+                touched_devices.update(device.id for device, *_ in new_configs)
+                stats['inserted'] += len(objects)
+
+                elapsed = time.monotonic() - start
+                self.stdout.write(
+                    f"已处理 {stats['files']} 个文件，写入 {stats['inserted']} 条，"
+                    f"{stats['files'] / elapsed:.0f} 文件/秒"
+                )
+
+        if touched_devices and not options['dry_run']:
+            self._promote_latest(touched_devices)
+
+        elapsed = time.monotonic() - start
+        for sample in unmatched_samples:
+            self.stdout.write(self.style.WARNING(f'未匹配到设备: {sample}'))
+        self.stdout.write(self.style.SUCCESS(
+            f"\n导入完成，耗时 {elapsed:.1f} 秒\n"
+            f"文件: {stats['files']}  写入: {stats['inserted']}  重复: {stats['duplicates']}  "
+            f"未匹配: {stats['unmatched']}  解析失败: {stats['parse_failed']}"
+        ))
+
+    @staticmethod
+    def _promote_latest(device_ids):
+        """没有最新配置的设备，将导入的最新一份历史配置标记为最新"""
+        has_latest = set(
+            DeviceConfig.objects.filter(device_id__in=device_ids, latest=True).values_list('device_id', flat=True)
+        )
+        newest = (
+            DeviceConfig.objects.filter(device_id__in=device_ids - has_latest)
+            .values('device_id').annotate(newest=Max('time'))
+        )
+        promoted = []
+        with transaction.atomic():
+            for row in newest:
+                config_id = (
+                    DeviceConfig.objects.filter(device_id=row['device_id'], time=row['newest'])
+                    .order_by('-id').values_list('id', flat=True).first()
+                )
+                DeviceConfig.objects.filter(pk=config_id).update(latest=True)
+                promoted.append(config_id)
+            get_search_engine().sync_configs(promoted)
+            for config in DeviceConfig.objects.select_related('device').defer('config_text', 'config_json').filter(pk__in=promoted):
+                append_event('promoted', config)
+            refresh_links(DeviceConfig.objects.filter(pk__in=promoted).values_list('device_id', flat=True))
+        invalidate_graph_cache()
+
+        # 成为最新版本的配置必须已解析
+        for config in DeviceConfig.objects.select_related('device').filter(pk__in=promoted, config_json__isnull=True):
+            try:
+                config.ensure_parsed()
+            except Exception as e:
+                logger.warning(f'解析配置{config.pk}失败: {str(e)}')
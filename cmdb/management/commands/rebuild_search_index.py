@@ -0,0 +1,18 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from cmdb.search import get_search_engine
+
+
+class Command(BaseCommand):
+    """重建配置全文索引"""
+    help = '根据数据库中的配置重建全文索引，CMDB_SEARCH_HISTORY 开启时包含历史版本'
+
+    def handle(self, *args, **options):
+        engine = get_search_engine()
+        start = time.monotonic()
+        with transaction.atomic():
+            engine.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'{type(engine).__name__} 索引重建完成，耗时 {time.monotonic() - start:.1f} 秒'
+        ))
@@ -0,0 +1,51 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from cmdb.services import REPARSE_CHUNK_SIZE, reparse_configs, stale_configs_queryset
+from cmdb.utils import parse_time_option
+
+
+class Command(BaseCommand):
+    """模板变更后重新解析历史配置"""
+    help = '重新解析模板版本已过期的配置并重新提取接口、Virtual Server等对象，可中断后继续'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--device-type', action='append', dest='device_types', help='只处理指定设备类型，可重复指定')
+        parser.add_argument('--latest-only', action='store_true', help='只处理各设备的最新配置')
+        parser.add_argument('--since', help='只处理该时间之后保存的配置，如 2024-01-01')
+        parser.add_argument('--until', help='只处理该时间之前保存的配置')
+        parser.add_argument('--workers', type=int, default=None, help='解析进程数，默认为CPU核数，0为不使用进程池')
+        parser.add_argument('--chunk-size', type=int, default=REPARSE_CHUNK_SIZE, help='每个事务处理的配置数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计需要重新解析的配置数')
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_time_option(options['since'])
+            until = parse_time_option(options['until'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        queryset = stale_configs_queryset(
+            device_types=options['device_types'],
+            latest_only=options['latest_only'],
+            since=since,
+            until=until,
+        )
+        total = queryset.count()
+        self.stdout.write(f'需要重新解析的配置: {total} 个')
+        if options['dry_run'] or not total:
+            return
+
+        start = time.monotonic()
+
+        def on_progress(stats):
+            done = stats['processed'] + stats['failed']
+            elapsed = time.monotonic() - start
+            eta = elapsed / done * (total - done) if done else 0
+            self.stdout.write(f"[{done}/{total}] 成功 {stats['processed']} 失败 {stats['failed']}，预计剩余 {eta:.0f} 秒")
+
+        stats = reparse_configs(
+            queryset, workers=options['workers'], chunk_size=options['chunk_size'], on_progress=on_progress
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"重新解析完成，成功 {stats['processed']} 个，失败 {stats['failed']} 个，耗时 {time.monotonic() - start:.1f} 秒"
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def fill_config_hash(apps, schema_editor):
+    from cmdb.utils import config_digest
+
+    DeviceConfig = apps.get_model('cmdb', 'DeviceConfig')
+    pending = []
+    for config in DeviceConfig.objects.only('id', 'config_text').iterator(chunk_size=500):
+        config.config_hash = config_digest(config.config_text)
+        pending.append(config)
+        if len(pending) >= 500:
+            DeviceConfig.objects.bulk_update(pending, ['config_hash'])
+            pending = []
+    if pending:
+        DeviceConfig.objects.bulk_update(pending, ['config_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0023_deviceconfig_uni_latest_config_per_device'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deviceconfig',
+            name='config_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='配置内容哈希'),
+        ),
+        migrations.RunPython(fill_config_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='deviceconfig',
+            name='time',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='保存时间'),
+        ),
+        migrations.AddIndex(
+            model_name='deviceconfig',
+            index=models.Index(fields=['device', 'config_hash'], name='idx_config_hash'),
+        ),
+    ]
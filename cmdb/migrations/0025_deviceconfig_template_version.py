@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0024_deviceconfig_config_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deviceconfig',
+            name='template_version',
+            field=models.CharField(blank=True, default='', max_length=40, verbose_name='解析模板版本'),
+        ),
+        migrations.AddIndex(
+            model_name='deviceconfig',
+            index=models.Index(fields=['template_version'], name='idx_config_template'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+def normalize_config_hash(apps, schema_editor):
+    from cmdb.utils import config_normalizer
+
+    DeviceConfig = apps.get_model('cmdb', 'DeviceConfig')
+    pending = []
+    rows = DeviceConfig.objects.values_list('id', 'config_text', 'device__device_type').iterator(chunk_size=500)
+    for config_id, config_text, device_type in rows:
+        pending.append(DeviceConfig(id=config_id, config_hash=config_normalizer.digest(config_text, device_type)))
+        if len(pending) >= 500:
+            DeviceConfig.objects.bulk_update(pending, ['config_hash'])
+            pending = []
+    if pending:
+        DeviceConfig.objects.bulk_update(pending, ['config_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0025_deviceconfig_template_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='deviceconfig',
+            name='config_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='规范化配置内容哈希'),
+        ),
+        migrations.RunPython(normalize_config_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1
+
+from django.db import migrations
+
+
+def create_fts_index(apps, schema_editor):
+    """SQLite下创建FTS5全文索引表，并写入各设备的最新配置"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS cmdb_config_fts USING fts5("
+        "config_text, tokenize = \"unicode61 tokenchars '-_./:'\")"
+    )
+    schema_editor.execute(
+        "INSERT INTO cmdb_config_fts (rowid, config_text) "
+        "SELECT id, config_text FROM cmdb_deviceconfig WHERE latest = 1"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS cmdb_config_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0026_normalized_config_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+from cmdb.utils import ip_interval, ip_network_of
+
+
+def fill_ip_ranges(apps, schema_editor):
+    """为已提取的接口、VS与pool成员计算地址区间"""
+    sources = [
+        ('Interface', lambda obj: ip_network_of(obj.ip_address, obj.subnet_mask)),
+        ('LtmVirtualServer', lambda obj: ip_network_of(obj.vs_address, obj.mask)),
+        ('LtmPoolMember', lambda obj: ip_network_of(obj.address)),
+    ]
+    for model_name, network_of in sources:
+        model = apps.get_model('cmdb', model_name)
+        batch = []
+        for obj in model.objects.iterator(chunk_size=2000):
+            obj.ip_start, obj.ip_end, obj.ip_prefixlen = ip_interval(network_of(obj))
+            if obj.ip_start:
+                batch.append(obj)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['ip_start', 'ip_end', 'ip_prefixlen'])
+                batch = []
+        model.objects.bulk_update(batch, ['ip_start', 'ip_end', 'ip_prefixlen'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0027_config_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interface',
+            name='ip_end',
+            field=models.CharField(max_length=32, null=True, verbose_name='地址区间结束'),
+        ),
+        migrations.AddField(
+            model_name='interface',
+            name='ip_prefixlen',
+            field=models.PositiveSmallIntegerField(null=True, verbose_name='前缀长度'),
+        ),
+        migrations.AddField(
+            model_name='interface',
+            name='ip_start',
+            field=models.CharField(max_length=32, null=True, verbose_name='地址区间起始'),
+        ),
+        migrations.AddField(
+            model_name='ltmpoolmember',
+            name='ip_end',
+            field=models.CharField(max_length=32, null=True, verbose_name='地址区间结束'),
+        ),
+        migrations.AddField(
+            model_name='ltmpoolmember',
+            name='ip_prefixlen',
+            field=models.PositiveSmallIntegerField(null=True, verbose_name='前缀长度'),
+        ),
+        migrations.AddField(
+            model_name='ltmpoolmember',
+            name='ip_start',
+            field=models.CharField(max_length=32, null=True, verbose_name='地址区间起始'),
+        ),
+        migrations.AddField(
+            model_name='ltmvirtualserver',
+            name='ip_end',
+            field=models.CharField(max_length=32, null=True, verbose_name='地址区间结束'),
+        ),
+        migrations.AddField(
+            model_name='ltmvirtualserver',
+            name='ip_prefixlen',
+            field=models.PositiveSmallIntegerField(null=True, verbose_name='前缀长度'),
+        ),
+        migrations.AddField(
+            model_name='ltmvirtualserver',
+            name='ip_start',
+            field=models.CharField(max_length=32, null=True, verbose_name='地址区间起始'),
+        ),
+        migrations.AddIndex(
+            model_name='interface',
+            index=models.Index(fields=['ip_start', 'ip_end'], name='idx_interface_ip_range'),
+        ),
+        migrations.AddIndex(
+            model_name='ltmpoolmember',
+            index=models.Index(fields=['ip_start', 'ip_end'], name='idx_member_ip_range'),
+        ),
+        migrations.AddIndex(
+            model_name='ltmvirtualserver',
+            index=models.Index(fields=['ip_start', 'ip_end'], name='idx_vs_ip_range'),
+        ),
+        migrations.RunPython(fill_ip_ranges, migrations.RunPython.noop),
+    ]
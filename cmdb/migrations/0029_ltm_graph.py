@@ -0,0 +1,62 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def resolve_pool_refs(apps, schema_editor):
+    """将已提取VS的pool名称解析为同一配置中的pool外键"""
+    LtmPool = apps.get_model('cmdb', 'LtmPool')
+    LtmVirtualServer = apps.get_model('cmdb', 'LtmVirtualServer')
+    for pool_id, config_id, name in LtmPool.objects.values_list('id', 'config_id', 'name').iterator():
+        LtmVirtualServer.objects.filter(config_id=config_id, pool=name).update(pool_ref_id=pool_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0028_ip_ranges'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ltmpoolmember',
+            name='port',
+            field=models.CharField(max_length=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='ltmvirtualserver',
+            name='pool_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='virtual_servers', to='cmdb.ltmpool', verbose_name='解析后的pool'),
+        ),
+        migrations.CreateModel(
+            name='LtmNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip_start', models.CharField(max_length=32, null=True, verbose_name='地址区间起始')),
+                ('ip_end', models.CharField(max_length=32, null=True, verbose_name='地址区间结束')),
+                ('ip_prefixlen', models.PositiveSmallIntegerField(null=True, verbose_name='前缀长度')),
+                ('name', models.CharField(max_length=255)),
+                ('address', models.CharField(max_length=255, null=True)),
+                ('config', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nodes', to='cmdb.deviceconfig')),
+            ],
+            options={
+                'verbose_name': 'LTM Node',
+                'verbose_name_plural': 'LTM Node',
+            },
+        ),
+        migrations.AddField(
+            model_name='ltmpoolmember',
+            name='node',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='cmdb.ltmnode'),
+        ),
+        migrations.AddIndex(
+            model_name='ltmnode',
+            index=models.Index(fields=['ip_start', 'ip_end'], name='idx_node_ip_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='ltmnode',
+            constraint=models.UniqueConstraint(fields=('config', 'name'), name='uni_node_config'),
+        ),
+        migrations.RunPython(resolve_pool_refs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0029_ltm_graph'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GtmLtmLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=64)),
+            ],
+            options={
+                'verbose_name': 'GTM-LTM关联',
+                'verbose_name_plural': 'GTM-LTM关联',
+            },
+        ),
+        migrations.CreateModel(
+            name='GtmPoolMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('server', models.CharField(max_length=255)),
+                ('vs_name', models.CharField(max_length=255)),
+                ('address', models.CharField(max_length=255, null=True)),
+                ('port', models.CharField(max_length=15, null=True)),
+                ('endpoint', models.CharField(max_length=64, null=True, verbose_name='地址:端口')),
+                ('enabled', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'GTM PoolMbr',
+                'verbose_name_plural': 'GTM PoolMbr',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='gtmpool',
+            options={'verbose_name': 'GTM Pool', 'verbose_name_plural': 'GTM Pool'},
+        ),
+        migrations.RemoveConstraint(
+            model_name='gtmwideip',
+            name='uni_wideip_config',
+        ),
+        migrations.AddField(
+            model_name='gtmpool',
+            name='type',
+            field=models.CharField(default='A', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='gtmwideip',
+            name='type',
+            field=models.CharField(default='A', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='ltmvirtualserver',
+            name='endpoint',
+            field=models.CharField(max_length=64, null=True, verbose_name='地址:端口'),
+        ),
+        migrations.AddIndex(
+            model_name='gtmpool',
+            index=models.Index(fields=['config', 'name'], name='idx_gtmpool_config'),
+        ),
+        migrations.AddIndex(
+            model_name='ltmvirtualserver',
+            index=models.Index(fields=['endpoint'], name='idx_vs_endpoint'),
+        ),
+        migrations.AddConstraint(
+            model_name='gtmwideip',
+            constraint=models.UniqueConstraint(fields=('config', 'type', 'name'), name='uni_wideip_config'),
+        ),
+        migrations.AddField(
+            model_name='gtmltmlink',
+            name='ltm_vs',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gtm_links', to='cmdb.ltmvirtualserver'),
+        ),
+        migrations.AddField(
+            model_name='gtmpoolmember',
+            name='config',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gtm_members', to='cmdb.deviceconfig'),
+        ),
+        migrations.AddField(
+            model_name='gtmpoolmember',
+            name='pool',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pool_members', to='cmdb.gtmpool'),
+        ),
+        migrations.AddField(
+            model_name='gtmltmlink',
+            name='gtm_member',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ltm_links', to='cmdb.gtmpoolmember'),
+        ),
+        migrations.AddIndex(
+            model_name='gtmpoolmember',
+            index=models.Index(fields=['endpoint'], name='idx_gtm_member_endpoint'),
+        ),
+        migrations.AddIndex(
+            model_name='gtmltmlink',
+            index=models.Index(fields=['endpoint'], name='idx_gslb_link_endpoint'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0030_gtm_ltm_links'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfigChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time', models.DateTimeField(verbose_name='新版本时间')),
+                ('object_type', models.CharField(max_length=50, verbose_name='对象类型')),
+                ('object_name', models.CharField(max_length=255, verbose_name='对象标识')),
+                ('action', models.CharField(choices=[('added', '新增'), ('removed', '删除'), ('modified', '修改')], max_length=10)),
+                ('changes', models.JSONField(default=dict, verbose_name='变更字段')),
+                ('config', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='cmdb.deviceconfig', verbose_name='新版本')),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='config_changes', to='cmdb.device', verbose_name='关联设备')),
+                ('previous', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='cmdb.deviceconfig', verbose_name='上一版本')),
+            ],
+            options={
+                'verbose_name': '配置对象变更',
+                'verbose_name_plural': '配置对象变更',
+                'ordering': ['-time', 'id'],
+                'indexes': [models.Index(fields=['device', 'time'], name='idx_change_device_time'), models.Index(fields=['time'], name='idx_change_time'), models.Index(fields=['object_type', 'object_name'], name='idx_change_object')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0031_config_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='事件时间')),
+                ('event_type', models.CharField(choices=[('created', '新配置'), ('promoted', '成为最新版本')], max_length=20)),
+                ('device_id', models.IntegerField(verbose_name='设备ID')),
+                ('hostname', models.CharField(max_length=100, verbose_name='主机名')),
+                ('config_id', models.BigIntegerField(verbose_name='配置ID')),
+                ('config_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('latest', models.BooleanField(default=False)),
+                ('summary', models.JSONField(default=dict, verbose_name='对象级变更摘要')),
+            ],
+            options={
+                'verbose_name': '配置变更事件',
+                'verbose_name_plural': '配置变更事件',
+                'indexes': [models.Index(fields=['device_id', 'id'], name='idx_event_device')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0032_change_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDeviceConfig',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('config_text', models.TextField(verbose_name='配置内容')),
+                ('config_json', models.JSONField(blank=True, null=True, verbose_name='JSON格式的配置内容')),
+                ('latest', models.BooleanField(default=False)),
+                ('time', models.DateTimeField(verbose_name='保存时间')),
+                ('config_hash', models.CharField(blank=True, default='', max_length=64, verbose_name='规范化配置内容哈希')),
+                ('template_version', models.CharField(blank=True, default='', max_length=40, verbose_name='解析模板版本')),
+            ],
+            options={
+                'verbose_name': '归档配置',
+                'verbose_name_plural': '归档配置',
+                'db_table': 'cmdb_archived_deviceconfig',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0033_archived_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='device',
+            name='connect_failures',
+            field=models.PositiveIntegerField(default=0, verbose_name='连续连接失败次数'),
+        ),
+    ]
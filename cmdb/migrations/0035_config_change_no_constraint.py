@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cmdb', '0034_device_connect_failures'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='configchange',
+            name='config',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='cmdb.deviceconfig', verbose_name='新版本'),
+        ),
+        migrations.AlterField(
+            model_name='configchange',
+            name='previous',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='cmdb.deviceconfig', verbose_name='上一版本'),
+        ),
+    ]
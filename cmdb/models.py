@@ -1,8 +1,16 @@
 from annotated_types import T
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.db.models import JSONField
+from django.utils import timezone
 from logging import Logger
-from .utils import config_parser
+from .bulk import bulk_insert
+from .changes import record_changes
+from .events import append_event
+from .graph import invalidate_graph_cache
+from .gslb import refresh_links
+from .search import get_search_engine
+from .utils import config_parser, config_normalizer, endpoint_of, ip_interval, ip_network_of
 
 logger = Logger(__name__)
 
@@ -13,6 +21,7 @@ class Device(models.Model):
     password = models.CharField(max_length=100, verbose_name='密码')
     device_type = models.CharField(max_length=50, verbose_name='设备类型')
     connect_failed_at = models.DateTimeField(blank=True, null=True, verbose_name='连接失败时间')
+    connect_failures = models.PositiveIntegerField(default=0, verbose_name='连续连接失败次数')
 
     class Meta:
         verbose_name = '网络设备'
@@ -27,26 +36,132 @@ class Device(models.Model):
         return f"{self.hostname} ({self.address})"
 
 
+class IpRangeModel(models.Model):
+    """
+    带地址区间的配置对象，ip_start/ip_end 为 utils.ip_interval 编码的区间键
+    用于按网段包含、重叠与最长前缀匹配做索引范围查询
+    """
+    ip_start = models.CharField(max_length=32, null=True, verbose_name='地址区间起始')
+    ip_end = models.CharField(max_length=32, null=True, verbose_name='地址区间结束')
+    ip_prefixlen = models.PositiveSmallIntegerField(null=True, verbose_name='前缀长度')
+
+    class Meta:
+        abstract = True
+
+    def set_ip_range(self, address, mask=None):
+        self.ip_start, self.ip_end, self.ip_prefixlen = ip_interval(ip_network_of(address, mask))
+        return self
+
+
 class DeviceConfig(models.Model):
     """网络设备历史配置模型"""
     device = models.ForeignKey(Device, on_delete=models.CASCADE, related_name='configs', verbose_name='关联设备')
     config_text = models.TextField(verbose_name='配置内容')
     config_json = JSONField(blank=True, null=True, verbose_name='JSON格式的配置内容')
     latest = models.BooleanField(default=True)
-    time = models.DateTimeField(auto_now_add=True, verbose_name='保存时间')
-
-    def save(self, *args, **kwargs):
-        """保存前解析文本配置, 并自动从config_json提取相关字段到各个配置模型"""
-        if self.config_json == "null" or not self.config_json:
+    time = models.DateTimeField(default=timezone.now, verbose_name='保存时间')
+    config_hash = models.CharField(max_length=64, blank=True, default='', verbose_name='规范化配置内容哈希')
+    template_version = models.CharField(max_length=40, blank=True, default='', verbose_name='解析模板版本')
+
+    @staticmethod
+    def parse_eagerly(latest):
+        """
+        根据 CMDB_PARSE_POLICY 判断保存时是否立即解析
+        'all' 解析每个版本；'latest' 只解析最新版本，历史版本在首次通过API访问时再解析
+        """
+        return latest or getattr(settings, 'CMDB_PARSE_POLICY', 'all') == 'all'
+
+    def prepare(self):
+        """
+        计算摘要、按解析策略解析配置并构造待提取的对象，不写数据库
+        save()会自动调用；写入队列在获取写锁之前调用，使解析与对象构造不占用写事务
+
+        Returns:
+            self
+        """
+        if not self.config_hash:
+            self.config_hash = config_normalizer.digest(self.config_text, self.device.device_type)
+        if (self.config_json == "null" or not self.config_json) and self.parse_eagerly(self.latest):
             self.config_json = config_parser.parse_config(self.config_text, self.device.device_type)
+            self.template_version = config_parser.get_template_version(self.device.device_type)
             logger.debug(f'解析结果为：{self.config_json}')
-            self._extract()
-        super().save(*args, **kwargs)
-
+            # 对象的外键指向尚未保存的self，bulk_create时取保存后的主键
+            self._pending_objects = self._build_objects()
+        return self
 
-    def _save_interfaces(self, interfaces):
+    def save(self, *args, **kwargs):
+        """
+        保存前解析文本配置, 保存后自动从config_json提取相关字段到各个配置模型，
+        新的最新版本在同一事务中先把设备原来的最新版本置为历史版本，
+        新版本同时记录相对上一版本的对象级变更，并更新全文索引
+        """
+        self.prepare()
+        pending_objects = getattr(self, '_pending_objects', None)
+        self._pending_objects = None
+        adding = self._state.adding
+        # 提取出的对象以外键关联本配置，必须在配置写入、获得主键之后再批量创建
+        with transaction.atomic():
+            if adding and self.latest:
+                self._demote_latest()
+            super().save(*args, **kwargs)
+            if pending_objects is not None:
+                self._extract(pending_objects)
+            if adding:
+                self.change_summary = record_changes(self)
+                append_event('created', self, self.change_summary)
+            get_search_engine().sync_configs([self.pk])
+            if self.latest:
+                refresh_links([self.device_id])
+        invalidate_graph_cache()
+
+    def _demote_latest(self):
+        """
+        把同一设备当前的最新版本置为历史版本，须与新版本的INSERT在同一事务中
+        先锁定设备行使同一设备的并发写入排队（PostgreSQL；SQLite的写事务本身即串行），
+        再沿 idx_config_latest 索引做一次UPDATE，之后插入新版本不会违反 uni_latest_config_per_device
+        """
+        list(Device.objects.select_for_update().filter(pk=self.device_id).values_list('pk', flat=True))
+        return DeviceConfig.objects.filter(device_id=self.device_id, latest=True).update(latest=False)
+
+    def ensure_parsed(self):
+        """
+        按需解析尚未解析的配置，并把解析结果与提取的对象写回数据库
+
+        Returns:
+            解析后的config_json
+        """
+        if self.config_json:
+            return self.config_json
+
+        config_json = config_parser.parse_config(self.config_text, self.device.device_type)
+        template_version = config_parser.get_template_version(self.device.device_type)
+        with transaction.atomic():
+            # 条件更新保证并发请求只有一个会写入并提取对象
+            updated = DeviceConfig.objects.filter(pk=self.pk, config_json__isnull=True).update(
+                config_json=config_json, template_version=template_version
+            )
+            self.config_json = config_json
+            self.template_version = template_version
+            if updated:
+                self._extract()
+                if self.latest:
+                    refresh_links([self.device_id])
+                invalidate_graph_cache()
+                logger.info(f'按需解析配置{self.pk}完成')
+        return self.config_json
+
+    @staticmethod
+    def _as_list(value):
+        """TTP分组只匹配到一项时返回dict，统一转换为列表"""
+        if not value:
+            return []
+        if isinstance(value, dict):
+            return [value]
+        return value
+
+    def _build_interfaces(self, interfaces):
         interfaces_create = []
-        for interface in interfaces:
+        for interface in self._as_list(interfaces):
             interfaces_create.append(Interface(
                 config = self,
                 interface = interface.get('interface'),
@@ -59,49 +174,97 @@ class DeviceConfig(models.Model):
                 combo_type = interface.get('combo_type'),
                 ip_address = interface.get('ip_address'),
                 subnet_mask = interface.get('subnet_mask'),
-            ))
-        Interface.objects.bulk_create(interfaces_create, ignore_conflicts=False)
-
-
-    def _extract(self):
-            if self.config_json and 'interfaces' in self.config_json:
-                self._save_interfaces(self.config_json['interfaces'])
-            else:
-                self.interface_json = None
-
-            if self.config_json and 'virtuals' in self.config_json:
-                self._save_virtual(self.config_json['virtuals'])
-            else:
-                self.virtual_json = None
-
-            if self.config_json and 'pools' in self.config_json:
-                self.pool_json = self.config_json['pools']
-            else:
-                self.pool_json = None
-
-            if self.config_json and 'nodes' in self.config_json:
-                self.node_json = self.config_json['nodes']
-            else:
-                self.node_json = None
-
-    def _save_virtual(self, virtuals):
+            ).set_ip_range(interface.get('ip_address'), interface.get('subnet_mask')))
+        return interfaces_create
+
+    def _build_objects(self):
+        """
+        根据config_json构造待创建的关联对象，返回 {模型类: 对象列表}
+        LTM对象之间的引用（VS→pool→member→node）在此按名称解析为外键
+        """
+        objects = {}
+        if not self.config_json:
+            return objects
+        if 'interfaces' in self.config_json:
+            objects[Interface] = self._build_interfaces(self.config_json['interfaces'])
+        if 'wideips' in self.config_json or 'servers' in self.config_json:
+            # GTM配置中的pools为GTM pool，不按LTM解析
+            objects[GtmWideip] = self._build_wideips(self.config_json.get('wideips'))
+            objects[GtmPool], objects[GtmPoolMember] = self._build_gtm_pools(
+                self.config_json.get('pools'), self.config_json.get('servers')
+            )
+            return objects
+        nodes = self._build_nodes(self.config_json.get('nodes'))
+        pools, members = self._build_pools(self.config_json.get('pools'), nodes)
+        if nodes:
+            objects[LtmNode] = nodes
+        if pools:
+            objects[LtmPool], objects[LtmPoolMember] = pools, members
+        if 'virtuals' in self.config_json:
+            objects[LtmVirtualServer] = self._build_virtuals(self.config_json['virtuals'], pools)
+        return objects
+
+    @staticmethod
+    def _resolve(objects, name):
+        """按名称查找同一配置中的对象，名称未带分区时按 /Common/ 补全"""
+        if not name:
+            return None
+        by_name = {obj.name: obj for obj in objects}
+        return by_name.get(name) or by_name.get(f'/Common/{name}')
+
+    def _extract(self, built=None):
+        for model, objects in (self._build_objects() if built is None else built).items():
+            bulk_insert(model, objects)
+
+    @classmethod
+    def extracted_models(cls):
+        """由config_json提取生成的关联模型，按创建顺序排列，被外键引用的模型在前"""
+        return [Interface, LtmNode, LtmPool, LtmPoolMember, LtmVirtualServer, GtmWideip, GtmPool, GtmPoolMember]
+
+    @classmethod
+    def clear_extracted(cls, config_ids):
+        """删除一批配置已提取的关联对象，重新解析前调用"""
+        for model in reversed(cls.extracted_models()):
+            lookup = 'pool__config_id__in' if model is LtmPoolMember else 'config_id__in'
+            model.objects.filter(**{lookup: config_ids}).delete()
+        invalidate_graph_cache()
+
+    @classmethod
+    def bulk_extract(cls, configs, batch_size=1000, copy=None):
+        """
+        为一批已保存的配置提取关联对象，同类对象合并为一次写入（PostgreSQL下为COPY）
+
+        Args:
+            configs: 已有主键且config_json已解析的DeviceConfig列表
+            batch_size: 每条INSERT语句包含的最大行数
+            copy: 是否使用COPY，None时自动选择，见 cmdb.bulk.bulk_insert
+        """
+        pending = {model: [] for model in cls.extracted_models()}
+        for config in configs:
+            for model, objects in config._build_objects().items():
+                pending[model].extend(objects)
+        for model, objects in pending.items():
+            bulk_insert(model, objects, batch_size=batch_size, copy=copy)
+        refresh_links({config.device_id for config in configs if config.latest})
+        invalidate_graph_cache()
+
+    @staticmethod
+    def _names(value):
+        """profiles/rules 的名称列表，兼容单个字典、字典列表及早期保存的名称列表"""
+        if not value:
+            return []
+        if isinstance(value, dict):
+            value = [value]
+        return [item['name'] if isinstance(item, dict) else item for item in value]
+
+    def _build_virtuals(self, virtuals, pools=()):
         virtuals_create = []
-        for virtual in virtuals:
-            if not virtual.get('profiles'):
-                virtual['profiles'] = []
-            elif isinstance(virtual['profiles'], dict):
-                virtual['profiles'] = [virtual['profiles']['name']]
-            elif isinstance(virtual['profiles'], list):
-                virtual['profiles'] = [ _dict['name'] for _dict in virtual['profiles']]
-            logger.info(f'profiles结果为: {virtual["profiles"]}')
-            
-            if not virtual.get('rules'):
-                virtual['rules'] = []
-            elif isinstance(virtual['rules'], dict):
-                virtual['rules'] = [virtual['rules']['name']]
-            elif isinstance(virtual['rules'], list):
-                virtual['rules'] = [ _dict['name'] for _dict in virtual['rules']]
-            logger.info(f'rules结果为: {virtual["rules"]}')
+        for virtual in self._as_list(virtuals):
+            # 不修改config_json：同一份解析结果会被多次构造对象（如计算对象级变更时）
+            profiles = self._names(virtual.get('profiles'))
+            rules = self._names(virtual.get('rules'))
+            logger.info(f'profiles结果为: {profiles}')
+            logger.info(f'rules结果为: {rules}')
             virtuals_create.append(
                 LtmVirtualServer(
                     config = self,
@@ -112,14 +275,104 @@ class DeviceConfig(models.Model):
                     protocol = virtual.get('protocol'),
                     source = virtual.get('source'),
                     pool = virtual.get('pool'),
+                    pool_ref = self._resolve(pools, virtual.get('pool')),
+                    endpoint = endpoint_of(virtual.get('vs_address'), virtual.get('vs_port')),
                     snat_type = virtual.get('snat_type'),
                     snat_pool = virtual.get('snat_pool'),
                     persist = virtual.get('persist', {}).get('name'),
-                    profiles = virtual.get('profiles'),
-                    rules = virtual.get('rules')
-                )
+                    profiles = profiles,
+                    rules = rules
+                ).set_ip_range(virtual.get('vs_address'), virtual.get('mask'))
             )
-        LtmVirtualServer.objects.bulk_create(virtuals_create, ignore_conflicts=False)
+        return virtuals_create
+
+    def _build_nodes(self, nodes):
+        nodes_create = []
+        for node in self._as_list(nodes):
+            nodes_create.append(LtmNode(
+                config = self,
+                name = node.get('name'),
+                address = node.get('address'),
+            ).set_ip_range(node.get('address')))
+        return nodes_create
+
+    def _build_pools(self, pools, nodes=()):
+        pools_create, members_create = [], []
+        for pool in self._as_list(pools):
+            monitor = pool.get('monitor')
+            pool_obj = LtmPool(
+                config = self,
+                name = pool.get('name'),
+                mode = pool.get('mode') or 'round-robin',
+                monitors = [m for m in monitor.split() if m != 'and'] if monitor else [],
+            )
+            pools_create.append(pool_obj)
+            for member in self._as_list(pool.get('members')):
+                # 成员名形如 /Common/10.1.1.1:80，冒号前为节点名，未单独配置address时从名称中取地址
+                node_name, _, port = member.get('name', '').rpartition(':')
+                if not node_name:
+                    node_name, port = port, None
+                address = member.get('address') or node_name.rsplit('/', 1)[-1]
+                members_create.append(LtmPoolMember(
+                    pool = pool_obj,
+                    name = member.get('name'),
+                    address = address,
+                    port = port or None,
+                    node = self._resolve(nodes, node_name),
+                ).set_ip_range(address))
+        return pools_create, members_create
+
+    def _build_wideips(self, wideips):
+        wideips_create = []
+        for wideip in self._as_list(wideips):
+            wideips_create.append(GtmWideip(
+                config = self,
+                name = wideip.get('name'),
+                type = wideip.get('type') or 'A',
+                lb_mode = wideip.get('pool-lb-mode') or 'round-robin',
+                pools = [pool.get('pool_name') for pool in self._as_list(wideip.get('pools'))],
+            ))
+        return wideips_create
+
+    def _build_gtm_pools(self, pools, servers):
+        # server上定义的virtual-server，按 (server, vs名称) 查找地址与端口
+        destinations = {}
+        for server in self._as_list(servers):
+            server_name = server.get('name', '')
+            for vs in self._as_list((server.get('vs') or {}).get('items')):
+                if vs.get('address'):
+                    destinations[(f'/Common/{server_name}', vs.get('vs_name'))] = (vs['address'], vs.get('port'))
+
+        pools_create, members_create = [], []
+        for pool in self._as_list(pools):
+            members = self._as_list(pool.get('members'))
+            monitor = pool.get('monitor')
+            pool_obj = GtmPool(
+                config = self,
+                name = pool.get('name'),
+                type = pool.get('type') or 'A',
+                lb_mode = pool.get('lb-mode') or 'round-robin',
+                alternate_mode = pool.get('alternate-mode') or 'round-robin',
+                fallback_mode = pool.get('fallback-mode') or 'return-to-dns',
+                fallback_ip = pool.get('fallback-ip'),
+                ttl = pool.get('ttl') or 30,
+                members = members,
+                monitor = [m for m in monitor.split() if m != 'and'] if monitor else [],
+            )
+            pools_create.append(pool_obj)
+            for member in members:
+                address, port = destinations.get((member.get('server'), member.get('vs_name')), (None, None))
+                members_create.append(GtmPoolMember(
+                    config = self,
+                    pool = pool_obj,
+                    server = member.get('server'),
+                    vs_name = member.get('vs_name'),
+                    address = address,
+                    port = port,
+                    endpoint = endpoint_of(address, port),
+                    enabled = member.get('enabled') != 'disabled',
+                ))
+        return pools_create, members_create
 
     def _save_pools(self, pools):
         pools_create = []
@@ -158,13 +411,37 @@ class DeviceConfig(models.Model):
 
         indexes = [
 		    models.Index(fields=['device', 'latest'], name='idx_config_latest'),
+		    models.Index(fields=['device', 'config_hash'], name='idx_config_hash'),
+		    models.Index(fields=['template_version'], name='idx_config_template'),
         ]
 
     def __str__(self):
         return f"{self.device.hostname} 配置 - {self.time.strftime('%Y-%m-%d %H:%M:%S')}" # type: ignore
 
 
-class LtmVirtualServer(models.Model):
+class ArchivedDeviceConfig(models.Model):
+    """
+    归档库中的历史配置，只读，对应每个连接上创建的临时视图（见 cmdb.archive）
+    字段与列顺序必须与DeviceConfig一致，用于与主库查询做UNION
+    """
+    device = models.ForeignKey(
+        Device, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', verbose_name='关联设备'
+    )
+    config_text = models.TextField(verbose_name='配置内容')
+    config_json = JSONField(blank=True, null=True, verbose_name='JSON格式的配置内容')
+    latest = models.BooleanField(default=False)
+    time = models.DateTimeField(verbose_name='保存时间')
+    config_hash = models.CharField(max_length=64, blank=True, default='', verbose_name='规范化配置内容哈希')
+    template_version = models.CharField(max_length=40, blank=True, default='', verbose_name='解析模板版本')
+
+    class Meta:
+        managed = False
+        db_table = 'cmdb_archived_deviceconfig'
+        verbose_name = '归档配置'
+        verbose_name_plural = verbose_name
+
+
+class LtmVirtualServer(IpRangeModel):
     config = models.ForeignKey(DeviceConfig, on_delete=models.CASCADE, related_name='virtual_servers')
     name = models.CharField(max_length=255)
     vs_address = models.CharField(max_length=255)
@@ -175,6 +452,9 @@ class LtmVirtualServer(models.Model):
     snat_type = models.CharField(max_length=255, null=True)
 
     pool = models.CharField(max_length=255, null=True)
+    pool_ref = models.ForeignKey('LtmPool', models.SET_NULL, null=True, blank=True,
+                                 related_name='virtual_servers', verbose_name='解析后的pool')
+    endpoint = models.CharField(max_length=64, null=True, verbose_name='地址:端口')
     snat_pool = models.CharField(max_length=255, null=True)
     persist = models.CharField(max_length=255, null=True)
     profiles = models.JSONField(default=list)
@@ -195,6 +475,8 @@ class LtmVirtualServer(models.Model):
 		    models.Index(fields=['name'], name='idx_vs_name'),
 		    models.Index(fields=['pool'], name='idx_pool_name'),
 		    models.Index(fields=['config'], name='idx_config'),
+		    models.Index(fields=['ip_start', 'ip_end'], name='idx_vs_ip_range'),
+		    models.Index(fields=['endpoint'], name='idx_vs_endpoint'),
         ]
 
 
@@ -220,10 +502,32 @@ class LtmPool(models.Model):
         ]
 
 
-class LtmPoolMember(models.Model):
+class LtmNode(IpRangeModel):
+    config = models.ForeignKey(DeviceConfig, models.CASCADE, related_name='nodes')
+    name = models.CharField(max_length=255)
+    address = models.CharField(max_length=255, null=True)
+
+    class Meta:
+        verbose_name = 'LTM Node'
+        verbose_name_plural = verbose_name
+        constraints = [
+		    models.UniqueConstraint(
+			    fields=['config', 'name'],
+			    name='uni_node_config'
+		    )
+        ]
+
+        indexes = [
+		    models.Index(fields=['ip_start', 'ip_end'], name='idx_node_ip_range'),
+        ]
+
+
+class LtmPoolMember(IpRangeModel):
     pool = models.ForeignKey(LtmPool, models.CASCADE, related_name='members')
     name = models.CharField(max_length=255)
     address = models.CharField(max_length=255)
+    port = models.CharField(max_length=15, null=True)
+    node = models.ForeignKey(LtmNode, models.SET_NULL, null=True, blank=True, related_name='members')
     
     class Meta:
         verbose_name = 'LTM PoolMbr'
@@ -231,6 +535,7 @@ class LtmPoolMember(models.Model):
 
         indexes = [
 		    models.Index(fields=['name'], name='idx_member_name'),
+		    models.Index(fields=['ip_start', 'ip_end'], name='idx_member_ip_range'),
         ]
 
 
@@ -300,6 +605,7 @@ class GtmDatacenter(models.Model):
 class GtmWideip(models.Model):
     config = models.ForeignKey(DeviceConfig, models.CASCADE, related_name='wideips')
     name = models.CharField(max_length=255)
+    type = models.CharField(max_length=10, default='A')
     lb_mode = models.CharField(max_length=255)
     pools = models.JSONField(default=list, null=True)
 
@@ -309,7 +615,7 @@ class GtmWideip(models.Model):
 
         constraints = [
 		    models.UniqueConstraint(
-			    fields=['config', 'name'],
+			    fields=['config', 'type', 'name'],
 			    name='uni_wideip_config'
 		    )
         ]
@@ -323,6 +629,7 @@ class GtmWideip(models.Model):
 class GtmPool(models.Model):
     config = models.ForeignKey(DeviceConfig, models.CASCADE, related_name='gtmpools')
     name = models.CharField(max_length=255)
+    type = models.CharField(max_length=10, default='A')
     lb_mode = models.CharField(max_length=255, default='round-robin')
     alternate_mode = models.CharField(max_length=255, default='round-robin')
     fallback_mode = models.CharField(max_length=255, default='return-to-dns')
@@ -331,8 +638,109 @@ class GtmPool(models.Model):
     members = models.JSONField(default=list)
     monitor = models.JSONField(default=list)
 
+    class Meta:
+        verbose_name = 'GTM Pool'
+        verbose_name_plural = verbose_name
+
+        indexes = [
+		    models.Index(fields=['config', 'name'], name='idx_gtmpool_config'),
+        ]
+
+
+class GtmPoolMember(models.Model):
+    """GTM pool成员，server上的virtual-server已解析为 地址:端口"""
+    config = models.ForeignKey(DeviceConfig, models.CASCADE, related_name='gtm_members')
+    pool = models.ForeignKey(GtmPool, models.CASCADE, related_name='pool_members')
+    server = models.CharField(max_length=255)
+    vs_name = models.CharField(max_length=255)
+    address = models.CharField(max_length=255, null=True)
+    port = models.CharField(max_length=15, null=True)
+    endpoint = models.CharField(max_length=64, null=True, verbose_name='地址:端口')
+    enabled = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name = 'GTM PoolMbr'
+        verbose_name_plural = verbose_name
+
+        indexes = [
+		    models.Index(fields=['endpoint'], name='idx_gtm_member_endpoint'),
+        ]
+
+
+class GtmLtmLink(models.Model):
+    """
+    GTM pool成员与LTM VS按 地址:端口 关联的预计算结果，只包含各设备的最新配置
+    由 cmdb.gslb.refresh_links 在相关设备配置变化时增量维护
+    """
+    endpoint = models.CharField(max_length=64)
+    gtm_member = models.ForeignKey(GtmPoolMember, models.CASCADE, related_name='ltm_links')
+    ltm_vs = models.ForeignKey('LtmVirtualServer', models.CASCADE, related_name='gtm_links')
+
+    class Meta:
+        verbose_name = 'GTM-LTM关联'
+        verbose_name_plural = verbose_name
+
+        indexes = [
+		    models.Index(fields=['endpoint'], name='idx_gslb_link_endpoint'),
+        ]
+
+
+class ConfigChange(models.Model):
+    """相邻两个配置版本之间的对象级变更，新版本保存时计算"""
+    ACTION_CHOICES = [('added', '新增'), ('removed', '删除'), ('modified', '修改')]
+
+    device = models.ForeignKey(Device, models.CASCADE, related_name='config_changes', verbose_name='关联设备')
+    # 配置归档后变更记录留在主库，两个版本可能已在归档库中，因此不建数据库外键约束
+    config = models.ForeignKey(
+        DeviceConfig, models.CASCADE, db_constraint=False, related_name='changes', verbose_name='新版本'
+    )
+    previous = models.ForeignKey(
+        DeviceConfig, models.SET_NULL, null=True, db_constraint=False, related_name='+', verbose_name='上一版本'
+    )
+    time = models.DateTimeField(verbose_name='新版本时间')
+    object_type = models.CharField(max_length=50, verbose_name='对象类型')
+    object_name = models.CharField(max_length=255, verbose_name='对象标识')
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changes = models.JSONField(default=dict, verbose_name='变更字段')
+
+    class Meta:
+        verbose_name = '配置对象变更'
+        verbose_name_plural = verbose_name
+        ordering = ['-time', 'id']
+
+        indexes = [
+		    models.Index(fields=['device', 'time'], name='idx_change_device_time'),
+		    models.Index(fields=['time'], name='idx_change_time'),
+		    models.Index(fields=['object_type', 'object_name'], name='idx_change_object'),
+        ]
+
+
+class ChangeEvent(models.Model):
+    """
+    只追加的配置变更事件，主键即下游同步使用的游标
+    不以外键关联配置，配置被清理后事件仍然保留
+    """
+    EVENT_TYPES = [('created', '新配置'), ('promoted', '成为最新版本')]
+
+    time = models.DateTimeField(default=timezone.now, verbose_name='事件时间')
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    device_id = models.IntegerField(verbose_name='设备ID')
+    hostname = models.CharField(max_length=100, verbose_name='主机名')
+    config_id = models.BigIntegerField(verbose_name='配置ID')
+    config_hash = models.CharField(max_length=64, blank=True, default='')
+    latest = models.BooleanField(default=False)
+    summary = models.JSONField(default=dict, verbose_name='对象级变更摘要')
 
-class Interface(models.Model):
+    class Meta:
+        verbose_name = '配置变更事件'
+        verbose_name_plural = verbose_name
+
+        indexes = [
+		    models.Index(fields=['device_id', 'id'], name='idx_event_device'),
+        ]
+
+
+class Interface(IpRangeModel):
     config = models.ForeignKey(DeviceConfig, models.CASCADE, related_name='interfaces')
     interface = models.CharField(max_length=255)
     description = models.CharField(max_length=255, null=True)
@@ -344,3 +752,8 @@ class Interface(models.Model):
     combo_type = models.CharField(max_length=255, null=True)
     ip_address = models.CharField(max_length=255, null=True)
     subnet_mask = models.CharField(max_length=255, null=True)
+
+    class Meta:
+        indexes = [
+		    models.Index(fields=['ip_start', 'ip_end'], name='idx_interface_ip_range'),
+        ]
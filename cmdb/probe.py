@@ -0,0 +1,109 @@
+"""
+SSH端口连通性预探测
+
+批量采集前对所有设备的22端口并发发起TCP连接，超时时间很短；连不上的设备直接报告失败，
+不占用采集槽位，也不再等待Netmiko 30秒的连接超时。探测结果在进程内缓存 PROBE_CACHE_TTL 秒。
+"""
+import asyncio
+import threading
+import time
+
+from django.utils import timezone
+
+PROBE_PORT = 22
+# 单次TCP连接的超时秒数
+PROBE_TIMEOUT = 2.0
+# 同时进行的探测数
+PROBE_CONCURRENCY = 500
+# 探测结果的缓存秒数
+PROBE_CACHE_TTL = 60
+# 缓存条目超过该数量时清理过期结果
+PROBE_CACHE_MAX = 100000
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def cached_probe(address, port=None):
+    """
+    返回未过期的探测结果
+
+    Returns:
+        dict；没有缓存或已过期时返回None
+    """
+    with _cache_lock:
+        entry = _cache.get((address, port or PROBE_PORT))
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    return entry[1]
+
+
+def forget_probes():
+    """清除全部缓存的探测结果"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _remember(address, port, result):
+    now = time.monotonic()
+    with _cache_lock:
+        if len(_cache) >= PROBE_CACHE_MAX:
+            for key in [key for key, (expires, _) in _cache.items() if expires <= now]:
+                del _cache[key]
+        _cache[(address, port)] = (now + PROBE_CACHE_TTL, result)
+
+
+async def probe(address, port=None, timeout=None, use_cache=True):
+    """
+    探测地址的TCP端口能否建立连接
+
+    Args:
+        address: 设备IP地址
+        port: 端口，默认 PROBE_PORT
+        timeout: 连接超时秒数，默认 PROBE_TIMEOUT
+        use_cache: 为False时忽略缓存重新探测
+
+    Returns:
+        dict: reachable、latency_ms（毫秒，不可达时为None）、error、checked_at
+    """
+    port = port or PROBE_PORT
+    if use_cache:
+        cached = cached_probe(address, port)
+        if cached is not None:
+            return cached
+
+    start = time.monotonic()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout or PROBE_TIMEOUT)
+    except asyncio.TimeoutError:
+        result = {"reachable": False, "latency_ms": None, "error": f"{port}端口连接超时"}
+    except OSError as e:
+        result = {"reachable": False, "latency_ms": None, "error": f"{port}端口连接失败: {e.strerror or e}"}
+    else:
+        result = {"reachable": True, "latency_ms": round((time.monotonic() - start) * 1000, 1), "error": None}
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+    result["checked_at"] = timezone.now().isoformat()
+    _remember(address, port, result)
+    return result
+
+
+async def probe_many(addresses, port=None, timeout=None, concurrency=PROBE_CONCURRENCY):
+    """
+    并发探测多个地址，相同地址只探测一次
+
+    Returns:
+        dict: 地址 -> probe 的结果
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _probe(address):
+        async with semaphore:
+            return await probe(address, port, timeout)
+
+    addresses = list(dict.fromkeys(addresses))
+    results = await asyncio.gather(*[_probe(address) for address in addresses])
+    return dict(zip(addresses, results))
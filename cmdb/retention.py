@@ -0,0 +1,168 @@
+"""
+配置历史保留策略与压缩
+
+策略按设备分层：最近 keep_all_days 天保留全部版本；之后到 daily_days 天每天保留最新一份；
+再往后每周保留最新一份，设置了 weekly_days 时更早的版本全部删除。最新版本始终保留。
+删除按批进行，每批一个短事务，子表用原生DELETE级联，不经过Django的逐对象Collector。
+"""
+import logging
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION = {
+    'keep_all_days': 30,
+    'daily_days': 180,
+    'weekly_days': None,
+}
+COMPACT_CHUNK_SIZE = 500
+# 每条 incremental_vacuum 语句释放的页数，分步执行避免长时间占用写锁
+VACUUM_STEP_PAGES = 2000
+
+
+def retention_policy(**overrides):
+    """合并 settings.CMDB_RETENTION 与命令行参数，值为None的参数不覆盖配置"""
+    policy = {**DEFAULT_RETENTION, **getattr(settings, 'CMDB_RETENTION', {})}
+    policy.update({key: value for key, value in overrides.items() if value is not None})
+    return policy
+
+
+def select_expired_configs(policy, now=None):
+    """
+    按保留策略挑选可删除的历史配置
+
+    Returns:
+        生成器，逐个产出待删除的DeviceConfig主键
+    """
+    from cmdb.models import DeviceConfig
+
+    now = now or timezone.now()
+    keep_all_cutoff = now - timedelta(days=policy['keep_all_days'])
+    daily_cutoff = now - timedelta(days=policy['daily_days'])
+    weekly_cutoff = now - timedelta(days=policy['weekly_days']) if policy['weekly_days'] else None
+
+    rows = (
+        DeviceConfig.objects.filter(latest=False, time__lt=keep_all_cutoff)
+        .order_by('device_id', '-time', '-id')
+        .values_list('id', 'device_id', 'time')
+        .iterator(chunk_size=5000)
+    )
+    kept_buckets = set()
+    for config_id, device_id, config_time in rows:
+        if weekly_cutoff is not None and config_time < weekly_cutoff:
+            yield config_id
+            continue
+        local_date = timezone.localtime(config_time).date()
+        if config_time < daily_cutoff:
+            bucket = (device_id, 'week', *local_date.isocalendar()[:2])
+        else:
+            bucket = (device_id, 'day', local_date)
+        # 同一桶内按时间倒序，第一个即最新的一份
+        if bucket in kept_buckets:
+            yield config_id
+        else:
+            kept_buckets.add(bucket)
+
+
+def raw_delete_cascade(model, queryset, counts, keep=()):
+    """
+    先删除（或置空）所有引用这些行的子表记录，再原生删除这些行
+    子查询以 IN (SELECT ...) 形式下推到数据库，不把对象加载到内存
+
+    Args:
+        keep: 原样保留的子表模型，既不删除也不置空，其外键须为 db_constraint=False
+    """
+    # 与Collector相同的候选关系，包含related_name='+'的隐藏反向关系
+    for relation in get_candidate_relations_to_delete(model._meta):
+        if relation.related_model in keep:
+            continue
+        related = relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': queryset})
+        on_delete = relation.on_delete
+        if on_delete is models.CASCADE:
+            raw_delete_cascade(relation.related_model, related, counts, keep)
+        elif on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        elif on_delete is not models.DO_NOTHING:
+            raise ValueError(f'{relation.related_model.__name__}.{relation.field.name} 的删除策略不支持原生级联')
+    deleted = queryset._raw_delete(queryset.db)
+    counts[model.__name__] = counts.get(model.__name__, 0) + deleted
+
+
+def delete_configs(config_ids, chunk_size=COMPACT_CHUNK_SIZE, on_chunk=None):
+    """
+    分批删除配置及其提取出的对象
+
+    Args:
+        config_ids: 可迭代的配置主键
+        on_chunk: 每批提交后调用 on_chunk(本批数量, 累计删除行数字典)
+
+    Returns:
+        {模型名: 删除行数}
+    """
+    from cmdb.models import DeviceConfig
+    from cmdb.search import get_search_engine
+
+    counts = {}
+    config_ids = iter(config_ids)
+    while True:
+        chunk = list(islice(config_ids, chunk_size))
+        if not chunk:
+            break
+        with transaction.atomic():
+            # 再次排除最新版本，防止挑选之后设备恰好提升了某个历史版本
+            queryset = DeviceConfig._base_manager.filter(pk__in=chunk, latest=False)
+            get_search_engine().remove_configs(queryset.values_list('pk', flat=True))
+            raw_delete_cascade(DeviceConfig, queryset, counts)
+        if on_chunk:
+            on_chunk(len(chunk), counts)
+    return counts
+
+
+def sqlite_space():
+    """
+    SQLite数据库的空间使用情况
+
+    Returns:
+        dict，包含 page_size、page_count、freelist_count、auto_vacuum（0无 1完全 2增量）
+    """
+    with connection.cursor() as cursor:
+        values = {}
+        for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum'):
+            cursor.execute(f'PRAGMA {pragma}')
+            values[pragma] = cursor.fetchone()[0]
+    return values
+
+
+def enable_incremental_vacuum():
+    """切换为增量清理模式，需要执行一次完整VACUUM，期间数据库被独占"""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('VACUUM')
+
+
+def incremental_vacuum(step_pages=VACUUM_STEP_PAGES):
+    """
+    分步释放空闲页，每步一个短事务，期间API仍可读写
+
+    Returns:
+        释放的字节数
+    """
+    before = sqlite_space()
+    if before['auto_vacuum'] != 2:
+        return 0
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute('PRAGMA freelist_count')
+            if not cursor.fetchone()[0]:
+                break
+            cursor.execute(f'PRAGMA incremental_vacuum({step_pages})')
+            # incremental_vacuum 逐页执行，需要取完结果才会真正运行完
+            cursor.fetchall()
+    after = sqlite_space()
+    return (before['page_count'] - after['page_count']) * after['page_size']
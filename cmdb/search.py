@@ -0,0 +1,208 @@
+"""
+配置全文检索
+
+默认在SQLite上使用FTS5索引各设备的最新配置（可选包含历史版本），
+保存DeviceConfig时增量更新索引。其它数据库可通过 CMDB_SEARCH_ENGINE
+指定实现了 BaseSearchEngine 接口的检索引擎。
+"""
+import logging
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# 每个命中设备最多返回的匹配行数
+MAX_LINES_PER_HIT = 20
+
+
+class BaseSearchEngine:
+    """
+    检索引擎接口
+    """
+
+    def sync_configs(self, config_ids):
+        """将指定配置写入索引；未开启历史索引时同时移除这些设备的旧版本"""
+
+    def remove_configs(self, config_ids):
+        """从索引中删除指定配置"""
+
+    def rebuild(self):
+        """根据数据库中的配置重建整个索引"""
+
+    def search(self, query, limit=20, history=False, device_type=None, phrase=False):
+        """
+        检索配置
+
+        Returns:
+            命中列表，每项包含 config_id, device_id, hostname, latest, time, lines
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def index_history():
+        return getattr(settings, 'CMDB_SEARCH_HISTORY', False)
+
+    @staticmethod
+    def query_terms(query, phrase=False):
+        """将用户输入拆分为检索词，phrase模式下整句作为一个词"""
+        query = query.strip()
+        if not query:
+            return []
+        return [query] if phrase else query.split()
+
+    @staticmethod
+    def literal(term):
+        """去掉前缀匹配标记 *，得到用于逐行匹配的文本"""
+        return term.rstrip('*') or term
+
+    @classmethod
+    def matching_lines(cls, config_text, terms):
+        """找出包含任一检索词的行，返回 [{"line": 行号, "text": 行内容}] 列表"""
+        pattern = re.compile('|'.join(re.escape(cls.literal(term)) for term in terms), re.IGNORECASE)
+        lines = []
+        for line_no, line in enumerate(config_text.splitlines(), start=1):
+            if pattern.search(line):
+                lines.append({"line": line_no, "text": line})
+                if len(lines) >= MAX_LINES_PER_HIT:
+                    break
+        return lines
+
+
+class SqliteFTSEngine(BaseSearchEngine):
+    """
+    基于SQLite FTS5的检索引擎，索引表由迁移创建
+    行ID即DeviceConfig的主键，查询时与配置表、设备表关联
+    """
+    table = 'cmdb_config_fts'
+
+    def sync_configs(self, config_ids):
+        config_ids = list(config_ids)
+        if not config_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(config_ids))
+        latest_only = '' if self.index_history() else ' AND latest = 1'
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", config_ids)
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, config_text) "
+                f"SELECT id, config_text FROM cmdb_deviceconfig WHERE id IN ({placeholders}){latest_only}",
+                config_ids,
+            )
+            if not self.index_history():
+                cursor.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN ("
+                    f"SELECT id FROM cmdb_deviceconfig WHERE latest = 0 AND device_id IN ("
+                    f"SELECT device_id FROM cmdb_deviceconfig WHERE id IN ({placeholders})))",
+                    config_ids,
+                )
+
+    def remove_configs(self, config_ids):
+        config_ids = list(config_ids)
+        if not config_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(config_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", config_ids)
+
+    def rebuild(self):
+        latest_only = '' if self.index_history() else ' WHERE latest = 1'
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, config_text) "
+                f"SELECT id, config_text FROM cmdb_deviceconfig{latest_only}"
+            )
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+
+    def search(self, query, limit=20, history=False, device_type=None, phrase=False):
+        terms = self.query_terms(query, phrase)
+        if not terms:
+            return []
+        # 每个词作为FTS5短语，避免用户输入中的 - : 等字符被当作查询语法；以*结尾的词按前缀匹配
+        match = ' '.join(
+            '"{}"{}'.format(self.literal(term).replace('"', '""'), '*' if term.endswith('*') else '')
+            for term in terms
+        )
+        sql = (
+            f"SELECT c.id, c.device_id, d.hostname, c.latest, c.time, f.config_text "
+            f"FROM {self.table} f "
+            f"JOIN cmdb_deviceconfig c ON c.id = f.rowid "
+            f"JOIN cmdb_device d ON d.id = c.device_id "
+            f"WHERE {self.table} MATCH %s"
+        )
+        params = [match]
+        if not history:
+            sql += " AND c.latest = 1"
+        if device_type:
+            sql += " AND d.device_type = %s"
+            params.append(device_type)
+        sql += " ORDER BY rank LIMIT %s"
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        return [
+            {
+                "config_id": config_id,
+                "device_id": device_id,
+                "hostname": hostname,
+                "latest": bool(latest),
+                "time": time,
+                "lines": self.matching_lines(config_text, terms),
+            }
+            for config_id, device_id, hostname, latest, time, config_text in rows
+        ]
+
+
+class ScanSearchEngine(BaseSearchEngine):
+    """
+    通用检索引擎，直接对配置文本做不区分大小写的包含查询，适用于未提供全文索引的数据库
+    """
+
+    def search(self, query, limit=20, history=False, device_type=None, phrase=False):
+        from cmdb.models import DeviceConfig
+
+        terms = self.query_terms(query, phrase)
+        if not terms:
+            return []
+        queryset = DeviceConfig.objects.all()
+        if not history:
+            queryset = queryset.filter(latest=True)
+        if device_type:
+            queryset = queryset.filter(device__device_type=device_type)
+        for term in terms:
+            queryset = queryset.filter(config_text__icontains=self.literal(term))
+
+        rows = queryset.values_list('id', 'device_id', 'device__hostname', 'latest', 'time', 'config_text')[:limit]
+        return [
+            {
+                "config_id": config_id,
+                "device_id": device_id,
+                "hostname": hostname,
+                "latest": latest,
+                "time": time,
+                "lines": self.matching_lines(config_text, terms),
+            }
+            for config_id, device_id, hostname, latest, time, config_text in rows
+        ]
+
+
+@lru_cache(maxsize=None)
+def _load_engine(path):
+    return import_string(path)()
+
+
+def get_search_engine() -> BaseSearchEngine:
+    """
+    获取当前使用的检索引擎：优先使用 CMDB_SEARCH_ENGINE 配置，未配置时SQLite使用FTS5，其它数据库使用全表扫描
+    """
+    path = getattr(settings, 'CMDB_SEARCH_ENGINE', None)
+    if not path:
+        path = 'cmdb.search.SqliteFTSEngine' if connection.vendor == 'sqlite' else 'cmdb.search.ScanSearchEngine'
+    return _load_engine(path)
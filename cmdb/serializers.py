@@ -1,14 +1,14 @@
 from ctypes import addressof
 from rest_framework import serializers
-from .models import Device, DeviceConfig
+from .models import Device, DeviceConfig, ConfigChange
 import ipaddress
 
 class DeviceSerializer(serializers.ModelSerializer):
     """网络设备序列化器"""
     class Meta:
         model = Device
-        fields = ['id', 'hostname', 'address', 'username', 'device_type', 'connect_failed_at']
-        read_only_fields = ['id']
+        fields = ['id', 'hostname', 'address', 'username', 'device_type', 'connect_failed_at', 'connect_failures']
+        read_only_fields = ['id', 'connect_failed_at', 'connect_failures']
         extra_kwargs = {
             'password': {'write_only': True}  # 密码只在写入时使用，不返回
         }
@@ -70,4 +70,30 @@ class VirtualSerializer(serializers.Serializer):
         return getattr(obj.config.device, 'id') 
     
     def get_device_name(self, obj):
-        return getattr(obj.config.device, 'hostname') 
+        return getattr(obj.config.device, 'hostname')
+
+
+class PoolMemberSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    device_id = serializers.SerializerMethodField(method_name='get_device_id')
+    device_name = serializers.SerializerMethodField(method_name='get_device_name')
+    pool = serializers.CharField(source='pool.name', read_only=True)
+    name = serializers.CharField(read_only=True)
+    address = serializers.CharField(read_only=True)
+
+    def get_device_id(self, obj):
+        return getattr(obj.pool.config.device, 'id')
+
+    def get_device_name(self, obj):
+        return getattr(obj.pool.config.device, 'hostname')
+
+
+class ConfigChangeSerializer(serializers.ModelSerializer):
+    """配置对象变更序列化器"""
+    device_name = serializers.CharField(source='device.hostname', read_only=True)
+
+    class Meta:
+        model = ConfigChange
+        fields = ['id', 'device', 'device_name', 'config', 'previous', 'time',
+                  'object_type', 'object_name', 'action', 'changes']
+        read_only_fields = fields
@@ -1,56 +1,143 @@
+import csv
+import ipaddress
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import httpx
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
 from datetime import timedelta
+from cmdb.breaker import estimate_saved_seconds, plan_batch, record_fetch_result, skipped_result
 from cmdb.models import Device, DeviceConfig
+from cmdb.probe import probe_many
 from cmdb.serializers import DeviceConfigSerializer
-from cmdb.utils import config_parser
+from cmdb.utils import config_normalizer, config_parser, parse_config_safe
+from cmdb.writer import ConfigWriter
+from common.lanes import BULK, INTERACTIVE, PriorityLimiter
+from common.singleflight import SingleFlight
 # 异步版本的服务方法，用于支持原生异步调用
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# FastAPI采集服务地址及超时时间（秒）
+FASTAPI_CONFIG_URL = "http://localhost:8001/get-device-config"
+FASTAPI_TIMEOUT = 60
+# 管理命令批量采集的默认并发数
+FETCH_CONCURRENCY = 20
+# 同一设备成功采集后的结果复用秒数，期间重复请求不再连接设备
+FETCH_RESULT_TTL = 10
+# 本进程同时向采集服务发出的请求数上限，其中预留给单台设备交互采集的数量
+FETCH_SLOTS = 32
+FETCH_INTERACTIVE_SLOTS = 4
 
-async def async_fetch_config(device):
+# 设备导入CSV的列顺序
+DEVICE_IMPORT_FIELDS = ['hostname', 'address', 'device_type', 'username', 'password']
+# 每批upsert的设备数
+DEVICE_IMPORT_CHUNK_SIZE = 2000
+# 导入报告中最多保留的错误明细条数
+DEVICE_IMPORT_MAX_ERRORS = 100
+
+# 批量读取最新配置时可投影的字段（输出名 -> ORM路径）
+LATEST_CONFIG_FIELDS = {
+    'id': 'id',
+    'device_id': 'device_id',
+    'hostname': 'device__hostname',
+    'device_type': 'device__device_type',
+    'time': 'time',
+    'config_text': 'config_text',
+    'config_json': 'config_json',
+}
+LATEST_CONFIG_DEFAULT_FIELDS = ['id', 'device_id', 'hostname', 'time', 'config_text']
+# 设备ID列表按此大小分批查询，避免超出数据库的参数个数上限
+LATEST_CONFIG_ID_BATCH = 500
+
+# 重新解析时每个事务处理的配置数，同时决定内存中最多保留的配置文本数
+REPARSE_CHUNK_SIZE = 200
+
+
+async def _post_collector(client, device_info):
+    """调用FastAPI采集接口，返回解析后的JSON响应"""
+    response = await client.post(FASTAPI_CONFIG_URL, json=device_info)
+    logger.debug(f"FastAPI接口响应状态码: {response.status_code}")
+    response.raise_for_status()
+    return response.json()
+
+
+# 同一设备的并发采集只执行一次，单台采集与批量采集共享
+_fetch_flight = SingleFlight(
+    ttl=FETCH_RESULT_TTL,
+    cache_if=lambda result: result.get("success"),
+    # 复用的结果没有再次保存
+    from_cache=lambda result: {**result, "saved": False, "cached": True},
+)
+
+
+# 调用采集服务的槽位按优先级分配，批量任务占满时交互采集仍有预留槽位
+fetch_limiter = PriorityLimiter(capacity=FETCH_SLOTS, reserved=FETCH_INTERACTIVE_SLOTS)
+
+
+async def async_fetch_config(device, client=None, writer=None, lane=INTERACTIVE):
     """
     异步从FastAPI获取单个设备的配置并保存到数据库
+    同一设备已有采集在进行时等待并共享其结果，刚成功采集过的设备直接返回上次结果
     
     Args:
         device: Device对象，要获取配置的设备
+        client: 可选的httpx.AsyncClient，批量采集时复用同一个连接池
+        writer: 可选的ConfigWriter，批量采集时经单写者队列成批写入
+        lane: 优先级通道，单台设备的人工采集为INTERACTIVE，批量采集为BULK
     
     Returns:
         dict: 包含操作结果的字典
     """
+    if lane == INTERACTIVE:
+        # 该设备的批量采集仍在排队时提前到交互通道，本次请求会合并到那次采集
+        fetch_limiter.promote(device.pk)
+    return await _fetch_flight.do(device.pk, lambda: _fetch_and_save(device, client, writer, lane))
+
+
+def fetch_pipeline_metrics():
+    """本进程采集调度的指标：各优先级通道的槽位与排队耗时，以及同设备请求合并的次数"""
+    return {**fetch_limiter.metrics(), "coalescing": dict(_fetch_flight.stats)}
+
+
+async def _fetch_and_save(device, client=None, writer=None, lane=INTERACTIVE):
+    """采集并保存单个设备的配置，见 async_fetch_config"""
     try:
-        # 准备设备信息
+        # 准备设备信息，priority 供采集服务选择工作线程的优先级通道
         device_info = {
             "hostname": device.hostname,
             "address": device.address,
             "username": device.username,
             "password": device.password,
-            "device_type": device.device_type
+            "device_type": device.device_type,
+            "priority": lane,
         }
         logger.debug(f"准备调用FastAPI接口，设备信息: {device_info}")
         
         # 调用FastAPI接口
-        fastapi_url = "http://localhost:8001/get-device-config"
-        logger.info(f"调用FastAPI接口: {fastapi_url}")
+        logger.info(f"调用FastAPI接口: {FASTAPI_CONFIG_URL}")
         
-        # 使用httpx的异步客户端
-        async with httpx.AsyncClient(timeout=60) as client:
-            response = await client.post(fastapi_url, json=device_info)
-            logger.debug(f"FastAPI接口响应状态码: {response.status_code}")
-            response.raise_for_status()
-            
-            # 解析响应
-            result = response.json()
-            logger.debug(f"FastAPI接口响应内容: {result}")
+        # 使用httpx的异步客户端，只在请求采集服务期间占用槽位
+        async with fetch_limiter.slot(lane, device.pk):
+            if client is None:
+                async with httpx.AsyncClient(timeout=FASTAPI_TIMEOUT) as client:
+                    result = await _post_collector(client, device_info)
+            else:
+                result = await _post_collector(client, device_info)
+        logger.debug(f"FastAPI接口响应内容: {result}")
         
         if result.get("success"):
             logger.info(f"成功获取{device.hostname}的配置")
+            await record_fetch_result(device, True)
             
-            # 获取配置内容
+            # 获取配置内容，去掉时间戳等易变行后计算摘要用于比较
             config_content = result.get("config")
+            config_hash = config_normalizer.digest(config_content, device.device_type)
             
             # 检查是否需要保存新配置
             save_new_config = True
@@ -59,12 +146,15 @@ async def async_fetch_config(device):
             # 获取设备最新的配置记录 - 使用异步ORM
             try:
                 logger.debug(f"查询设备{device.hostname}的最新配置")
-                latest_config = await DeviceConfig.objects.filter(device=device).order_by('-time').afirst()
+                latest_config = await (
+                    DeviceConfig.objects.select_related('device').defer('config_json')
+                    .filter(device=device, latest=True).afirst()
+                )
                 logger.debug(f"查询完成，是否找到最新配置: {latest_config is not None}")
                 
                 if latest_config:
-                    # 比对配置内容是否一致
-                    if latest_config.config_text == config_content:
+                    # 比对规范化后的配置摘要是否一致
+                    if latest_config.config_hash == config_hash:
                         logger.info(f"获取的配置与最新配置一致")
                         
                         # 检查是否在一天内
@@ -85,21 +175,20 @@ async def async_fetch_config(device):
                 latest_config = None
             
             if save_new_config:
-                # 保存配置到数据库 - 使用异步ORM
-                config_obj = await DeviceConfig.objects.acreate(
-                    device=device,
-                    config_text=config_content
-                )
-                logger.info(f"配置已保存到数据库，配置ID: {config_obj.pk}")
-                
-                # 使用TTP解析配置
-                parsed_config = config_parser.parse_config(config_content, device.device_type)
-                logger.debug(f"配置解析结果: {parsed_config}")
-                
-                # 更新设备的解析后配置 - 使用异步ORM
-                config_obj.interface_json = parsed_config
-                await config_obj.asave()
-                logger.info(f"已更新{device.hostname}的解析后配置")
+                # 保存配置到数据库 - 使用异步ORM，TTP解析与对象提取在save()中于线程池执行
+                if writer is not None:
+                    config_obj = await writer.save(DeviceConfig(
+                        device=device,
+                        config_text=config_content,
+                        config_hash=config_hash
+                    ))
+                else:
+                    config_obj = await DeviceConfig.objects.acreate(
+                        device=device,
+                        config_text=config_content,
+                        config_hash=config_hash
+                    )
+                logger.info(f"配置已保存并解析，配置ID: {config_obj.pk}")
                 
                 # 序列化返回结果
                 serializer = DeviceConfigSerializer(config_obj)
@@ -123,10 +212,20 @@ async def async_fetch_config(device):
         else:
             error_msg = result.get('detail', '未知错误')
             logger.error(f"获取{device.hostname}配置失败: {error_msg}")
+            await record_fetch_result(device, False)
             return {
                 "success": False,
                 "message": f"获取{device.hostname}配置失败: {error_msg}"
             }
+    except httpx.HTTPStatusError as e:
+        # 采集服务连接或登录设备失败时返回5xx，计入设备的连续失败次数
+        logger.error(f"采集服务返回错误: {str(e)}")
+        if e.response.status_code >= 500:
+            await record_fetch_result(device, False)
+        return {
+            "success": False,
+            "message": f"获取{device.hostname}配置失败: {e.response.text[:500]}"
+        }
     except httpx.RequestError as e:
         logger.error(f"网络请求失败: {str(e)}", exc_info=True)
         return {
@@ -141,12 +240,101 @@ async def async_fetch_config(device):
         }
 
 
-async def batch_fetch_configs(devices):
+def probe_enabled():
+    """批量采集前是否探测SSH端口，采集服务与本机不在同一网络时应在设置中关闭"""
+    return getattr(settings, 'CMDB_FETCH_PROBE', True)
+
+
+async def _probe_devices(devices):
+    """
+    并发探测设备的SSH端口，不可达的设备计入连续连接失败次数
+
+    Returns:
+        (可达的设备列表, {设备ID: 不可达设备的结果字典})
+    """
+    probes = await probe_many([device.address for device in devices])
+    reachable, unreachable = [], {}
+    for device in devices:
+        probe = probes[device.address]
+        if probe["reachable"]:
+            reachable.append(device)
+            continue
+        logger.warning(f"设备{device.hostname}({device.address})不可达: {probe['error']}")
+        await record_fetch_result(device, False)
+        unreachable[device.pk] = {
+            "success": False,
+            "unreachable": True,
+            "message": f"{device.hostname}不可达: {probe['error']}",
+        }
+    return reachable, unreachable
+
+
+async def fetch_configs_concurrently(devices, concurrency=FETCH_CONCURRENCY, on_result=None, probe=None):
+    """
+    以有限并发采集多台设备的配置，复用与单台采集相同的保存、去重与解析流程
+    
+    Args:
+        devices: Device对象列表
+        concurrency: 同时进行的采集数量上限，超过 fetch_limiter 批量通道的槽位数时扩大批量通道
+        on_result: 可选回调，每台设备完成时以 (device, result, elapsed) 调用，探测不可达的设备elapsed为None
+        probe: 是否先探测SSH端口，不可达的设备不进入采集；None时按 CMDB_FETCH_PROBE
+    
+    Returns:
+        list: 与devices顺序一致的结果字典列表
+    """
+    bulk_slots = fetch_limiter.bulk_capacity
+    if fetch_limiter.ensure_bulk_capacity(concurrency):
+        # 批量通道按调用方的并发数扩大，否则会被静默限制在 FETCH_SLOTS - FETCH_INTERACTIVE_SLOTS
+        logger.warning(
+            f"并发数{concurrency}超过批量通道的{bulk_slots}个槽位，"
+            f"总槽位扩大为{fetch_limiter.capacity}（仍预留{fetch_limiter.reserved}个给交互采集）"
+        )
+    if probe is None:
+        probe = probe_enabled()
+    outcomes = {}
+    if probe:
+        devices_to_fetch, outcomes = await _probe_devices(devices)
+        if on_result is not None:
+            # 不可达的设备没有进入采集，没有采集耗时
+            for device in devices:
+                if device.pk in outcomes:
+                    on_result(device, outcomes[device.pk], None)
+    else:
+        devices_to_fetch = devices
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=FASTAPI_TIMEOUT, limits=limits) as client, ConfigWriter() as writer:
+        async def _fetch(device):
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    result = await async_fetch_config(device, client, writer, lane=BULK)
+                except Exception as e:
+                    logger.error(f"处理设备{device.hostname}失败: {str(e)}", exc_info=True)
+                    result = {"success": False, "message": f"处理失败: {str(e)}"}
+                elapsed = time.monotonic() - start
+            if on_result is not None:
+                on_result(device, result, elapsed)
+            return result
+
+        results = await asyncio.gather(*[_fetch(device) for device in devices_to_fetch])
+
+    outcomes.update({device.pk: result for device, result in zip(devices_to_fetch, results)})
+    return [outcomes[device.pk] for device in devices]
+
+
+async def batch_fetch_configs(devices, ignore_breaker=False, probe=None):
     """
     异步批量从FastAPI获取多个设备的配置并保存到数据库
+    连续连接失败而熔断的设备跳过，最近失败过的设备优先采集，见 cmdb.breaker；
+    其余设备先探测SSH端口，不可达的直接报告失败，不占用采集槽位，见 cmdb.probe
     
     Args:
         devices: Device对象列表或查询集，要获取配置的设备
+        ignore_breaker: 为True时不跳过熔断中的设备
+        probe: 是否先探测SSH端口，None时按 CMDB_FETCH_PROBE
     
     Returns:
         dict: 包含批量操作结果的字典
@@ -154,6 +342,7 @@ async def batch_fetch_configs(devices):
     # 初始化结果统计
     success_count = 0
     failed_count = 0
+    skipped_count = 0
     results = []
     
     # 将devices转换为列表，避免重复查询
@@ -173,20 +362,37 @@ async def batch_fetch_configs(devices):
             "total_devices": 0,
             "success_count": 0,
             "failed_count": 0,
+            "skipped_count": 0,
+            "estimated_seconds_saved": 0,
             "results": []
         }
     
-    # 创建任务列表
-    tasks = []
-    for device in devices_list:
-        tasks.append(async_fetch_config(device))
+    if ignore_breaker:
+        to_fetch, skipped = devices_list, []
+    else:
+        to_fetch, skipped = plan_batch(devices_list)
+    if probe is None:
+        probe = probe_enabled()
+    unreachable = {}
+    if probe:
+        to_fetch, unreachable = await _probe_devices(to_fetch)
     
-    # 并发执行所有任务，收集异常
-    task_results = await asyncio.gather(*tasks, return_exceptions=True)
+    # 所有设备共用一个连接池，保存经单写者队列成批提交；同时发出的请求数由 fetch_limiter 的批量通道限制
+    async with httpx.AsyncClient(timeout=FASTAPI_TIMEOUT) as client, ConfigWriter() as writer:
+        # 创建任务列表
+        tasks = []
+        for device in to_fetch:
+            tasks.append(async_fetch_config(device, client, writer, lane=BULK))
+        
+        # 并发执行所有任务，收集异常
+        task_results = await asyncio.gather(*tasks, return_exceptions=True)
     
-    # 处理任务结果
-    for i, result in enumerate(task_results):
-        device = devices_list[i]
+    # 按传入顺序处理任务结果
+    outcomes = {device.pk: result for device, result in zip(to_fetch, task_results)}
+    outcomes.update({device.pk: skipped_result(device) for device in skipped})
+    outcomes.update(unreachable)
+    for device in devices_list:
+        result = outcomes[device.pk]
         try:
             if isinstance(result, Exception):
                 # 处理异常
@@ -211,7 +417,12 @@ async def batch_fetch_configs(devices):
                 if result["success"]:
                     device_result["config_id"] = result["config"]["id"]
                     success_count += 1
+                elif result.get("skipped"):
+                    device_result["skipped"] = True
+                    skipped_count += 1
                 else:
+                    if result.get("unreachable"):
+                        device_result["unreachable"] = True
                     failed_count += 1
                 
                 results.append(device_result)
@@ -232,5 +443,230 @@ async def batch_fetch_configs(devices):
         "total_devices": len(devices_list),
         "success_count": success_count,
         "failed_count": failed_count,
+        "skipped_count": skipped_count,
+        # 按每台跳过的设备耗满一次连接超时、以批量通道的并发数估算，与 fetch_device_configs 的报告一致
+        "estimated_seconds_saved": estimate_saved_seconds(skipped_count, fetch_limiter.bulk_capacity),
         "results": results
-    }
\ No newline at end of file
+    }
+
+
+def _parse_device_row(row):
+    """
+    校验并规范化一行设备CSV
+
+    Returns:
+        Device对象；行无效时抛出ValueError
+    """
+    if len(row) != len(DEVICE_IMPORT_FIELDS):
+        raise ValueError(f"列数应为{len(DEVICE_IMPORT_FIELDS)}，实际为{len(row)}")
+
+    hostname, address, device_type, username, password = [value.strip() for value in row]
+    # 处理IP地址，去掉.xsh后缀
+    address = address.replace('.xsh', '')
+    if not hostname:
+        raise ValueError("主机名为空")
+    ipaddress.ip_address(address)
+
+    return Device(
+        hostname=hostname,
+        address=address,
+        username=username,
+        password=password,
+        device_type=device_type
+    )
+
+
+def import_devices_from_csv(lines, dry_run=False, chunk_size=DEVICE_IMPORT_CHUNK_SIZE):
+    """
+    分块读取设备CSV并按主机名批量upsert
+
+    Args:
+        lines: 可迭代的CSV文本行，列顺序见 DEVICE_IMPORT_FIELDS
+        dry_run: 为True时只生成报告，不写入数据库
+        chunk_size: 每批upsert的设备数
+
+    Returns:
+        dict: 导入报告，包含新增、更新、跳过的数量及错误明细
+    """
+    report = {
+        "success": True,
+        "dry_run": dry_run,
+        "total_rows": 0,
+        "created_count": 0,
+        "updated_count": 0,
+        "skipped_count": 0,
+        "errors": [],
+    }
+    # dry-run不写库，需要自行记录已出现的主机名以得到与真实导入一致的统计
+    seen_hostnames = set()
+    rows = enumerate(csv.reader(lines), start=1)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        devices = {}
+        for line_no, row in chunk:
+            report["total_rows"] += 1
+            try:
+                device = _parse_device_row(row)
+            except ValueError as e:
+                report["skipped_count"] += 1
+                if len(report["errors"]) < DEVICE_IMPORT_MAX_ERRORS:
+                    report["errors"].append({"line": line_no, "row": row, "error": str(e)})
+                continue
+            if device.hostname in devices:
+                # 同一文件中重复的主机名以最后一行为准
+                report["updated_count"] += 1
+            devices[device.hostname] = device
+
+        if not devices:
+            continue
+
+        existing = set(
+            Device.objects.filter(hostname__in=list(devices)).values_list('hostname', flat=True)
+        )
+        existing |= seen_hostnames & devices.keys()
+        report["created_count"] += len(devices) - len(existing)
+        report["updated_count"] += len(existing)
+
+        if dry_run:
+            seen_hostnames.update(devices)
+            continue
+
+        with transaction.atomic():
+            Device.objects.bulk_create(
+                list(devices.values()),
+                update_conflicts=True,
+                unique_fields=['hostname'],
+                update_fields=['address', 'username', 'password', 'device_type'],
+            )
+        logger.info(f"已导入{report['created_count'] + report['updated_count']}个设备")
+
+    return report
+
+
+def iter_latest_configs(fields, device_ids=None, device_type=None, hostnames=None):
+    """
+    按设备批量读取最新配置，走 (device, latest) 索引而不是逐台排序取第一条
+
+    Args:
+        fields: 输出字段列表，取值见 LATEST_CONFIG_FIELDS
+        device_ids: 可选的设备ID列表
+        device_type: 可选的设备类型过滤
+        hostnames: 可选的主机名列表
+
+    Returns:
+        按设备ID排序的元组迭代器，元组顺序与fields一致
+    """
+    queryset = DeviceConfig.objects.filter(latest=True)
+    if device_type:
+        queryset = queryset.filter(device__device_type=device_type)
+    if hostnames:
+        queryset = queryset.filter(device__hostname__in=hostnames)
+
+    annotations = {
+        name: F(LATEST_CONFIG_FIELDS[name]) for name in fields if LATEST_CONFIG_FIELDS[name] != name
+    }
+    queryset = queryset.annotate(**annotations).order_by('device_id').values_list(*fields)
+
+    if not device_ids:
+        yield from queryset.iterator(chunk_size=LATEST_CONFIG_ID_BATCH)
+        return
+
+    device_ids = sorted(set(device_ids))
+    for start in range(0, len(device_ids), LATEST_CONFIG_ID_BATCH):
+        yield from queryset.filter(device_id__in=device_ids[start:start + LATEST_CONFIG_ID_BATCH])
+
+
+def stale_configs_queryset(device_types=None, latest_only=False, since=None, until=None):
+    """
+    选择解析模板版本与当前模板不一致的配置
+    
+    Args:
+        device_types: 可选的设备类型列表，默认为所有有模板的设备类型
+        latest_only: 是否只选择最新配置
+        since: 可选，只选择该时间之后保存的配置
+        until: 可选，只选择该时间之前保存的配置
+    
+    Returns:
+        QuerySet: 需要重新解析的配置
+    """
+    condition = Q()
+    for device_type in device_types or config_parser.TEMPLATE_MAP:
+        version = config_parser.get_template_version(device_type)
+        if version:
+            condition |= Q(device__device_type=device_type) & ~Q(template_version=version)
+    if not condition:
+        return DeviceConfig.objects.none()
+
+    # 未解析的历史版本会在首次访问时按当前模板解析，不需要重新解析
+    queryset = DeviceConfig.objects.filter(condition).exclude(config_json__isnull=True)
+    if latest_only:
+        queryset = queryset.filter(latest=True)
+    if since:
+        queryset = queryset.filter(time__gte=since)
+    if until:
+        queryset = queryset.filter(time__lt=until)
+    return queryset
+
+
+def reparse_configs(queryset, workers=None, chunk_size=REPARSE_CHUNK_SIZE, limit=None, on_progress=None):
+    """
+    重新解析配置并重新提取关联对象，按主键顺序分块处理，每块一个事务
+    处理成功的配置会记录当前模板版本，中断后再次选择过期配置即可从断点继续
+    
+    Args:
+        queryset: 要重新解析的配置，通常来自 stale_configs_queryset
+        workers: 解析进程数，None为CPU核数，0表示在当前进程内解析
+        chunk_size: 每块处理的配置数
+        limit: 可选，本次最多处理的配置数
+        on_progress: 可选回调，每块提交后以统计字典调用
+    
+    Returns:
+        dict: 包含处理成功与解析失败数量的统计
+    """
+    stats = {"processed": 0, "failed": 0}
+    # device_id 与 latest 供 bulk_extract 重算最新配置的GTM-LTM关联
+    queryset = queryset.order_by('id').values_list('id', 'config_text', 'device__device_type', 'device_id', 'latest')
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 0 else None
+    mapper = executor.map if executor is not None else map
+    last_id = 0
+
+    try:
+        while limit is None or stats["processed"] + stats["failed"] < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - stats["processed"] - stats["failed"])
+            rows = list(queryset.filter(id__gt=last_id)[:size])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            results = mapper(parse_config_safe, [(config_text, device_type) for _, config_text, device_type, *_ in rows])
+            configs = []
+            for (config_id, _, device_type, device_id, latest), config_json in zip(rows, results):
+                if config_json is None:
+                    # 解析失败的配置保留旧结果与旧版本号，下次仍会被选中
+                    stats["failed"] += 1
+                    continue
+                configs.append(DeviceConfig(
+                    id=config_id,
+                    device_id=device_id,
+                    latest=latest,
+                    config_json=config_json,
+                    template_version=config_parser.get_template_version(device_type),
+                ))
+
+            with transaction.atomic():
+                DeviceConfig.clear_extracted([config.id for config in configs])
+                DeviceConfig.objects.bulk_update(configs, ['config_json', 'template_version'])
+                DeviceConfig.bulk_extract(configs)
+            stats["processed"] += len(configs)
+            logger.info(f"已重新解析{stats['processed']}个配置，失败{stats['failed']}个")
+            if on_progress is not None:
+                on_progress(stats)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return stats
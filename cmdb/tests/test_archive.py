@@ -0,0 +1,87 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cmdb.archive import ARCHIVE_SCHEMA, ARCHIVE_VIEW, archive_configs, history_queryset
+from cmdb.models import ConfigChange, Device, DeviceConfig, LtmPool, LtmVirtualServer
+from cmdb.tests.test_ltm_graph import f5_config
+
+
+class TestArchive(TransactionTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(CMDB_ARCHIVE_DATABASE=Path(self.tmpdir.name) / 'archive.sqlite3')
+        self.settings.enable()
+        self.client = APIClient()
+        self.device = Device.objects.create(
+            hostname='lb-1', address='10.0.0.1', username='admin', password='admin', device_type='f5_ltm'
+        )
+        self.old = DeviceConfig.objects.create(
+            device=self.device, config_text=f5_config('web', '10.1.2.3'), time=timezone.now() - timedelta(days=400)
+        )
+        DeviceConfig.objects.filter(pk=self.old.pk).update(latest=False)
+        self.latest = DeviceConfig.objects.create(device=self.device, config_text=f5_config('web', '10.1.2.4'))
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP VIEW IF EXISTS temp."{ARCHIVE_VIEW}"')
+            cursor.execute(f'DETACH DATABASE {ARCHIVE_SCHEMA}')
+        self.settings.disable()
+        self.tmpdir.cleanup()
+
+    def test_archive_moves_config_and_drops_children(self):
+        counts = archive_configs([self.old.pk, self.latest.pk])
+        self.assertEqual(counts['DeviceConfig'], 1)
+        self.assertGreater(counts['LtmVirtualServer'], 0)
+        self.assertFalse(DeviceConfig.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(LtmPool.objects.filter(config_id=self.old.pk).exists())
+        self.assertTrue(LtmVirtualServer.objects.filter(config=self.latest).exists())
+        with connection.cursor() as cursor:
+            # 只归档配置行，提取出的对象不复制
+            cursor.execute(f"SELECT name FROM {ARCHIVE_SCHEMA}.sqlite_master WHERE type = 'table'")
+            self.assertEqual([row[0] for row in cursor.fetchall()], ['cmdb_deviceconfig'])
+
+        # 重跑同一批不会产生重复行
+        archive_configs([self.old.pk])
+        self.assertEqual([c.pk for c in history_queryset(device=self.device)], [self.latest.pk, self.old.pk])
+
+    def test_history_reaches_archive(self):
+        archive_configs([self.old.pk])
+        response = self.client.get(f'/api/configs/{self.old.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['config_text'], self.old.config_text)
+
+        response = self.client.get(f'/api/configs/?device={self.device.pk}')
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual([c['id'] for c in response.json()['results']], [self.latest.pk, self.old.pk])
+
+        response = self.client.get(f'/api/configs/{self.old.pk}/diff/{self.latest.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('+    address 10.1.2.4', response.json()['diff'])
+
+        # 归档配置只读
+        response = self.client.patch(f'/api/configs/{self.old.pk}/', {'config_text': 'x'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_changes_stay_in_main_database(self):
+        changes = list(ConfigChange.objects.filter(config=self.latest).values_list('pk', 'previous_id'))
+        self.assertTrue(changes)
+        self.assertEqual({previous for _, previous in changes}, {self.old.pk})
+
+        archive_configs([self.old.pk])
+        self.assertEqual(list(ConfigChange.objects.filter(config=self.latest).values_list('pk', 'previous_id')), changes)
+        response = self.client.get('/api/config-changes/', {'device': self.device.pk})
+        self.assertEqual(sorted(c['id'] for c in response.json()), sorted(pk for pk, _ in changes))
+        self.assertEqual(self.client.get(f'/api/configs/{self.old.pk}/').status_code, 200)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_configs', '--dry-run', stdout=out)
+        self.assertIn('待归档历史配置 1 个', out.getvalue())
+        call_command('archive_configs', stdout=out)
+        self.assertEqual(list(DeviceConfig.objects.values_list('pk', flat=True)), [self.latest.pk])
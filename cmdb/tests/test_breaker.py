@@ -0,0 +1,119 @@
+import io
+from datetime import timedelta
+from unittest import mock
+import httpx
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from cmdb.breaker import CLOSED, HALF_OPEN, OPEN, breaker_policy, breaker_state, plan_batch, retry_at
+from cmdb.models import Device
+from cmdb.services import _fetch_flight, async_fetch_config, batch_fetch_configs
+from cmdb.tests.test_fetch import CONFIG_TEXT
+
+POLICY = breaker_policy(threshold=3, base_minutes=10, max_hours=1)
+
+
+def make_device(hostname, failures=0, failed_minutes_ago=None):
+    failed_at = timezone.now() - timedelta(minutes=failed_minutes_ago) if failed_minutes_ago is not None else None
+    return Device.objects.create(
+        hostname=hostname, address='10.0.0.1', username='admin', password='admin', device_type='h3c_switch',
+        connect_failures=failures, connect_failed_at=failed_at,
+    )
+
+
+class TestBreakerState(TestCase):
+    def test_backoff_doubles_and_is_capped(self):
+        device = make_device('sw-1', failures=3, failed_minutes_ago=0)
+        self.assertEqual(retry_at(device, POLICY) - device.connect_failed_at, timedelta(minutes=10))
+        device.connect_failures = 5
+        self.assertEqual(retry_at(device, POLICY) - device.connect_failed_at, timedelta(minutes=40))
+        device.connect_failures = 500
+        self.assertEqual(retry_at(device, POLICY) - device.connect_failed_at, timedelta(hours=1))
+
+    def test_states_and_plan(self):
+        healthy = make_device('sw-ok')
+        flaky = make_device('sw-flaky', failures=1, failed_minutes_ago=1)
+        dead = make_device('sw-dead', failures=3, failed_minutes_ago=5)
+        probe = make_device('sw-probe', failures=3, failed_minutes_ago=15)
+
+        self.assertEqual(breaker_state(flaky, policy=POLICY), CLOSED)
+        self.assertEqual(breaker_state(dead, policy=POLICY), OPEN)
+        self.assertEqual(breaker_state(probe, policy=POLICY), HALF_OPEN)
+
+        to_fetch, skipped = plan_batch([healthy, flaky, dead, probe], policy=POLICY)
+        # 可能超时的设备先开始采集
+        self.assertEqual([d.hostname for d in to_fetch], ['sw-flaky', 'sw-probe', 'sw-ok'])
+        self.assertEqual(skipped, [dead])
+
+
+# 不依赖测试环境的网络，SSH端口探测见 test_probe
+@override_settings(CMDB_FETCH_PROBE=False)
+class TestBreakerFetch(TestCase):
+    def setUp(self):
+        _fetch_flight.forget()
+        self.calls = []
+
+    def _collector(self, fail=()):
+        async def _post_collector(client, device_info):
+            self.calls.append(device_info['hostname'])
+            if device_info['hostname'] in fail:
+                request = httpx.Request('POST', 'http://collector')
+                response = httpx.Response(500, request=request, json={'detail': 'Failed to get config: timed out'})
+                response.raise_for_status()
+            return {"success": True, "config": CONFIG_TEXT}
+        return _post_collector
+
+    def test_failure_recorded_and_success_resets(self):
+        device = make_device('sw-1')
+        with mock.patch('cmdb.services._post_collector', self._collector(fail={'sw-1'})):
+            result = async_to_sync(async_fetch_config)(device)
+        self.assertFalse(result['success'])
+        self.assertIn('timed out', result['message'])
+        device.refresh_from_db()
+        self.assertEqual(device.connect_failures, 1)
+        self.assertIsNotNone(device.connect_failed_at)
+
+        with mock.patch('cmdb.services._post_collector', self._collector()):
+            self.assertTrue(async_to_sync(async_fetch_config)(device)['success'])
+        device.refresh_from_db()
+        self.assertEqual(device.connect_failures, 0)
+        self.assertIsNone(device.connect_failed_at)
+
+    def test_batch_skips_open_devices(self):
+        make_device('sw-ok')
+        make_device('sw-dead', failures=5, failed_minutes_ago=1)
+
+        with mock.patch('cmdb.services._post_collector', self._collector()):
+            result = async_to_sync(batch_fetch_configs)(list(Device.objects.order_by('id')))
+
+        self.assertEqual(self.calls, ['sw-ok'])
+        self.assertEqual((result['success_count'], result['failed_count'], result['skipped_count']), (1, 0, 1))
+        self.assertGreater(result['estimated_seconds_saved'], 0)
+        self.assertEqual([r['hostname'] for r in result['results']], ['sw-ok', 'sw-dead'])
+        self.assertTrue(result['results'][1]['skipped'])
+
+        with mock.patch('cmdb.services._post_collector', self._collector()):
+            forced = async_to_sync(batch_fetch_configs)(list(Device.objects.all()), ignore_breaker=True)
+        self.assertEqual(forced['skipped_count'], 0)
+        self.assertEqual(Device.objects.get(hostname='sw-dead').connect_failures, 0)
+
+
+@override_settings(CMDB_FETCH_PROBE=False)
+class TestBreakerCommand(TransactionTestCase):
+    def setUp(self):
+        _fetch_flight.forget()
+        self.calls = []
+
+    _collector = TestBreakerFetch._collector
+
+    def test_command_reports_skipped_devices(self):
+        make_device('sw-ok')
+        make_device('sw-dead', failures=5, failed_minutes_ago=1)
+        out = io.StringIO()
+
+        with mock.patch('cmdb.services._post_collector', self._collector()):
+            call_command('fetch_device_configs', stdout=out)
+
+        self.assertEqual(self.calls, ['sw-ok'])
+        self.assertIn('熔断跳过 1 个设备', out.getvalue())
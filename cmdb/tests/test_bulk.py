@@ -0,0 +1,60 @@
+from unittest import mock, skipUnless
+from django.db import connection
+from django.test import TestCase, override_settings
+from cmdb import bulk
+from cmdb.bulk import COPY_MIN_ROWS, bulk_insert, copy_supported
+from cmdb.models import Device, DeviceConfig, LtmNode, LtmPool, LtmPoolMember
+
+
+class TestBulkInsert(TestCase):
+    # 空的历史配置不在保存时解析
+    @override_settings(CMDB_PARSE_POLICY='latest')
+    def test_sqlite_falls_back_to_bulk_create(self):
+        self.assertFalse(copy_supported(connection.alias))
+        device = Device.objects.create(
+            hostname='lb-1', address='10.0.0.1', username='admin', password='admin', device_type='f5_ltm'
+        )
+        config = DeviceConfig.objects.create(device=device, config_text='', latest=False)
+        node = LtmNode(config=config, name='/Common/n1', address='10.1.1.1')
+        pool = LtmPool(config=config, name='/Common/p1')
+        member = LtmPoolMember(pool=pool, node=node, name='/Common/n1:80', address='10.1.1.1', port='80')
+        for model, objects in ((LtmNode, [node]), (LtmPool, [pool]), (LtmPoolMember, [member])):
+            bulk_insert(model, objects)
+        # 后插入的对象通过先插入对象回填的主键建立外键
+        member = LtmPoolMember.objects.get(pk=member.pk)
+        self.assertEqual((member.pool_id, member.node_id), (pool.pk, node.pk))
+
+
+@skipUnless(copy_supported(connection.alias), 'COPY快速路径需要PostgreSQL与psycopg 3')
+class TestCopyInsert(TestCase):
+    @override_settings(CMDB_PARSE_POLICY='latest')
+    def test_copy_backfills_keys(self):
+        device = Device.objects.create(
+            hostname='lb-1', address='10.0.0.1', username='admin', password='admin', device_type='f5_ltm'
+        )
+        config = DeviceConfig.objects.create(device=device, config_text='', latest=False)
+        count = COPY_MIN_ROWS + 1
+        nodes = [
+            LtmNode(config=config, name=f'/Common/n{i}', address=f'10.1.{i // 256}.{i % 256}') for i in range(count)
+        ]
+        pools = [LtmPool(config=config, name=f'/Common/p{i}') for i in range(count)]
+        members = [
+            LtmPoolMember(pool=pool, node=node, name=f'{node.name}:80', address=node.address, port='80')
+            for pool, node in zip(pools, nodes)
+        ]
+        with mock.patch('cmdb.bulk._copy_insert', wraps=bulk._copy_insert) as copy_insert:
+            for model, objects in ((LtmNode, nodes), (LtmPool, pools), (LtmPoolMember, members)):
+                bulk_insert(model, objects)
+        self.assertEqual(copy_insert.call_count, 3)
+
+        stored = {
+            member.pk: (member.pool_id, member.node_id, member.name)
+            for member in LtmPoolMember.objects.filter(pool__config=config)
+        }
+        self.assertEqual(stored, {member.pk: (member.pool.pk, member.node.pk, member.name) for member in members})
+        self.assertEqual(
+            dict(LtmNode.objects.filter(config=config).values_list('pk', 'address')),
+            {node.pk: node.address for node in nodes},
+        )
+        # 序列已越过COPY写入的主键，之后的普通INSERT不会冲突
+        self.assertGreater(LtmPool.objects.create(config=config, name='/Common/extra').pk, max(p.pk for p in pools))
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cmdb.models import ConfigChange, Device, DeviceConfig
+from cmdb.tests.test_ltm_graph import f5_config
+
+# 带 profiles/rules 的VS，解析结果为字典列表，重复构造对象时不能被改写
+PROFILED_VS = """ltm virtual /Common/app_vs {
+    destination /Common/10.30.0.9:443
+    ip-protocol tcp
+    mask 255.255.255.255
+    profiles {
+        /Common/http { }
+        /Common/tcp { }
+    }
+    rules {
+        /Common/redirect
+    }
+}
+"""
+
+
+class TestSemanticChanges(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.device = Device.objects.create(
+            hostname='lb-1', address='10.0.0.1', username='admin', password='admin', device_type='f5_ltm'
+        )
+        self.first = DeviceConfig.objects.create(
+            device=self.device, config_text=f5_config('web', '10.1.2.3') + PROFILED_VS,
+            time=timezone.now() - timedelta(days=1)
+        )
+        DeviceConfig.objects.filter(pk=self.first.pk).update(latest=False)
+        changed = f5_config('web', '10.1.2.3').replace('round-robin', 'least-connections-member') \
+            .replace('pool /Common/web_pool\n}', 'pool /Common/web_pool\n    source 10.0.0.0/8\n}')
+        changed += f5_config('api', '10.1.2.4').split('ltm virtual')[0]
+        changed += PROFILED_VS.replace('/Common/redirect', '/Common/redirect\n        /Common/audit')
+        self.second = DeviceConfig.objects.create(device=self.device, config_text=changed)
+
+    def test_first_version_has_no_changes(self):
+        self.assertFalse(ConfigChange.objects.filter(config=self.first).exists())
+
+    def test_changes_recorded(self):
+        changes = {
+            (c.object_type, c.object_name, c.action): c.changes
+            for c in ConfigChange.objects.filter(config=self.second)
+        }
+        self.assertEqual(changes[('ltmpool', '/Common/web_pool', 'modified')],
+                         {'mode': ['round-robin', 'least-connections-member']})
+        self.assertIn(('ltmpool', '/Common/api_pool', 'added'), changes)
+        self.assertIn(('ltmpoolmember', '/Common/api_pool /Common/10.1.2.4:8080', 'added'), changes)
+        self.assertEqual(changes[('ltmvirtualserver', '/Common/web_vs', 'modified')], {'source': [None, '10.0.0.0/8']})
+        self.assertEqual(self.second.change_summary['ltmpool added'], 1)
+        self.assertEqual(changes[('ltmvirtualserver', '/Common/app_vs', 'modified')],
+                         {'rules': [['/Common/redirect'], ['/Common/redirect', '/Common/audit']]})
+
+    def test_stored_json_not_rewritten(self):
+        virtual = next(v for v in self.second.config_json['virtuals'] if v['name'] == '/Common/app_vs')
+        self.assertEqual(virtual['profiles'], [{'name': '/Common/http'}, {'name': '/Common/tcp'}])
+        vs = self.second.virtual_servers.get(name='/Common/app_vs')
+        self.assertEqual(vs.profiles, ['/Common/http', '/Common/tcp'])
+
+    def test_query_by_device_and_time(self):
+        url = f'/api/config-changes/?device={self.device.pk}&object_type=ltmpool'
+        self.assertEqual(len(self.client.get(url).json()), 2)
+        since = (timezone.now() + timedelta(hours=1)).isoformat()
+        self.assertEqual(self.client.get('/api/config-changes/', {'since': since}).json(), [])
+        self.assertEqual(self.client.get('/api/config-changes/?since=bad').status_code, 400)
@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from cmdb.models import Device, DeviceConfig
+
+
+class TestLatestConfigs(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.devices = []
+        for i in range(3):
+            device = Device.objects.create(
+                hostname=f'sw-{i}', address=f'10.0.0.{i + 1}', username='admin', password='admin',
+                device_type='hp_comware' if i < 2 else 'f5_ltm'
+            )
+            DeviceConfig.objects.create(device=device, config_text=f'old {i}', config_json={'v': 0}, latest=False)
+            DeviceConfig.objects.create(device=device, config_text=f'sysname sw-{i}', config_json={'v': 1})
+            self.devices.append(device)
+
+    def test_latest_by_ids(self):
+        ids = f'{self.devices[0].pk},{self.devices[2].pk}'
+        response = self.client.get(f'/api/configs/latest/?device_ids={ids}')
+        self.assertEqual(response.status_code, 200)
+        configs = response.json()['configs']
+        self.assertEqual([c['hostname'] for c in configs], ['sw-0', 'sw-2'])
+        self.assertEqual(configs[0]['config_text'], 'sysname sw-0')
+
+    def test_latest_post_with_projection(self):
+        response = self.client.post(
+            '/api/configs/latest/', {'device_type': 'hp_comware', 'fields': ['device_id', 'config_json']}, format='json'
+        )
+        configs = response.json()['configs']
+        self.assertEqual(len(configs), 2)
+        self.assertEqual(set(configs[0]), {'device_id', 'config_json'})
+        self.assertEqual(configs[0]['config_json'], {'v': 1})
+
+    def test_latest_stream(self):
+        response = self.client.get('/api/configs/latest/?stream=1&fields=hostname')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['hostname'] for line in lines], ['sw-0', 'sw-1', 'sw-2'])
+
+    def test_latest_invalid_field(self):
+        response = self.client.get('/api/configs/latest/?fields=password')
+        self.assertEqual(response.status_code, 400)
+
+
+class TestLatestFlip(TestCase):
+    def setUp(self):
+        self.device = Device.objects.create(
+            hostname='sw-0', address='10.0.0.1', username='admin', password='admin', device_type='hp_comware'
+        )
+
+    def test_new_version_demotes_previous(self):
+        first = DeviceConfig.objects.create(device=self.device, config_text='v1', config_json={'v': 1})
+        second = DeviceConfig.objects.create(device=self.device, config_text='v2', config_json={'v': 2})
+        first.refresh_from_db()
+        self.assertFalse(first.latest)
+        self.assertEqual(DeviceConfig.objects.get(device=self.device, latest=True), second)
+
+        response = self.client.get(f'/api/devices/{self.device.pk}/config/')
+        self.assertEqual(response.json()['config']['id'], second.pk)
+
+    def test_history_save_keeps_latest(self):
+        latest = DeviceConfig.objects.create(device=self.device, config_text='v2', config_json={'v': 2})
+        DeviceConfig.objects.create(device=self.device, config_text='v1', config_json={'v': 1}, latest=False)
+        self.assertEqual(DeviceConfig.objects.get(device=self.device, latest=True), latest)
+
+
+@override_settings(CMDB_PARSE_POLICY='latest')
+class TestLazyParse(TestCase):
+    def test_retrieve_parses_history_version(self):
+        device = Device.objects.create(
+            hostname='ICP-AS', address='10.0.0.1', username='admin', password='admin', device_type='h3c_switch'
+        )
+        config_text = (Path(__file__).parent / 'config.txt').read_text(encoding='utf-8')
+        old = DeviceConfig.objects.create(device=device, config_text=config_text, latest=False)
+        self.assertIsNone(old.config_json)
+
+        response = APIClient().get(f'/api/configs/{old.pk}/')
+        self.assertEqual(response.status_code, 200)
+        old.refresh_from_db()
+        self.assertTrue(old.config_json)
+        self.assertTrue(old.interfaces.exists())
@@ -0,0 +1,57 @@
+import difflib
+from django.test import TestCase
+from rest_framework.test import APIClient
+from cmdb.diff import diff_configs, diff_opcodes
+from cmdb.models import Device, DeviceConfig
+
+
+class TestDiffAlgorithm(TestCase):
+    def test_opcodes_rebuild_target(self):
+        a = ['ltm virtual /Common/vs1 {', '    pool p1', '}', 'ltm virtual /Common/vs2 {', '    pool p2', '}']
+        b = ['ltm virtual /Common/vs2 {', '    pool p2', '}', 'ltm virtual /Common/vs3 {', '    pool p1', '}']
+        rebuilt = []
+        for tag, i1, i2, j1, j2 in diff_opcodes(a, b):
+            rebuilt.extend(a[i1:i2] if tag == 'equal' else b[j1:j2])
+        self.assertEqual(rebuilt, b)
+
+    def test_unified_matches_difflib(self):
+        a = [f'line {i}' for i in range(200)]
+        b = list(a)
+        b[20], b[150] = 'changed 20', 'changed 150'
+        del b[100]
+        result = diff_configs('\n'.join(a), '\n'.join(b), context=2)
+        expected = list(difflib.unified_diff(a, b, lineterm='', n=2))[2:]
+        self.assertEqual(result['diff'].splitlines()[2:], expected)
+        self.assertEqual((result['added'], result['removed'], result['hunk_count']), (2, 3, 3))
+
+    def test_whitespace_modes(self):
+        a, b = 'interface A\n shutdown\n', 'interface A  \n  shutdown\n'
+        self.assertEqual(diff_configs(a, b, whitespace='trailing')['hunk_count'], 1)
+        self.assertEqual(diff_configs(a, b, whitespace='all')['diff'], '')
+
+
+class TestDiffView(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        device = Device.objects.create(
+            hostname='sw-1', address='10.0.0.1', username='admin', password='admin', device_type='hp_comware'
+        )
+        self.old = DeviceConfig.objects.create(
+            device=device, latest=False, config_json={'v': 0}, config_text='sysname sw-1\n vlan 10\n vlan 20\n'
+        )
+        self.new = DeviceConfig.objects.create(
+            device=device, config_json={'v': 1}, config_text='sysname sw-1\n vlan 10\n vlan 30\n'
+        )
+
+    def test_side_by_side(self):
+        response = self.client.get(f'/api/configs/{self.old.pk}/diff/{self.new.pk}/?mode=side-by-side&context=all')
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['hunks'][0]
+        self.assertEqual(rows[-1], {'tag': 'replace', 'left_no': 3, 'left': ' vlan 20', 'right_no': 3, 'right': ' vlan 30'})
+
+    def test_unified_and_errors(self):
+        body = self.client.get(f'/api/configs/{self.old.pk}/diff/{self.new.pk}/?context=0').json()
+        self.assertEqual(body['diff'].splitlines()[2:], ['@@ -3 +3 @@', '- vlan 20', '+ vlan 30'])
+        self.assertEqual(self.client.get(f'/api/configs/{self.old.pk}/diff/999999/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/configs/abc/diff/{self.new.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/configs/{self.old.pk}/diff/{self.new.pk}/?mode=x').status_code, 400)
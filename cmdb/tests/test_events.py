@@ -0,0 +1,40 @@
+import time
+from django.test import TestCase
+from cmdb.models import ChangeEvent, Device, DeviceConfig
+
+
+class TestChangeFeed(TestCase):
+    def setUp(self):
+        self.device = Device.objects.create(
+            hostname='sw-1', address='10.0.0.1', username='admin', password='admin', device_type='hp_comware'
+        )
+        for i in range(3):
+            DeviceConfig.objects.filter(device=self.device).update(latest=False)
+            DeviceConfig.objects.create(device=self.device, config_text=f'sysname sw-1\n vlan {i}', config_json={'v': i})
+
+    def test_events_appended_on_save(self):
+        events = list(ChangeEvent.objects.order_by('id'))
+        self.assertEqual([e.event_type for e in events], ['created'] * 3)
+        self.assertEqual({e.hostname for e in events}, {'sw-1'})
+        self.assertTrue(events[-1].latest)
+
+    def test_cursor_paging(self):
+        first = self.client.get('/api/changes/?limit=2').json()
+        self.assertEqual(len(first['events']), 2)
+        self.assertTrue(first['has_more'])
+        rest = self.client.get(f"/api/changes/?after={first['cursor']}").json()
+        self.assertEqual([e['config_id'] for e in rest['events']],
+                         [DeviceConfig.objects.order_by('id').last().pk])
+        self.assertFalse(rest['has_more'])
+
+    def test_long_poll_times_out_with_same_cursor(self):
+        cursor = ChangeEvent.objects.order_by('id').last().pk
+        started = time.monotonic()
+        body = self.client.get(f'/api/changes/?after={cursor}&wait=0.6').json()
+        self.assertGreaterEqual(time.monotonic() - started, 0.5)
+        self.assertEqual((body['events'], body['cursor']), ([], cursor))
+        self.assertEqual(self.client.get('/api/changes/?after=x').status_code, 400)
+
+    def test_non_finite_wait_rejected(self):
+        for wait in ('nan', 'inf', '-inf'):
+            self.assertEqual(self.client.get(f'/api/changes/?wait={wait}').status_code, 400)
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+import tempfile
+from pathlib import Path
+from django.core.management import call_command
+from django.test import TestCase
+from cmdb.models import Device, DeviceConfig, Interface
+
+
+class TestExport(TestCase):
+    def setUp(self):
+        self.device = Device.objects.create(
+            hostname='sw-01', address='10.0.0.1', username='admin', password='admin', device_type='hp_comware'
+        )
+        # config_json非空时不会触发TTP解析
+        self.config = DeviceConfig.objects.create(device=self.device, config_text='sysname sw-01', config_json={'hostname': 'sw-01'})
+        for i in range(3):
+            Interface.objects.create(config=self.config, interface=f'GE1/0/{i}', enabled=True, ip_address=f'10.1.{i}.1')
+
+    def _content(self, response):
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_export_devices_csv(self):
+        response = self.client.get('/api/export/devices/?format=csv')
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(self._content(response))))
+        self.assertEqual(rows[0], ['id', 'hostname', 'address', 'device_type', 'connect_failed_at'])
+        self.assertEqual(rows[1][1], 'sw-01')
+        self.assertNotIn('password', rows[0])
+
+    def test_export_interfaces_ndjson(self):
+        response = self.client.get('/api/export/interfaces/?format=ndjson')
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0]['device_name'], 'sw-01')
+        self.assertEqual(lines[2]['ip_address'], '10.1.2.1')
+
+    def test_export_empty_csv_has_header(self):
+        response = self.client.get('/api/export/virtuals/?format=csv')
+        self.assertTrue(self._content(response).startswith('id,config_id,device_id'))
+
+    def test_export_invalid_resource(self):
+        response = self.client.get('/api/export/unknown/?format=csv')
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_parquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest('pyarrow未安装')
+        response = self.client.get('/api/export/interfaces/?format=parquet')
+        table = pq.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.column('interface').to_pylist(), ['GE1/0/0', 'GE1/0/1', 'GE1/0/2'])
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / 'interfaces.csv'
+            call_command('export_inventory', 'interfaces', '--output', str(output), stdout=io.StringIO())
+            rows = list(csv.DictReader(output.open(encoding='utf-8')))
+        self.assertEqual([row['interface'] for row in rows], ['GE1/0/0', 'GE1/0/1', 'GE1/0/2'])
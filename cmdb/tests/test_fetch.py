@@ -0,0 +1,292 @@
+import asyncio
+import concurrent.futures
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from cmdb.management.commands.fetch_device_configs import Command
+from cmdb.models import Device, DeviceConfig
+from cmdb.services import _fetch_flight, async_fetch_config, batch_fetch_configs, fetch_configs_concurrently
+from common.lanes import BULK, INTERACTIVE, PriorityLimiter
+
+
+CONFIG_TEXT = (Path(__file__).parent / 'config.txt').read_text(encoding='utf-8')
+
+
+def fake_collector(config_text=CONFIG_TEXT):
+    async def _post_collector(client, device_info):
+        return {"success": True, "hostname": device_info['hostname'], "address": device_info['address'], "config": config_text}
+    return _post_collector
+
+
+# 不依赖测试环境的网络，SSH端口探测见 test_probe
+@override_settings(CMDB_FETCH_PROBE=False)
+class TestAsyncFetchViews(TestCase):
+    def setUp(self):
+        _fetch_flight.forget()
+        self.device = Device.objects.create(
+            hostname='ICP-AS', address='10.0.0.1', username='admin', password='admin', device_type='h3c_switch'
+        )
+
+    def test_fetch_config_saves_and_parses(self):
+        with mock.patch('cmdb.services._post_collector', fake_collector()):
+            response = self.client.post(f'/api/devices/{self.device.pk}/fetch-config/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+        self.assertTrue(response.json()['saved'])
+        config = DeviceConfig.objects.get(device=self.device)
+        self.assertTrue(config.config_json)
+        self.assertTrue(config.interfaces.exists())
+
+    def test_fetch_config_unknown_device(self):
+        response = self.client.post('/api/devices/999/fetch-config/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch_fetch_config(self):
+        with mock.patch('cmdb.services._post_collector', fake_collector()):
+            response = self.client.post(
+                '/api/devices/batch-fetch-config/', {'device_ids': [self.device.pk]}, content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['success_count'], 1)
+
+    def test_batch_fetch_config_invalid_ids(self):
+        for body in ({'device_ids': ['x']}, {'device_ids': 5}):
+            response = self.client.post('/api/devices/batch-fetch-config/', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CMDB_FETCH_PROBE=False)
+class TestFetchDeviceConfigsCommand(TransactionTestCase):
+    def setUp(self):
+        _fetch_flight.forget()
+        for i in range(3):
+            Device.objects.create(
+                hostname=f'core-{i}', address=f'10.0.0.{i + 1}', username='admin', password='admin', device_type='h3c_switch'
+            )
+        Device.objects.create(hostname='edge-0', address='10.0.1.1', username='admin', password='admin', device_type='f5_ltm')
+
+    def test_hostname_filter_and_summary(self):
+        out = io.StringIO()
+        with mock.patch('cmdb.services._post_collector', fake_collector()):
+            call_command('fetch_device_configs', '--hostname', 'core-*', '--concurrency', '2', stdout=out)
+
+        self.assertEqual(DeviceConfig.objects.count(), 3)
+        self.assertIn('h3c_switch', out.getvalue())
+        self.assertIn('[3/3 100%', out.getvalue())
+
+    def test_checkpoint_resume(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            checkpoint = Path(tmpdir) / 'fetch.json'
+            done_id = Device.objects.get(hostname='core-0').id
+            checkpoint.write_text(json.dumps({'done': [done_id]}), encoding='utf-8')
+
+            with mock.patch('cmdb.services._post_collector', fake_collector()):
+                call_command('fetch_device_configs', '--device-type', 'h3c_switch', '--checkpoint', str(checkpoint),
+                             stdout=io.StringIO())
+
+            self.assertFalse(checkpoint.exists())
+        self.assertFalse(DeviceConfig.objects.filter(device_id=done_id).exists())
+        self.assertEqual(DeviceConfig.objects.count(), 2)
+
+    def test_checkpoint_written_in_batches(self):
+        async def _post_collector(client, device_info):
+            if device_info['hostname'] == 'core-2':
+                return {"success": False, "message": "timed out"}
+            return await fake_collector()(client, device_info)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            checkpoint = Path(tmpdir) / 'fetch.json'
+            with mock.patch('cmdb.services._post_collector', _post_collector), \
+                    mock.patch.object(Command, '_save_checkpoint', wraps=Command._save_checkpoint) as save:
+                call_command('fetch_device_configs', '--device-type', 'h3c_switch', '--checkpoint', str(checkpoint),
+                             stdout=io.StringIO())
+
+            # 未达到写入间隔，只在结束时写入一次
+            self.assertEqual(save.call_count, 1)
+            done = json.loads(checkpoint.read_text(encoding='utf-8'))['done']
+        expected = Device.objects.filter(hostname__in=['core-0', 'core-1']).values_list('id', flat=True)
+        self.assertEqual(sorted(done), sorted(expected))
+
+
+class TestVolatileNormalization(TestCase):
+    def setUp(self):
+        _fetch_flight.forget()
+        self.device = Device.objects.create(
+            hostname='f5-01', address='10.0.0.9', username='admin', password='admin', device_type='f5_ltm'
+        )
+
+    def _fetch(self, config_text):
+        # 每次都真正采集，验证的是去重而不是结果缓存
+        _fetch_flight.forget()
+        with mock.patch('cmdb.services._post_collector', fake_collector(config_text)):
+            return self.client.post(f'/api/devices/{self.device.pk}/fetch-config/').json()
+
+    def test_volatile_lines_do_not_create_versions(self):
+        first = (
+            '#TMSH-VERSION: 15.1.0\nltm virtual /Common/vs1 {\n    destination /Common/10.1.1.1:443\n'
+            '    last-modified-time 2024-01-01:10:00:00\n}\n'
+        )
+        second = first.replace('2024-01-01:10:00:00', '2024-03-01:08:00:00').replace('\n', '  \r\n')
+        self.assertTrue(self._fetch(first)['saved'])
+        self.assertFalse(self._fetch(second)['saved'])
+        self.assertEqual(DeviceConfig.objects.filter(device=self.device).count(), 1)
+
+    def test_uptime_only_dropped_in_comments(self):
+        first = (
+            '# Uptime: 12 days\nltm monitor http /Common/uptime_check {\n    description "uptime probe A"\n}\n'
+        )
+        self.assertTrue(self._fetch(first)['saved'])
+        self.assertFalse(self._fetch(first.replace('12 days', '13 days'))['saved'])
+        # 配置对象中出现uptime的行属于真实配置，变化要产生新版本
+        self.assertTrue(self._fetch(first.replace('probe A', 'probe B'))['saved'])
+        self.assertEqual(DeviceConfig.objects.filter(device=self.device).count(), 2)
+
+
+class TestFetchCoalescing(TestCase):
+    def setUp(self):
+        _fetch_flight.forget()
+        self.device = Device.objects.create(
+            hostname='ICP-AS', address='10.0.0.1', username='admin', password='admin', device_type='h3c_switch'
+        )
+        self.calls = 0
+
+    async def _slow_collector(self, client, device_info):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"success": True, "config": CONFIG_TEXT}
+
+    def test_concurrent_fetches_share_one_session(self):
+        async def run():
+            return await asyncio.gather(*[async_fetch_config(self.device) for _ in range(5)])
+
+        with mock.patch('cmdb.services._post_collector', self._slow_collector):
+            results = async_to_sync(run)()
+            self.assertEqual(self.calls, 1)
+            self.assertEqual({r['config']['id'] for r in results}, {results[0]['config']['id']})
+            self.assertEqual(DeviceConfig.objects.filter(device=self.device).count(), 1)
+
+            # 紧接着的重复请求直接返回上次结果
+            repeat = async_to_sync(async_fetch_config)(self.device)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(repeat['cached'])
+        self.assertFalse(repeat['saved'])
+
+
+@override_settings(CMDB_FETCH_PROBE=False)
+class TestPriorityLanes(TestCase):
+    def setUp(self):
+        _fetch_flight.forget()
+        self.devices = [
+            Device.objects.create(
+                hostname=f'core-{i}', address=f'10.0.0.{i + 1}', username='admin', password='admin', device_type='h3c_switch'
+            )
+            for i in range(4)
+        ]
+        self.limiter = PriorityLimiter(capacity=3, reserved=1)
+        self.priorities = {}
+
+    def _collector(self, release):
+        async def _post_collector(client, device_info):
+            self.priorities[device_info['hostname']] = device_info['priority']
+            if device_info['priority'] == BULK:
+                await asyncio.wrap_future(release)
+            return {"success": True, "config": CONFIG_TEXT}
+        return _post_collector
+
+    def test_interactive_fetch_not_blocked_by_bulk(self):
+        release = concurrent.futures.Future()
+
+        async def run():
+            batch = asyncio.ensure_future(batch_fetch_configs(self.devices[:3]))
+            await asyncio.sleep(0.05)
+            bulk_metrics = self.limiter.metrics()['lanes'][BULK]
+            # 批量任务最多占用未预留的2个槽位，第3台设备排队
+            self.assertEqual((bulk_metrics['running'], bulk_metrics['waiting']), (2, 1))
+
+            result = await asyncio.wait_for(async_fetch_config(self.devices[3]), 1)
+            release.set_result(None)
+            return result, await batch
+
+        with mock.patch('cmdb.services.fetch_limiter', self.limiter), \
+                mock.patch('cmdb.services._post_collector', self._collector(release)):
+            result, batch = async_to_sync(run)()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(batch['success_count'], 3)
+        self.assertEqual(self.priorities['core-3'], INTERACTIVE)
+        self.assertEqual(self.priorities['core-0'], BULK)
+        lanes = self.limiter.metrics()['lanes']
+        self.assertEqual(lanes[BULK]['acquired'], 3)
+        self.assertEqual(lanes[BULK]['queued'], 1)
+        self.assertGreater(lanes[BULK]['wait_max'], 0)
+        self.assertEqual(lanes[INTERACTIVE]['wait_max'], 0)
+
+    def test_interactive_fetch_promotes_queued_bulk(self):
+        limiter = PriorityLimiter(capacity=2, reserved=1)
+
+        async def run():
+            hold = await limiter.acquire(BULK)
+            queued = asyncio.ensure_future(limiter.acquire(BULK, key='core-1'))
+            await asyncio.sleep(0)
+            self.assertFalse(queued.done())
+            self.assertEqual(limiter.promote('core-1'), 1)
+            lane = await asyncio.wait_for(queued, 1)
+            limiter.release(lane)
+            limiter.release(hold)
+            return lane
+
+        self.assertEqual(async_to_sync(run)(), INTERACTIVE)
+        metrics = limiter.metrics()['lanes']
+        self.assertEqual(metrics[BULK]['promoted'], 1)
+        self.assertEqual(metrics[INTERACTIVE]['running'] + metrics[BULK]['running'], 0)
+
+    def test_cancelled_waiter_frees_queue(self):
+        limiter = PriorityLimiter(capacity=1, reserved=0)
+
+        async def run():
+            hold = await limiter.acquire(BULK)
+            waiter = asyncio.ensure_future(limiter.acquire(BULK))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            limiter.release(hold)
+            # 取消的等待者没有占用槽位
+            return await asyncio.wait_for(limiter.acquire(BULK), 1)
+
+        self.assertEqual(async_to_sync(run)(), BULK)
+        self.assertEqual(limiter.metrics()['lanes'][BULK]['waiting'], 0)
+
+    def test_concurrency_above_bulk_lane_grows_it(self):
+        running = peak = 0
+
+        async def _post_collector(client, device_info):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            return {"success": True, "config": CONFIG_TEXT}
+
+        with mock.patch('cmdb.services.fetch_limiter', self.limiter), \
+                mock.patch('cmdb.services._post_collector', _post_collector):
+            results = async_to_sync(fetch_configs_concurrently)(self.devices, concurrency=4)
+
+        self.assertTrue(all(result['success'] for result in results))
+        # 批量通道原为2个槽位，按并发数扩大后交互预留不变
+        self.assertEqual(peak, 4)
+        self.assertEqual((self.limiter.bulk_capacity, self.limiter.reserved), (4, 1))
+
+    def test_metrics_view(self):
+        response = self.client.get('/api/fetch/metrics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['lanes']), {INTERACTIVE, BULK})
+        self.assertIn('coalescing', response.json())
@@ -0,0 +1,83 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from cmdb.models import Device, DeviceConfig, GtmLtmLink, GtmPoolMember
+from cmdb.services import reparse_configs
+from cmdb.tests.test_ltm_graph import f5_config
+
+GTM_CONFIG = """gtm server /Common/dc1_ltm {
+    datacenter /Common/DC1
+    product bigip
+    virtual-servers {
+        /Common/web_vs {
+            destination 10.30.0.10:443
+        }
+        /Common/old_vs {
+            destination 10.30.0.99:https
+        }
+    }
+}
+gtm pool a /Common/web_gpool {
+    load-balancing-mode round-robin
+    members {
+        /Common/dc1_ltm:/Common/web_vs {
+            member-order 0
+        }
+        /Common/dc1_ltm:/Common/old_vs {
+            member-order 1
+        }
+    }
+    monitor /Common/https
+}
+gtm wideip a /Common/www.example.com {
+    pool-lb-mode round-robin
+    pools {
+        /Common/web_gpool {
+            order 0
+        }
+    }
+}
+"""
+
+
+class TestGslbConsistency(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.ltm = Device.objects.create(
+            hostname='lb-1', address='10.0.0.1', username='admin', password='admin', device_type='f5_ltm'
+        )
+        DeviceConfig.objects.create(device=self.ltm, config_text=f5_config('web', '10.1.2.3'))
+        self.gtm = Device.objects.create(
+            hostname='gtm-1', address='10.0.0.9', username='admin', password='admin', device_type='f5_gtm'
+        )
+        DeviceConfig.objects.create(device=self.gtm, config_text=GTM_CONFIG)
+
+    def test_members_resolved_and_linked(self):
+        endpoints = sorted(GtmPoolMember.objects.values_list('endpoint', flat=True))
+        self.assertEqual(endpoints, ['10.30.0.10:443', '10.30.0.99:443'])
+        link = GtmLtmLink.objects.get()
+        self.assertEqual((link.gtm_member.vs_name, link.ltm_vs.name), ('/Common/web_vs', '/Common/web_vs'))
+
+    def test_report(self):
+        report = self.client.get('/api/gslb/consistency/').json()
+        self.assertEqual([m['vs_name'] for m in report['dangling_members']], ['/Common/old_vs'])
+        self.assertEqual(report['unreferenced_count'], 0)
+        chain = report['chains'][0]
+        self.assertEqual(chain['wideip'], 'www.example.com')
+        virtual = chain['pools'][0]['members'][0]['virtuals'][0]
+        self.assertEqual((virtual['device'], virtual['backends'][0]['address']), ('lb-1', '10.1.2.3'))
+
+    def test_incremental_refresh_on_new_ltm_config(self):
+        DeviceConfig.objects.filter(device=self.ltm).update(latest=False)
+        moved = f5_config('web', '10.1.2.3').replace('10.30.0.10:443', '10.30.0.99:443')
+        DeviceConfig.objects.create(device=self.ltm, config_text=moved)
+        link = GtmLtmLink.objects.get()
+        self.assertEqual(link.endpoint, '10.30.0.99:443')
+        self.assertTrue(link.ltm_vs.config.latest)
+        report = self.client.get('/api/gslb/consistency/').json()
+        self.assertEqual([m['vs_name'] for m in report['dangling_members']], ['/Common/web_vs'])
+
+    def test_reparse_preserves_links(self):
+        stats = reparse_configs(DeviceConfig.objects.all(), workers=0)
+        self.assertEqual(stats['processed'], 2)
+        link = GtmLtmLink.objects.get()
+        self.assertEqual((link.gtm_member.vs_name, link.ltm_vs.name), ('/Common/web_vs', '/Common/web_vs'))
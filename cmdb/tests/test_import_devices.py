@@ -0,0 +1,45 @@
+import io
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+from cmdb.models import Device
+from cmdb.services import import_devices_from_csv
+
+
+CSV_CONTENT = (
+    "sw-01,10.0.0.1.xsh,hp_comware,admin,pass1\n"
+    "sw-02,10.0.0.2,hp_comware,admin,pass2\n"
+    "bad-row,10.0.0.3\n"
+    "sw-03,not-an-ip,hp_comware,admin,pass3\n"
+)
+
+
+class TestImportDevices(TestCase):
+    def test_import_creates_and_updates(self):
+        Device.objects.create(hostname='sw-02', address='10.9.9.9', username='old', password='old', device_type='hp_comware')
+
+        report = import_devices_from_csv(io.StringIO(CSV_CONTENT), chunk_size=2)
+
+        self.assertEqual(report['created_count'], 1)
+        self.assertEqual(report['updated_count'], 1)
+        self.assertEqual(report['skipped_count'], 2)
+        self.assertEqual([error['line'] for error in report['errors']], [3, 4])
+        self.assertEqual(Device.objects.get(hostname='sw-01').address, '10.0.0.1')
+        self.assertEqual(Device.objects.get(hostname='sw-02').address, '10.0.0.2')
+
+    def test_dry_run_does_not_write(self):
+        report = import_devices_from_csv(io.StringIO(CSV_CONTENT + CSV_CONTENT), dry_run=True, chunk_size=3)
+
+        self.assertEqual(report['created_count'], 2)
+        self.assertEqual(report['updated_count'], 2)
+        self.assertFalse(Device.objects.exists())
+
+    def test_import_endpoint(self):
+        client = APIClient()
+        upload = SimpleUploadedFile('devices.csv', CSV_CONTENT.encode('utf-8'), content_type='text/csv')
+        response = client.post('/api/devices/import/', {'file': upload, 'dry_run': 'true'}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['dry_run'])
+        self.assertEqual(response.json()['created_count'], 2)
+        self.assertFalse(Device.objects.exists())
@@ -0,0 +1,115 @@
+import io
+import os
+import tarfile
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from cmdb.models import ChangeEvent, ConfigChange, Device, DeviceConfig
+
+
+CONFIG_TEXT = (Path(__file__).parent / 'config.txt').read_text(encoding='utf-8')
+
+
+class TestIngestConfigBackups(TransactionTestCase):
+    def setUp(self):
+        self.switch = Device.objects.create(
+            hostname='ICP-AS', address='10.0.0.1', username='admin', password='admin', device_type='h3c_switch'
+        )
+        self.other = Device.objects.create(
+            hostname='core-sw01', address='10.0.0.2', username='admin', password='admin', device_type='unknown'
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, text, timestamp):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+        os.utime(path, (timestamp, timestamp))
+        return path
+
+    @override_settings(CMDB_PARSE_POLICY='all')
+    def test_ingest_directory(self):
+        old = datetime(2023, 1, 1, tzinfo=timezone.utc).timestamp()
+        new = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+        self._write('ICP-AS_20230101.log', CONFIG_TEXT, old)
+        self._write('10.0.0.1.xsh.txt', CONFIG_TEXT + '\n#', new)
+        self._write('dup/ICP-AS.cfg', CONFIG_TEXT, new)
+        self._write('core-sw01/2023.cfg', 'hostname core-sw01', old)
+        self._write('unknown-host.log', 'nothing', old)
+
+        out = io.StringIO()
+        call_command('ingest_config_backups', str(self.root), '--workers', '1', stdout=out)
+
+        configs = list(DeviceConfig.objects.filter(device=self.switch).order_by('time'))
+        self.assertEqual(len(configs), 2)
+        self.assertEqual(configs[0].time, datetime(2023, 1, 1, tzinfo=timezone.utc))
+        self.assertTrue(configs[0].interfaces.exists())
+        self.assertEqual([c.latest for c in configs], [False, True])
+        # 模板不存在的设备类型仍保存原始文本
+        self.assertIsNone(DeviceConfig.objects.get(device=self.other).config_json)
+        self.assertIn('未匹配: 1', out.getvalue())
+
+        # 重复导入不会产生新记录
+        call_command('ingest_config_backups', str(self.root), '--workers', '1', stdout=io.StringIO())
+        self.assertEqual(DeviceConfig.objects.count(), 3)
+
+    @override_settings(CMDB_PARSE_POLICY='all')
+    def test_ingest_records_changes_and_events(self):
+        current = DeviceConfig.objects.create(
+            device=self.switch, config_text=CONFIG_TEXT.replace('10.66.36.1 255.255.255.0', '10.66.36.3 255.255.255.0'),
+            time=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+        changed = CONFIG_TEXT.replace('10.66.36.1 255.255.255.0', '10.66.36.2 255.255.255.0')
+        self._write('ICP-AS_2023.log', CONFIG_TEXT, datetime(2023, 1, 1, tzinfo=timezone.utc).timestamp())
+        self._write('ICP-AS_2024.log', changed, datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+
+        call_command('ingest_config_backups', str(self.root), '--workers', '1', stdout=io.StringIO())
+
+        old, new = DeviceConfig.objects.filter(device=self.switch, latest=False).order_by('time')
+        change = ConfigChange.objects.get(config=new)
+        self.assertEqual((change.previous_id, change.object_name, change.action), (old.pk, 'Vlan-interface10', 'modified'))
+        # 插入位置之后的原有版本改为与导入的版本比较
+        change = ConfigChange.objects.get(config=current)
+        self.assertEqual((change.previous_id, change.action), (new.pk, 'modified'))
+        self.assertFalse(ConfigChange.objects.filter(config=old).exists())
+
+        events = {event.config_id: event for event in ChangeEvent.objects.filter(event_type='created')}
+        self.assertEqual(set(events), {current.pk, old.pk, new.pk})
+        self.assertEqual(events[new.pk].summary, {'interface modified': 1})
+
+    def test_ingest_tarball(self):
+        self._write('ICP-AS.cfg', CONFIG_TEXT, datetime(2022, 5, 1, tzinfo=timezone.utc).timestamp())
+        archive = self.root / 'backups.tar.gz'
+        with tarfile.open(archive, 'w:gz') as tar:
+            tar.add(self.root / 'ICP-AS.cfg', arcname='backups/ICP-AS.cfg')
+
+        call_command('ingest_config_backups', str(archive), '--workers', '1', stdout=io.StringIO())
+
+        config = DeviceConfig.objects.get(device=self.switch)
+        self.assertEqual(config.time, datetime(2022, 5, 1, tzinfo=timezone.utc))
+
+    @override_settings(CMDB_PARSE_POLICY='latest')
+    def test_ingest_parses_lazily(self):
+        self._write('ICP-AS_2023.log', CONFIG_TEXT, datetime(2023, 1, 1, tzinfo=timezone.utc).timestamp())
+        self._write('ICP-AS_2024.log', CONFIG_TEXT + '\n#', datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+
+        call_command('ingest_config_backups', str(self.root), '--workers', '1', stdout=io.StringIO())
+
+        old, new = DeviceConfig.objects.filter(device=self.switch).order_by('time')
+        self.assertIsNone(old.config_json)
+        self.assertFalse(old.interfaces.exists())
+        # 成为最新版本的配置立即解析
+        self.assertTrue(new.config_json)
+
+        response = self.client.get(f'/api/configs/{old.pk}/parsed/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['config_json'])
+        old.refresh_from_db()
+        self.assertTrue(old.interfaces.exists())
+        self.assertTrue(old.template_version)
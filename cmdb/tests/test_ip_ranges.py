@@ -0,0 +1,84 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from cmdb.models import Device, DeviceConfig, Interface, LtmPoolMember
+from cmdb.utils import ip_interval, ip_network_of
+
+F5_CONFIG = """ltm pool /Common/web_pool {
+    load-balancing-mode least-connections-member
+    members {
+        /Common/10.20.1.11:80 {
+            address 10.20.1.11
+        }
+        /Common/10.20.1.12:80 {
+            address 10.20.1.12%1
+        }
+    }
+    monitor /Common/http
+}
+ltm virtual /Common/web_vs {
+    destination /Common/10.30.0.10:443
+    ip-protocol tcp
+    mask 255.255.255.255
+    pool /Common/web_pool
+}
+"""
+
+
+class TestIpInterval(TestCase):
+    def test_ipv4_sorts_with_ipv6(self):
+        v4 = ip_interval(ip_network_of('10.0.0.1', '255.255.255.0'))
+        self.assertEqual(v4[2], 24)
+        self.assertEqual(v4[0], '00000000000000000000ffff0a000000')
+        self.assertEqual(v4[1], '00000000000000000000ffff0a0000ff')
+        v6 = ip_interval(ip_network_of('2001:db8::/32'))
+        self.assertLess(v4[1], v6[0])
+        self.assertEqual(ip_interval(ip_network_of('0.0.0.0', 'any'))[2], 0)
+        self.assertEqual(ip_interval(ip_network_of('not-an-ip')), (None, None, None))
+
+
+class TestIpRangeFilters(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        switch = Device.objects.create(
+            hostname='sw-1', address='10.0.0.1', username='admin', password='admin', device_type='hp_comware'
+        )
+        config = DeviceConfig.objects.create(device=switch, config_text='sysname sw-1', config_json={
+            'interfaces': [
+                {'interface': 'Vlan-interface10', 'enabled': True, 'ip_address': '10.20.1.1', 'subnet_mask': '255.255.255.0'},
+                {'interface': 'Vlan-interface20', 'enabled': True, 'ip_address': '10.20.0.1', 'subnet_mask': '255.255.0.0'},
+                {'interface': 'Vlan-interface30', 'enabled': True, 'ip_address': '192.168.1.1', 'subnet_mask': '255.255.255.252'},
+            ]
+        })
+        config._extract()
+        f5 = Device.objects.create(
+            hostname='lb-1', address='10.0.0.2', username='admin', password='admin', device_type='f5_ltm'
+        )
+        DeviceConfig.objects.create(device=f5, config_text=F5_CONFIG)
+
+    def test_pool_members_extracted(self):
+        members = LtmPoolMember.objects.order_by('name')
+        self.assertEqual([m.pool.name for m in members], ['/Common/web_pool'] * 2)
+        self.assertEqual(members[1].ip_start, ip_interval(ip_network_of('10.20.1.12'))[0])
+
+    def test_within_and_overlaps(self):
+        names = lambda url: sorted(item['interface'] for item in self.client.get(url).json())
+        self.assertEqual(names('/api/interfaces/?ip_within=10.20.0.0/16'), ['Vlan-interface10', 'Vlan-interface20'])
+        self.assertEqual(names('/api/interfaces/?ip_within=10.20.1.0/24'), ['Vlan-interface10'])
+        self.assertEqual(names('/api/interfaces/?ip_overlaps=10.20.1.128/25'), ['Vlan-interface10', 'Vlan-interface20'])
+
+    def test_contains_and_lpm(self):
+        names = lambda url: sorted(item['interface'] for item in self.client.get(url).json())
+        self.assertEqual(names('/api/interfaces/?ip_contains=10.20.1.5'), ['Vlan-interface10', 'Vlan-interface20'])
+        self.assertEqual(names('/api/interfaces/?ip_lpm=10.20.1.5'), ['Vlan-interface10'])
+        self.assertEqual(names('/api/interfaces/?ip_lpm=10.20.9.5'), ['Vlan-interface20'])
+
+    def test_virtuals_and_members(self):
+        virtuals = self.client.get('/api/virtuals/?ip_contains=10.30.0.10').json()
+        self.assertEqual([v['name'] for v in virtuals], ['/Common/web_vs'])
+        members = self.client.get('/api/pool-members/?ip_within=10.20.1.0/24').json()
+        self.assertEqual(sorted(m['address'] for m in members), ['10.20.1.11', '10.20.1.12%1'])
+
+    def test_invalid_range(self):
+        response = self.client.get('/api/interfaces/?ip_within=10.20.0.0/40')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ip_within', response.json())
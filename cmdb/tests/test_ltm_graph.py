@@ -0,0 +1,62 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from cmdb.models import Device, DeviceConfig, LtmPoolMember, LtmVirtualServer
+
+
+def f5_config(app, backend):
+    return f"""ltm node /Common/{backend} {{
+    address {backend}
+}}
+ltm pool /Common/{app}_pool {{
+    load-balancing-mode round-robin
+    members {{
+        /Common/{backend}:8080 {{
+            address {backend}
+        }}
+    }}
+    monitor /Common/http
+}}
+ltm virtual /Common/{app}_vs {{
+    destination /Common/10.30.0.10:443
+    ip-protocol tcp
+    mask 255.255.255.255
+    pool /Common/{app}_pool
+}}
+"""
+
+
+class TestLtmGraph(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for i, (app, backend) in enumerate([('web', '10.1.2.3'), ('api', '10.1.2.3'), ('db', '10.9.9.9')]):
+            device = Device.objects.create(
+                hostname=f'lb-{i}', address=f'10.0.0.{i + 1}', username='admin', password='admin', device_type='f5_ltm'
+            )
+            DeviceConfig.objects.create(device=device, config_text=f5_config(app, backend))
+
+    def test_references_resolved(self):
+        vs = LtmVirtualServer.objects.get(name='/Common/web_vs')
+        self.assertEqual(vs.pool_ref.name, '/Common/web_pool')
+        member = LtmPoolMember.objects.get(pool=vs.pool_ref)
+        self.assertEqual((member.port, member.node.address), ('8080', '10.1.2.3'))
+
+    def test_forward_graph(self):
+        vs = LtmVirtualServer.objects.get(name='/Common/api_vs')
+        graph = self.client.get(f'/api/virtuals/{vs.pk}/graph/').json()
+        self.assertEqual(graph['device_name'], 'lb-1')
+        self.assertEqual(graph['pool']['members'][0]['node']['name'], '/Common/10.1.2.3')
+        self.assertEqual(self.client.get('/api/virtuals/999999/graph/').status_code, 404)
+
+    def test_reverse_lookup(self):
+        response = self.client.get('/api/virtuals/by-backend/?address=10.1.2.3').json()
+        self.assertEqual([(v['device_name'], v['name']) for v in response['virtuals']],
+                         [('lb-0', '/Common/web_vs'), ('lb-1', '/Common/api_vs')])
+        self.assertEqual(self.client.get('/api/virtuals/by-backend/?address=10.0.0.0/8').json()['count'], 3)
+        self.assertEqual(self.client.get('/api/virtuals/by-backend/?address=bad').status_code, 400)
+
+    def test_cache_invalidated_by_new_config(self):
+        self.assertEqual(self.client.get('/api/virtuals/by-backend/?address=10.9.9.9').json()['count'], 1)
+        device = Device.objects.get(hostname='lb-2')
+        DeviceConfig.objects.filter(device=device).update(latest=False)
+        DeviceConfig.objects.create(device=device, config_text=f5_config('db', '10.8.8.8'))
+        self.assertEqual(self.client.get('/api/virtuals/by-backend/?address=10.9.9.9').json()['count'], 0)
@@ -0,0 +1,119 @@
+import io
+import socket
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from cmdb.models import Device
+from cmdb.probe import cached_probe, forget_probes, probe
+from cmdb.services import _fetch_flight, batch_fetch_configs
+from cmdb.tests.test_fetch import fake_collector
+
+
+def closed_port():
+    """返回一个当前没有监听的本地端口"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def fake_probes(unreachable):
+    async def probe_many(addresses, *args, **kwargs):
+        return {
+            address: {
+                "reachable": address not in unreachable,
+                "latency_ms": None if address in unreachable else 1.0,
+                "error": "22端口连接超时" if address in unreachable else None,
+            }
+            for address in addresses
+        }
+    return probe_many
+
+
+class TestProbe(TestCase):
+    def setUp(self):
+        forget_probes()
+        # 只监听不accept，连接在内核的backlog中完成
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+
+    def tearDown(self):
+        self.listener.close()
+
+    def test_reachable_and_cached(self):
+        result = async_to_sync(probe)('127.0.0.1', self.port)
+        self.assertTrue(result['reachable'])
+        self.assertIsNotNone(result['latency_ms'])
+        self.assertEqual(cached_probe('127.0.0.1', self.port), result)
+
+    def test_closed_port_is_unreachable(self):
+        result = async_to_sync(probe)('127.0.0.1', closed_port(), timeout=1)
+        self.assertFalse(result['reachable'])
+        self.assertIsNone(result['latency_ms'])
+        self.assertIn('连接失败', result['error'])
+
+    def test_reachability_view(self):
+        device = Device.objects.create(
+            hostname='sw-1', address='127.0.0.1', username='admin', password='admin', device_type='h3c_switch'
+        )
+        with mock.patch('cmdb.probe.PROBE_PORT', self.port):
+            response = self.client.get(f'/api/devices/{device.pk}/reachability/')
+            self.assertTrue(response.json()['reachable'])
+
+            # 默认返回缓存，refresh=1 时重新探测
+            self.listener.close()
+            self.assertTrue(self.client.get(f'/api/devices/{device.pk}/reachability/').json()['reachable'])
+            refreshed = self.client.get(f'/api/devices/{device.pk}/reachability/?refresh=1').json()
+        self.assertFalse(refreshed['reachable'])
+
+
+@override_settings(CMDB_FETCH_PROBE=True)
+class TestProbeBeforeFetch(TestCase):
+    def setUp(self):
+        _fetch_flight.forget()
+        self.up = Device.objects.create(
+            hostname='sw-up', address='10.0.0.1', username='admin', password='admin', device_type='h3c_switch'
+        )
+        self.down = Device.objects.create(
+            hostname='sw-down', address='10.0.0.2', username='admin', password='admin', device_type='h3c_switch'
+        )
+
+    def test_unreachable_devices_skip_collector(self):
+        collector = mock.AsyncMock(side_effect=fake_collector())
+        with mock.patch('cmdb.services.probe_many', fake_probes({'10.0.0.2'})), \
+                mock.patch('cmdb.services._post_collector', collector):
+            result = async_to_sync(batch_fetch_configs)([self.up, self.down])
+
+        self.assertEqual([call.args[1]['hostname'] for call in collector.await_args_list], ['sw-up'])
+        self.assertEqual((result['success_count'], result['failed_count']), (1, 1))
+        self.assertTrue(result['results'][1]['unreachable'])
+        self.assertIn('连接超时', result['results'][1]['message'])
+        self.down.refresh_from_db()
+        self.assertEqual(self.down.connect_failures, 1)
+
+
+@override_settings(CMDB_FETCH_PROBE=True)
+class TestProbeCommand(TransactionTestCase):
+    def setUp(self):
+        _fetch_flight.forget()
+        Device.objects.create(
+            hostname='sw-up', address='10.0.0.1', username='admin', password='admin', device_type='h3c_switch'
+        )
+        Device.objects.create(
+            hostname='sw-down', address='10.0.0.2', username='admin', password='admin', device_type='h3c_switch'
+        )
+
+    def test_command_reports_unreachable(self):
+        out = io.StringIO()
+        with mock.patch('cmdb.services.probe_many', fake_probes({'10.0.0.2'})), \
+                mock.patch('cmdb.services._post_collector', fake_collector()):
+            call_command('fetch_device_configs', stdout=out)
+
+        self.assertIn('DOWN sw-down', out.getvalue())
+        self.assertIn('探测不可达 1 个设备', out.getvalue())
+        # 不可达设备单独计数，不计入采集耗时
+        row = next(line for line in out.getvalue().splitlines() if line.startswith('h3c_switch'))
+        self.assertEqual(row.split()[1:4], ['1', '0', '1'])
+        self.assertEqual(Device.objects.get(hostname='sw-down').connect_failures, 1)
@@ -0,0 +1,42 @@
+import io
+from pathlib import Path
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from cmdb.models import Device, DeviceConfig
+from cmdb.utils import config_parser
+
+
+CONFIG_TEXT = (Path(__file__).parent / 'config.txt').read_text(encoding='utf-8')
+
+
+class TestReparseConfigs(TestCase):
+    def setUp(self):
+        device = Device.objects.create(
+            hostname='ICP-AS', address='10.0.0.1', username='admin', password='admin', device_type='h3c_switch'
+        )
+        self.config = DeviceConfig.objects.create(device=device, config_text=CONFIG_TEXT)
+        self.interface_count = self.config.interfaces.count()
+        DeviceConfig.objects.filter(pk=self.config.pk).update(template_version='outdated')
+
+    def test_reparse_command(self):
+        self.assertTrue(self.interface_count)
+        call_command('reparse_configs', '--workers', '2', '--latest-only', stdout=io.StringIO())
+
+        self.config.refresh_from_db()
+        self.assertEqual(self.config.template_version, config_parser.get_template_version('h3c_switch'))
+        self.assertEqual(self.config.interfaces.count(), self.interface_count)
+
+    def test_reparse_date_filter(self):
+        call_command('reparse_configs', '--workers', '0', '--until', '2000-01-01', stdout=io.StringIO())
+        self.config.refresh_from_db()
+        self.assertEqual(self.config.template_version, 'outdated')
+
+    def test_reparse_api(self):
+        client = APIClient()
+        response = client.get('/api/configs/reparse/')
+        self.assertEqual(response.json()['stale'], {'h3c_switch': 1})
+
+        response = client.post('/api/configs/reparse/', {'device_type': 'h3c_switch'}, format='json')
+        self.assertEqual(response.json()['processed'], 1)
+        self.assertEqual(response.json()['remaining'], 0)
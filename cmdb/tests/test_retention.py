@@ -0,0 +1,81 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from cmdb.models import ConfigChange, Device, DeviceConfig, LtmPool, LtmPoolMember, LtmVirtualServer
+from cmdb.retention import delete_configs, retention_policy, select_expired_configs
+from cmdb.tests.test_ltm_graph import f5_config
+
+POLICY = {'keep_all_days': 7, 'daily_days': 30, 'weekly_days': None}
+
+
+class TestRetention(TestCase):
+    def setUp(self):
+        self.device = Device.objects.create(
+            hostname='lb-1', address='10.0.0.1', username='admin', password='admin', device_type='f5_ltm'
+        )
+        self.now = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def _config(self, days, hours=0, text=None):
+        config = DeviceConfig.objects.create(
+            device=self.device, config_text=text or f'hostname lb-1\n# {days} {hours}',
+            time=self.now - timedelta(days=days, hours=hours),
+        )
+        DeviceConfig.objects.filter(pk=config.pk).update(latest=False)
+        return config
+
+    def test_policy_tiers(self):
+        recent = [self._config(1), self._config(1, hours=1)]
+        daily_kept, daily_dropped = self._config(10), self._config(10, hours=2)
+        weekly = [self._config(days) for days in (60, 61, 62, 63, 64, 65, 66)]
+        latest = self._config(90)
+        DeviceConfig.objects.filter(pk=latest.pk).update(latest=True)
+
+        expired = set(select_expired_configs(POLICY, now=self.now))
+        self.assertFalse(expired & {c.pk for c in recent})
+        self.assertNotIn(daily_kept.pk, expired)
+        self.assertIn(daily_dropped.pk, expired)
+        self.assertNotIn(latest.pk, expired)
+        # 同一周内只保留最新一份
+        self.assertEqual(len({c.pk for c in weekly} - expired), len({
+            timezone.localtime(c.time).date().isocalendar()[:2] for c in weekly
+        }))
+
+        expired = set(select_expired_configs({**POLICY, 'weekly_days': 45}, now=self.now))
+        self.assertTrue({c.pk for c in weekly} <= expired)
+
+    def test_policy_overrides(self):
+        policy = retention_policy(keep_all_days=3, weekly_days=None)
+        self.assertEqual(policy['keep_all_days'], 3)
+        self.assertIn('daily_days', policy)
+
+    def test_delete_cascades_extracted_objects(self):
+        old = self._config(40, text=f5_config('web', '10.1.2.3'))
+        old.ensure_parsed()
+        kept = DeviceConfig.objects.create(device=self.device, config_text=f5_config('web', '10.1.2.4'))
+        self.assertTrue(ConfigChange.objects.filter(previous=old).exists())
+
+        counts = delete_configs([old.pk, kept.pk], chunk_size=1)
+        self.assertEqual(counts['DeviceConfig'], 1)
+        self.assertFalse(DeviceConfig.objects.filter(pk=old.pk).exists())
+        self.assertTrue(DeviceConfig.objects.filter(pk=kept.pk).exists())
+        self.assertFalse(LtmPool.objects.filter(config_id=old.pk).exists())
+        self.assertFalse(LtmPoolMember.objects.filter(pool__config_id=old.pk).exists())
+        self.assertFalse(LtmVirtualServer.objects.filter(config_id=old.pk).exists())
+        self.assertTrue(LtmVirtualServer.objects.filter(config=kept).exists())
+        # 引用被删除版本的变更记录保留，previous置空
+        self.assertTrue(ConfigChange.objects.filter(config=kept, previous__isnull=True).exists())
+
+    def test_command(self):
+        for days in (10, 10.1, 10.2):
+            self._config(days)
+        out = StringIO()
+        call_command('compact_configs', '--keep-all-days', '7', '--daily-days', '30', '--dry-run', stdout=out)
+        self.assertIn('待删除历史配置 2 个', out.getvalue())
+        self.assertEqual(DeviceConfig.objects.count(), 3)
+
+        out = StringIO()
+        call_command('compact_configs', '--keep-all-days', '7', '--daily-days', '30', stdout=out)
+        self.assertEqual(DeviceConfig.objects.count(), 1)
+        self.assertIn('删除完成', out.getvalue())
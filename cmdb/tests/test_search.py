@@ -0,0 +1,53 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from cmdb.models import Device, DeviceConfig
+from cmdb.search import ScanSearchEngine, get_search_engine
+
+
+class TestConfigSearch(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for i in range(3):
+            device = Device.objects.create(
+                hostname=f'sw-{i}', address=f'10.0.0.{i + 1}', username='admin', password='admin',
+                device_type='hp_comware'
+            )
+            community = 'public' if i == 0 else 'private'
+            DeviceConfig.objects.create(
+                device=device, latest=False, config_json={'v': 0},
+                config_text=f'sysname sw-{i}\n snmp-agent community read legacy{i}\n',
+            )
+            DeviceConfig.objects.create(
+                device=device, config_json={'v': 1},
+                config_text=f'sysname sw-{i}\n snmp-agent community read {community}\n ip route-static 0.0.0.0 0 10.0.{i}.254\n',
+            )
+
+    def test_search_latest_with_lines(self):
+        response = self.client.get('/api/search/config?q=community public')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([r['hostname'] for r in results], ['sw-0'])
+        self.assertEqual(results[0]['lines'], [{'line': 2, 'text': ' snmp-agent community read public'}])
+
+    def test_history_and_prefix(self):
+        self.assertEqual(self.client.get('/api/search/config?q=legacy1').json()['count'], 0)
+        with override_settings(CMDB_SEARCH_HISTORY=True):
+            get_search_engine().rebuild()
+        self.assertEqual(self.client.get('/api/search/config/?q=legacy*&history=1').json()['count'], 3)
+        self.assertEqual(self.client.get('/api/search/config?q=10.0.2.*').json()['results'][0]['hostname'], 'sw-2')
+
+    def test_new_latest_replaces_indexed_version(self):
+        device = Device.objects.get(hostname='sw-1')
+        DeviceConfig.objects.filter(device=device).update(latest=False)
+        DeviceConfig.objects.create(device=device, config_json={'v': 2}, config_text='sysname sw-1\n acl number 3000\n')
+        hits = get_search_engine().search('acl')
+        self.assertEqual([hit['hostname'] for hit in hits], ['sw-1'])
+        self.assertEqual([hit['hostname'] for hit in get_search_engine().search('private')], ['sw-2'])
+
+    def test_scan_engine_matches_fts(self):
+        fts = [hit['config_id'] for hit in get_search_engine().search('snmp-agent private')]
+        scan = [hit['config_id'] for hit in ScanSearchEngine().search('snmp-agent private')]
+        self.assertEqual(sorted(fts), sorted(scan))
+
+    def test_missing_query(self):
+        self.assertEqual(self.client.get('/api/search/config').status_code, 400)
@@ -0,0 +1,48 @@
+import asyncio
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from cmdb.models import Device, DeviceConfig
+from cmdb.tests.test_fetch import CONFIG_TEXT
+from cmdb.writer import ConfigWriter
+
+
+class TestConfigWriter(TestCase):
+    def setUp(self):
+        self.devices = [
+            Device.objects.create(
+                hostname=f'sw-{i}', address=f'10.0.0.{i + 1}', username='admin', password='admin',
+                device_type='h3c_switch'
+            )
+            for i in range(5)
+        ]
+
+    def test_batches_saves(self):
+        async def run():
+            async with ConfigWriter(batch_size=3) as writer:
+                return writer, await asyncio.gather(*[
+                    writer.save(DeviceConfig(device=device, config_text=CONFIG_TEXT)) for device in self.devices
+                ])
+
+        writer, configs = async_to_sync(run)()
+        self.assertTrue(all(config.pk for config in configs))
+        self.assertEqual(writer.saved, 5)
+        self.assertLess(writer.batches, 5)
+        # 解析在入队前完成，对象在写事务中提取
+        self.assertTrue(all(config.interfaces.exists() for config in configs))
+
+    def test_failure_isolated(self):
+        bad = DeviceConfig(device=self.devices[0], config_text=CONFIG_TEXT)
+        bad.save = mock.Mock(side_effect=ValueError('boom'))
+
+        async def run():
+            async with ConfigWriter() as writer:
+                return await asyncio.gather(
+                    writer.save(DeviceConfig(device=self.devices[1], config_text=CONFIG_TEXT)),
+                    writer.save(bad),
+                    return_exceptions=True,
+                )
+
+        saved, failed = async_to_sync(run)()
+        self.assertIsInstance(failed, ValueError)
+        self.assertTrue(DeviceConfig.objects.filter(pk=saved.pk).exists())
@@ -1,4 +1,4 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import SimpleRouter
 from .views import *
 from cmdb import views
@@ -8,9 +8,19 @@ router.register(r'devices', DeviceViewSet, basename='device')
 router.register(r'configs', DeviceConfigViewSet, basename='config')
 router.register(r'virtuals', VirtualServerViewSet, basename='virtual')
 router.register(r'interfaces', InterfaceViewSet, basename='interface')
+router.register(r'pool-members', PoolMemberViewSet, basename='pool-member')
+router.register(r'config-changes', ConfigChangeViewSet, basename='config-change')
 
 # 包含两种路由格式
 urlpatterns = [
     path('index/', views.api_index, name='index'),
+    path('export/<str:resource>/', views.export_data, name='export'),
+    re_path(r'^search/config/?$', views.search_config, name='search-config'),
+    path('gslb/consistency/', views.gslb_consistency, name='gslb-consistency'),
+    path('changes/', views.changes_feed, name='changes'),
+    path('fetch/metrics/', views.fetch_metrics, name='fetch-metrics'),
+    # 原生异步的采集接口，需在router之前注册
+    path('devices/<int:pk>/fetch-config/', views.fetch_config, name='device-fetch-config'),
+    path('devices/batch-fetch-config/', views.batch_fetch_config, name='device-batch-fetch-config'),
     path('', include(router.urls)),
 ]
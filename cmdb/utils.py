@@ -1,7 +1,15 @@
+import hashlib
+import ipaddress
+import json
+import re
+import socket
+from datetime import datetime, time as dt_time
 from pathlib import Path
 from ttp import ttp
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import logging
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +18,21 @@ class ConfigParser:
     配置解析服务类，使用TTP模板解析设备配置
     """
     
+    # 设备类型到TTP模板文件的映射
+    TEMPLATE_MAP = {
+        'h3c_switch': 'h3c.ttp',
+        'hp_comware': 'h3c.ttp',
+        'f5_ltm': 'f5ltm.ttp',
+        'f5_gtm': 'f5gtm.ttp',
+        # 可以添加更多设备类型的模板映射
+        # 'cisco_ios': 'cisco_ios_template.ttp',
+        # 'juniper_junos': 'juniper_junos_template.ttp',
+    }
+    
     def __init__(self):
         self.template_dir = Path(__file__).parent / 'ttp_tmpl'
+        # 模板路径 -> (修改时间, 版本哈希)
+        self._version_cache = {}
     
     def get_template_path(self, device_type: str) -> str:
         """
@@ -23,25 +44,37 @@ class ConfigParser:
         Returns:
             TTP模板文件路径
         """
-        template_map = {
-            'h3c_switch': 'h3c.ttp',
-            'f5_ltm': 'f5_ltm.ttp',
-            'f5_gtm': 'f5_gtm.ttp',
-            # 可以添加更多设备类型的模板映射
-            # 'cisco_ios': 'cisco_ios_template.ttp',
-            # 'juniper_junos': 'juniper_junos_template.ttp',
-        }
-        
-        template_file = template_map.get(device_type, '')
+        template_file = self.TEMPLATE_MAP.get(device_type, '')
         template_path = self.template_dir / template_file
-        logger.info(f"模板路径: {template_path}")
+        logger.debug(f"模板路径: {template_path}")
         
         # 如果模板文件不存在，使用默认模板
-        if not template_path.exists():
+        if not template_file or not template_path.is_file():
             raise FileNotFoundError(f"模板文件不存在: {template_path}")
         
         return template_path.as_posix()
     
+    def get_template_version(self, device_type: str) -> str:
+        """
+        获取设备类型对应模板的版本哈希，模板内容变化后版本随之变化
+        
+        Args:
+            device_type: 设备类型
+            
+        Returns:
+            模板内容的SHA-1摘要；没有对应模板时返回空字符串
+        """
+        try:
+            template_path = Path(self.get_template_path(device_type))
+        except FileNotFoundError:
+            return ''
+        mtime = template_path.stat().st_mtime_ns
+        cached = self._version_cache.get(template_path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, hashlib.sha1(template_path.read_bytes()).hexdigest())
+            self._version_cache[template_path] = cached
+        return cached[1]
+    
     def parse_config(self, config: str, device_type: str) -> Dict[str, Any]:
         """
         使用TTP模板解析设备配置
@@ -76,5 +109,168 @@ class ConfigParser:
         
         return parsed_result
 
+# 行尾空白，比较配置前统一去掉
+_TRAILING_SPACE = re.compile(r'[ \t]+$', re.MULTILINE)
+
+class ConfigNormalizer:
+    """
+    配置规范化服务类，变更检测前删除或替换每次采集都会变化的行（时间戳、运行时长等）
+    规则文件与TTP模板放在同一目录，按模板文件名命名，如 h3c.ttp 对应 h3c.normalize.json
+    """
+    
+    def __init__(self, parser: ConfigParser):
+        self.parser = parser
+        # 规则文件路径 -> (修改时间, 编译后的规则列表)
+        self._rules_cache = {}
+    
+    def get_rules_path(self, device_type: str) -> Path:
+        """根据设备类型获取规范化规则文件路径"""
+        template_file = self.parser.TEMPLATE_MAP.get(device_type, '')
+        return self.parser.template_dir / f"{Path(template_file).stem}.normalize.json"
+    
+    def get_rules(self, device_type: str) -> List[Tuple[re.Pattern, str]]:
+        """
+        加载并编译设备类型对应的规范化规则，规则文件修改后自动重新加载
+        
+        Returns:
+            (正则, 替换文本) 列表；drop规则的替换文本为空字符串并同时删除换行
+        """
+        if not self.parser.TEMPLATE_MAP.get(device_type):
+            return []
+        rules_path = self.get_rules_path(device_type)
+        if not rules_path.is_file():
+            return []
+        
+        mtime = rules_path.stat().st_mtime_ns
+        cached = self._rules_cache.get(rules_path)
+        if cached is None or cached[0] != mtime:
+            rules = []
+            for rule in json.loads(rules_path.read_text(encoding='utf-8')).get('rules', []):
+                if rule.get('action', 'drop') == 'drop':
+                    rules.append((re.compile(rule['pattern'] + r'\n?', re.MULTILINE), ''))
+                else:
+                    rules.append((re.compile(rule['pattern'], re.MULTILINE), rule.get('replace', '')))
+            cached = (mtime, rules)
+            self._rules_cache[rules_path] = cached
+        return cached[1]
+    
+    def normalize(self, config: str, device_type: str) -> str:
+        """
+        规范化配置文本：统一换行符、去掉行尾空白，再应用设备类型的规则
+        
+        Args:
+            config: 原始设备配置文本
+            device_type: 设备类型
+            
+        Returns:
+            规范化后的配置文本，仅用于比较，不用于保存
+        """
+        config = _TRAILING_SPACE.sub('', config.replace('\r\n', '\n').replace('\r', '\n'))
+        for pattern, replacement in self.get_rules(device_type):
+            config = pattern.sub(replacement, config)
+        return config.strip('\n')
+    
+    def digest(self, config: str, device_type: str) -> str:
+        """计算规范化后配置的摘要，作为变更检测与去重的依据"""
+        return config_digest(self.normalize(config, device_type))
+
+def config_digest(config: str) -> str:
+    """
+    计算配置内容的SHA-256摘要，用于去重与变更检测
+    
+    Args:
+        config: 原始设备配置文本
+        
+    Returns:
+        十六进制摘要字符串
+    """
+    return hashlib.sha256(config.encode('utf-8')).hexdigest()
+
+def parse_config_safe(args) -> Any:
+    """
+    供进程池调用的解析入口，参数为 (配置文本, 设备类型) 元组
+    解析失败时返回None而不是抛出异常，避免单个配置导致整批失败
+    """
+    config, device_type = args
+    try:
+        return config_parser.parse_config(config, device_type)
+    except Exception as e:
+        logger.warning(f"解析{device_type}配置失败: {str(e)}")
+        return None
+
+def parse_time_option(value):
+    """解析日期或日期时间参数，无时区信息时按当前时区处理"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f'无法解析的时间: {value}')
+        parsed = datetime.combine(date, dt_time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+# IPv4地址映射到IPv6的 ::ffff:0:0/96 段，使两种地址落在同一个有序空间
+_IPV4_MAPPED_BASE = 0xffff << 32
+
+def ip_network_of(address, mask=None):
+    """
+    将配置中的地址解析为网段，支持 掩码/前缀长度/CIDR 写法，忽略F5路由域后缀 %n
+
+    Returns:
+        ipaddress网段对象，无法解析时返回None
+    """
+    if not address:
+        return None
+    address = str(address).strip().split('%', 1)[0]
+    if str(mask).strip() == 'any':
+        mask = 0
+    if mask is not None and mask != '':
+        address = f"{address}/{str(mask).strip()}"
+    try:
+        return ipaddress.ip_network(address, strict=False)
+    except ValueError:
+        return None
+
+def ip_interval(network):
+    """
+    将网段编码为可比较的区间键
+
+    起止地址统一为128位整数（IPv4映射到IPv6空间），再编码为32位定长十六进制字符串，
+    字符串顺序即数值顺序，可直接用于数据库索引上的范围查询
+
+    Returns:
+        (起始键, 结束键, 前缀长度)，network为None时返回 (None, None, None)
+    """
+    if network is None:
+        return None, None, None
+    start, end = int(network.network_address), int(network.broadcast_address)
+    if network.version == 4:
+        start += _IPV4_MAPPED_BASE
+        end += _IPV4_MAPPED_BASE
+    return f'{start:032x}', f'{end:032x}', network.prefixlen
+
+def endpoint_of(address, port):
+    """
+    将地址与端口规范化为 地址:端口，用于GTM成员与LTM VS关联
+    忽略F5路由域后缀，服务名端口（如 https）转换为数字
+
+    Returns:
+        规范化后的字符串，地址或端口缺失时返回None
+    """
+    if not address or not port:
+        return None
+    address = str(address).split('%', 1)[0]
+    port = str(port)
+    if not port.isdigit() and port != 'any':
+        try:
+            port = str(socket.getservbyname(port))
+        except OSError:
+            pass
+    return f'{address}:{port}'
+
 # 创建全局配置解析器实例
 config_parser = ConfigParser()
+config_normalizer = ConfigNormalizer(config_parser)
@@ -1,17 +1,41 @@
+import io
+import json
 import logging
 import asyncio
+import math
+import time
 from rest_framework import viewsets, status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, SAFE_METHODS
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser, FormParser
 from asyncio import run as asyncio_run
 from asgiref.sync import async_to_sync
 from django.db import transaction
-from django.db.models import Subquery, OuterRef
-from django.http import JsonResponse
-from cmdb.models import Device, DeviceConfig, Interface, LtmVirtualServer
-from .serializers import DeviceSerializer, DeviceConfigSerializer, InterfaceSerializer, VirtualSerializer
-from .services import batch_fetch_configs, async_fetch_config
+from django.db.models import Subquery, OuterRef, Count, Max
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from cmdb.models import Device, DeviceConfig, Interface, LtmVirtualServer, LtmPoolMember, ConfigChange
+from .serializers import (
+    DeviceSerializer, DeviceConfigSerializer, InterfaceSerializer, VirtualSerializer, PoolMemberSerializer,
+    ConfigChangeSerializer,
+)
+from .services import (
+    batch_fetch_configs, async_fetch_config, import_devices_from_csv,
+    iter_latest_configs, LATEST_CONFIG_FIELDS, LATEST_CONFIG_DEFAULT_FIELDS,
+    stale_configs_queryset, reparse_configs, fetch_pipeline_metrics,
+)
+from .utils import parse_time_option, ip_interval, ip_network_of
+from .exporters import EXPORT_FORMATS, get_export_queryset, stream_export, stream_ndjson
+from .search import get_search_engine
+from .graph import virtual_server_graph, virtual_servers_for_backend
+from .gslb import consistency_report
+from .diff import DIFF_MODES, WHITESPACE_MODES, diff_configs
+from .events import EVENT_PAGE_SIZE, LONG_POLL_MAX_SECONDS, wait_for_events
+from .archive import archive_enabled, history_queryset
+from .probe import probe
 
 # Import config parser
 from .utils import config_parser
@@ -32,6 +56,185 @@ def api_index(request):
     })
 
 
+def export_data(request, resource):
+    """
+    流式导出设备清单及解析对象
+    - GET /api/export/{devices|interfaces|virtuals|pools}/?format=csv|ndjson|parquet|arrow
+    - 可选参数: device=1,2,3 按设备过滤; device_type 按设备类型过滤; history=1 包含历史配置中的对象
+    """
+    file_format = request.GET.get('format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return JsonResponse({"success": False, "message": f"不支持的导出格式: {file_format}"}, status=400)
+
+    device_param = request.GET.get('device')
+    try:
+        device_ids = [int(pk) for pk in device_param.split(',') if pk] if device_param else None
+        queryset, columns = get_export_queryset(
+            resource,
+            latest_only=request.GET.get('history') not in ('1', 'true'),
+            device_ids=device_ids,
+            device_type=request.GET.get('device_type'),
+        )
+        chunks = stream_export(resource, file_format, queryset, columns)
+    except ValueError as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=400)
+    except ImportError as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=501)
+
+    content_type, extension = EXPORT_FORMATS[file_format]
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{resource}.{extension}"'
+    logger.info(f"开始流式导出{resource}，格式: {file_format}")
+    return response
+
+
+def search_config(request):
+    """
+    全文检索设备配置，返回命中设备及匹配行
+    - GET /api/search/config?q=snmp-agent community
+    - 可选参数: phrase=1 按整句匹配; history=1 包含历史配置; device_type 按设备类型过滤; limit 返回设备数，默认50
+    - 以*结尾的词按前缀匹配，如 q=10.1.*
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({"success": False, "message": "缺少检索内容参数q"}, status=400)
+    try:
+        limit = min(int(request.GET.get('limit', 50)), 500)
+    except ValueError:
+        return JsonResponse({"success": False, "message": "limit参数必须为整数"}, status=400)
+
+    start = time.monotonic()
+    results = get_search_engine().search(
+        query,
+        limit=limit,
+        history=request.GET.get('history') in ('1', 'true'),
+        device_type=request.GET.get('device_type'),
+        phrase=request.GET.get('phrase') in ('1', 'true'),
+    )
+    elapsed_ms = (time.monotonic() - start) * 1000
+    logger.info(f"检索配置 {query!r} 命中 {len(results)} 个，耗时 {elapsed_ms:.1f}ms")
+    return JsonResponse({
+        "success": True,
+        "count": len(results),
+        "elapsed_ms": round(elapsed_ms, 1),
+        "results": results,
+    })
+
+
+def gslb_consistency(request):
+    """
+    GTM与LTM一致性检查，基于预计算的GTM成员与LTM VS关联
+    - GET /api/gslb/consistency/
+    - 返回找不到LTM VS的GTM成员、未被GTM引用的VS，以及DNS名称到后端的完整链路
+    - 可选参数: wideip 只输出指定wideip的链路
+    """
+    report = consistency_report(wideip=request.GET.get('wideip'))
+    return JsonResponse({
+        "success": True,
+        "dangling_count": len(report["dangling_members"]),
+        "unreferenced_count": len(report["unreferenced_virtuals"]),
+        **report,
+    })
+
+
+async def changes_feed(request):
+    """
+    配置变更事件流，按游标增量同步
+    - GET /api/changes/?after=<上次收到的最大事件ID>&limit=500&wait=25
+    - wait>0 时为长轮询：没有新事件则最多等待wait秒（上限30秒）后返回
+    - 返回的cursor作为下一次请求的after
+    """
+    try:
+        after = int(request.GET.get('after', 0))
+        limit = min(max(int(request.GET.get('limit', EVENT_PAGE_SIZE)), 1), EVENT_PAGE_SIZE)
+        wait = float(request.GET.get('wait', 0))
+        if not math.isfinite(wait):
+            raise ValueError(wait)
+    except ValueError:
+        return JsonResponse({"success": False, "message": "after、limit、wait参数必须为数字"}, status=400)
+    wait = min(max(wait, 0), LONG_POLL_MAX_SECONDS)
+
+    events = await wait_for_events(after, limit=limit, timeout=wait)
+    return JsonResponse({
+        "success": True,
+        "events": events,
+        "cursor": events[-1]["id"] if events else after,
+        "has_more": len(events) == limit,
+    })
+
+
+def fetch_metrics(request):
+    """
+    本进程采集调度的指标
+    - GET /api/fetch/metrics/
+    - lanes: 交互（interactive）与批量（bulk）通道的占用数、排队数及排队耗时（秒）
+    - coalescing: 同一设备并发采集的合并与结果复用次数
+    """
+    return JsonResponse({"success": True, **fetch_pipeline_metrics()})
+
+
+@csrf_exempt
+@require_POST
+async def fetch_config(request, pk):
+    """
+    调用FastAPI接口获取单个设备配置并保存到数据库
+    原生异步视图：等待SSH采集期间不占用同步工作线程
+    
+    Args:
+        request: HTTP请求对象
+        pk: 设备ID
+        
+    Returns:
+        JsonResponse: 包含操作结果的HTTP响应
+    """
+    logger.info(f"开始处理设备{pk}的配置获取请求")
+    
+    # 获取设备对象
+    try:
+        device = await Device.objects.aget(pk=pk)
+    except Device.DoesNotExist:
+        return JsonResponse({"success": False, "message": f"设备{pk}不存在"}, status=404)
+    logger.debug(f"获取到设备信息: {device.hostname} ({device.address})")
+
+    result = await async_fetch_config(device)
+    return JsonResponse(result, status=200)
+
+
+@csrf_exempt
+@require_POST
+async def batch_fetch_config(request):
+    """
+    批量调用FastAPI接口获取多个设备配置并保存到数据库
+    原生异步视图：所有设备的采集在同一事件循环中并发等待
+    
+    Args:
+        request: HTTP请求对象，可包含device_ids参数指定要获取配置的设备ID列表
+        
+    Returns:
+        JsonResponse: 包含批量操作结果的HTTP响应
+    """
+    # 获取请求参数中的设备ID列表
+    if request.content_type == 'application/json' and request.body:
+        try:
+            device_ids = json.loads(request.body).get("device_ids", [])
+        except (ValueError, AttributeError):
+            return JsonResponse({"success": False, "message": "请求体不是有效的JSON对象"}, status=400)
+    else:
+        device_ids = request.POST.getlist("device_ids")
+    try:
+        device_ids = [int(pk) for pk in device_ids]
+    except (ValueError, TypeError):
+        return JsonResponse({"success": False, "message": "device_ids必须为设备ID列表"}, status=400)
+    
+    # 如果没有指定设备ID，获取所有设备
+    if not device_ids:
+        devices = Device.objects.all()
+    else:
+        devices = Device.objects.filter(id__in=device_ids)
+    
+    result = await batch_fetch_configs(devices)
+    return JsonResponse(result, status=200)
+
 
 class DeviceViewSet(viewsets.ModelViewSet):
     """网络设备的RESTful API视图集
@@ -42,7 +245,10 @@ class DeviceViewSet(viewsets.ModelViewSet):
     - PUT /api/devices/{id}/ - 更新设备
     - PATCH /api/devices/{id}/ - 部分更新设备
     - DELETE /api/devices/{id}/ - 删除设备
-    - POST /api/devices/{id}/fetch-config - 获取设备配置并保存
+    - POST /api/devices/{id}/fetch-config - 获取设备配置并保存（原生异步视图，见 fetch_config）
+    - POST /api/devices/batch-fetch-config - 批量获取设备配置（原生异步视图，见 batch_fetch_config）
+    - GET /api/devices/{id}/reachability - SSH端口连通性探测结果（默认使用缓存，refresh=1重新探测）
+    - POST /api/devices/import/ - 上传CSV批量导入设备
     """
     queryset = Device.objects.all()  # type: ignore
     serializer_class = DeviceSerializer
@@ -54,28 +260,6 @@ class DeviceViewSet(viewsets.ModelViewSet):
         return response
     
    
-    @action(detail=True, methods=['post'], url_path='fetch-config')
-    def fetch_config(self, request, pk=None):
-        """
-        调用FastAPI接口获取单个设备配置并保存到数据库
-        
-        Args:
-            request: HTTP请求对象
-            pk: 设备ID
-            
-        Returns:
-            Response: 包含操作结果的HTTP响应
-        """
-        logger.info(f"开始处理设备{pk}的配置获取请求")
-        
-        # 获取设备对象
-        device = self.get_object() 
-        logger.debug(f"获取到设备信息: {device.hostname} ({device.address})")
-        # 调用异步函数获取配置
-        result = async_to_sync(async_fetch_config)(device)
-        
-        return Response(result, status=status.HTTP_200_OK)
-        
     @action(detail=True, methods=['get'], url_path='config')
     def get_device_config(self, request, pk=None):
         """
@@ -97,7 +281,7 @@ class DeviceViewSet(viewsets.ModelViewSet):
         try:
             # 获取设备的最新配置
             logger.debug(f"查询设备{pk}的最新配置")
-            latest_config = DeviceConfig.objects.filter(device=device).order_by('-time').first()
+            latest_config = DeviceConfig.objects.filter(device=device, latest=True).first()
             
             if latest_config:
                 logger.info(f"成功获取设备{pk}的最新配置，配置ID: {latest_config.id}")
@@ -134,30 +318,55 @@ class DeviceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    @action(detail=False, methods=['post'], url_path='batch-fetch-config')
-    def batch_fetch_config(self, request):
+    @action(detail=True, methods=['get'], url_path='reachability')
+    def reachability(self, request, pk=None):
         """
-        批量调用FastAPI接口获取多个设备配置并保存到数据库
-        
+        设备SSH端口的连通性，默认返回缓存的探测结果，没有缓存时立即探测
+
         Args:
-            request: HTTP请求对象，可包含device_ids参数指定要获取配置的设备ID列表
-            
+            request: HTTP请求对象，refresh=1 时忽略缓存重新探测
+            pk: 设备ID
+
         Returns:
-            Response: 包含批量操作结果的HTTP响应
+            Response: 包含探测结果的HTTP响应
         """
-        # 获取请求参数中的设备ID列表
-        device_ids = request.data.get("device_ids", [])
-        
-        # 如果没有指定设备ID，获取所有设备
-        if not device_ids:
-            devices = Device.objects.all() 
-        else:
-            devices = Device.objects.filter(id__in=device_ids) 
-        
-        # 调用异步函数获取配置
-        result = async_to_sync(batch_fetch_configs)(devices)
-        
-        return Response(result, status=status.HTTP_200_OK)
+        device = self.get_object()
+        refresh = request.query_params.get('refresh', '').lower() in ('1', 'true', 'yes')
+        result = async_to_sync(probe)(device.address, use_cache=not refresh)
+        return Response(
+            {"success": True, "hostname": device.hostname, "address": device.address, **result},
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_devices(self, request):
+        """
+        上传CSV文件批量导入设备，已存在的主机名按新数据更新
+
+        Args:
+            request: HTTP请求对象，file为CSV文件，dry_run为true时只返回校验报告
+
+        Returns:
+            Response: 包含导入报告的HTTP响应
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {"success": False, "message": "缺少上传文件file"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        logger.info(f"开始导入设备文件{upload.name}，dry_run={dry_run}")
+        try:
+            lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            report = import_devices_from_csv(lines, dry_run=dry_run)
+        except UnicodeDecodeError as e:
+            return Response(
+                {"success": False, "message": f"文件编码错误，请使用UTF-8: {str(e)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(report, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['get'], url_path='history')
     def get_config_history(self, request, pk=None):
@@ -180,7 +389,7 @@ class DeviceViewSet(viewsets.ModelViewSet):
         try:
             # 获取设备的最新配置
             logger.debug(f"查询设备{pk}的历史配置列表")
-            config_list_objs = DeviceConfig.objects.filter(device=device)
+            config_list_objs = history_queryset(device=device)
             
             if config_list_objs:
                 logger.info(f"成功获取设备{pk}的历史配置列表")
@@ -226,11 +435,16 @@ class DeviceConfigViewSet(viewsets.ModelViewSet):
     - PUT /api/configs/{id}/ - 更新配置
     - PATCH /api/configs/{id}/ - 部分更新配置
     - DELETE /api/configs/{id}/ - 删除配置
+    - GET/POST /api/configs/latest/ - 批量获取多台设备的最新配置
+    - GET/POST /api/configs/reparse/ - 统计/重新解析模板版本过期的配置
+    - GET /api/configs/{id}/parsed/ - 获取配置的解析结果，历史版本首次访问时按需解析
+    - GET /api/configs/{a}/diff/{b}/ - 比较两个配置版本
     """
     queryset = DeviceConfig.objects.all()  # type: ignore
     serializer_class = DeviceConfigSerializer
     permission_classes = [AllowAny]  # 允许所有访问，生产环境应使用更严格的权限
     filterset_fields = ['device']  # 支持按设备过滤
+    lookup_value_regex = r'\d+'  # 配置ID为整数，diff等详情操作直接使用pk
     
     def get_queryset(self):
         """自定义查询集，支持按设备主机名过滤"""
@@ -240,8 +454,262 @@ class DeviceConfigViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(device__pk=device)
         return queryset
 
+    def filter_queryset(self, queryset):
+        """列表同时包含已归档的历史配置"""
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list' and archive_enabled():
+            device = self.request.query_params.get('device')
+            queryset = history_queryset(**({'device__pk': device} if device else {}))
+        return queryset
+
+    def get_object(self):
+        """
+        主库中不存在时到归档库查找，归档配置只读
+        主库中尚未解析的历史版本（CMDB_PARSE_POLICY='latest'）在首次访问时解析并提取对象
+        """
+        try:
+            config = super().get_object()
+        except Http404:
+            if self.request.method not in SAFE_METHODS or not str(self.kwargs.get('pk', '')).isdigit():
+                raise
+            config = history_queryset(pk=self.kwargs['pk']).first()
+            if config is None:
+                raise
+            return config
+        if self.request.method in SAFE_METHODS:
+            config.ensure_parsed()
+        return config
+
+    @staticmethod
+    def _list_param(params, name):
+        """读取列表参数，兼容JSON数组和逗号分隔字符串"""
+        value = params.get(name)
+        if hasattr(params, 'getlist') and len(params.getlist(name)) > 1:
+            value = params.getlist(name)
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.split(',')
+        return [item.strip() if isinstance(item, str) else item for item in value if item != '']
+
+    @action(detail=True, methods=['get'], url_path=r'diff/(?P<other>\d+)', filter_backends=[])
+    def diff(self, request, pk=None, other=None):
+        """
+        在服务端比较两个配置版本
+        - GET /api/configs/{a}/diff/{b}/?mode=unified|side-by-side&context=3&whitespace=none|trailing|all
+        - context=all 输出全文
+        """
+        params = request.query_params
+        mode = params.get('mode', 'unified')
+        whitespace = params.get('whitespace', 'none')
+        if mode not in DIFF_MODES or whitespace not in WHITESPACE_MODES:
+            return Response({
+                "success": False,
+                "message": f"mode可选 {', '.join(DIFF_MODES)}，whitespace可选 {', '.join(WHITESPACE_MODES)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        context = params.get('context', '3')
+        try:
+            context = None if context == 'all' else max(int(context), 0)
+        except ValueError:
+            return Response({"success": False, "message": "context必须为整数或all"}, status=status.HTTP_400_BAD_REQUEST)
+
+        configs = {config.pk: config for config in history_queryset(pk__in=[pk, other])}
+        old, new = configs.get(int(pk)), configs.get(int(other))
+        if old is None or new is None:
+            return Response({"success": False, "message": "配置不存在"}, status=status.HTTP_404_NOT_FOUND)
+
+        label = lambda config: f"{config.device.hostname} #{config.pk} {config.time:%Y-%m-%d %H:%M:%S}"
+        result = diff_configs(
+            old.config_text, new.config_text,
+            mode=mode, context=context, whitespace=whitespace, a_label=label(old), b_label=label(new),
+        )
+        return Response({
+            "success": True,
+            "from": {"id": old.pk, "device": old.device.hostname, "time": old.time},
+            "to": {"id": new.pk, "device": new.device.hostname, "time": new.time},
+            "mode": mode,
+            **result,
+        })
+
+    @action(detail=False, methods=['get', 'post'], url_path='latest', filter_backends=[])
+    def latest(self, request):
+        """
+        批量获取多台设备的最新配置，一次索引查询返回
+
+        Args:
+            request: HTTP请求对象，GET使用查询参数，POST使用请求体：
+                device_ids: 设备ID列表或逗号分隔字符串，为空时返回所有设备
+                device_type: 按设备类型过滤
+                hostname: 主机名列表或逗号分隔字符串
+                fields: 输出字段，默认 id,device_id,hostname,time,config_text
+                stream: 为true时以NDJSON流式返回
+
+        Returns:
+            Response: 包含最新配置列表的HTTP响应
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        fields = self._list_param(params, 'fields') or LATEST_CONFIG_DEFAULT_FIELDS
+        unknown_fields = [name for name in fields if name not in LATEST_CONFIG_FIELDS]
+        if unknown_fields:
+            return Response(
+                {"success": False, "message": f"不支持的字段: {', '.join(unknown_fields)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            device_ids = [int(pk) for pk in self._list_param(params, 'device_ids')]
+        except (TypeError, ValueError):
+            return Response(
+                {"success": False, "message": "device_ids必须为整数列表"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = iter_latest_configs(
+            fields,
+            device_ids=device_ids,
+            device_type=params.get('device_type'),
+            hostnames=self._list_param(params, 'hostname'),
+        )
+
+        if str(params.get('stream', '')).lower() in ('1', 'true'):
+            return StreamingHttpResponse(stream_ndjson(rows, fields), content_type='application/x-ndjson')
+
+        configs = [dict(zip(fields, row)) for row in rows]
+        logger.info(f"批量获取最新配置完成，共{len(configs)}条")
+        return Response(
+            {
+                "success": True,
+                "count": len(configs),
+                "configs": configs
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['get'], url_path='parsed')
+    def parsed(self, request, pk=None):
+        """
+        获取配置的结构化解析结果，未解析的历史版本在此时解析并写回
+
+        Args:
+            request: HTTP请求对象
+            pk: 配置ID
+
+        Returns:
+            Response: 包含config_json的HTTP响应
+        """
+        config = self.get_object()
+        try:
+            config_json = config.ensure_parsed()
+        except (FileNotFoundError, ValueError) as e:
+            logger.error(f"解析配置{pk}失败: {str(e)}")
+            return Response(
+                {"success": False, "message": f"解析配置失败: {str(e)}", "config_json": None},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        return Response(
+            {
+                "success": True,
+                "id": config.id,
+                "device": config.device.hostname,
+                "time": config.time,
+                "template_version": config.template_version,
+                "config_json": config_json
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get', 'post'], url_path='reparse', filter_backends=[])
+    def reparse(self, request):
+        """
+        统计或重新解析模板版本已过期的配置
+
+        Args:
+            request: HTTP请求对象，可包含以下过滤参数：
+                device_type: 设备类型列表或逗号分隔字符串
+                latest_only: 为true时只处理最新配置
+                since / until: 保存时间范围
+                limit: POST时本次最多处理的配置数，默认500，剩余部分可再次调用继续
+
+        Returns:
+            Response: GET返回各设备类型的过期配置数，POST返回处理结果
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        try:
+            queryset = stale_configs_queryset(
+                device_types=self._list_param(params, 'device_type'),
+                latest_only=str(params.get('latest_only', '')).lower() in ('1', 'true'),
+                since=parse_time_option(params.get('since')),
+                until=parse_time_option(params.get('until')),
+            )
+            limit = int(params.get('limit', 500))
+        except ValueError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'GET':
+            counts = {
+                row['device__device_type']: row['count']
+                for row in queryset.order_by().values('device__device_type').annotate(count=Count('id'))
+            }
+            return Response({"success": True, "stale": counts, "total": sum(counts.values())})
+
+        # 请求内处理，不启动进程池
+        stats = reparse_configs(queryset, workers=0, limit=limit)
+        return Response(
+            {"success": True, **stats, "remaining": queryset.count()},
+            status=status.HTTP_200_OK
+        )
+
+
+class IpRangeFilterMixin:
+    """
+    按地址区间过滤，参数值为IP或CIDR，均走 ip_start/ip_end 上的索引范围查询
+    - ip_within: 地址区间完全落在网段内，如 ip_within=10.20.0.0/16
+    - ip_overlaps: 地址区间与网段有重叠
+    - ip_contains: 地址区间包含该IP或网段，如 ip_contains=10.20.1.5
+    - ip_lpm: 最长前缀匹配，每个配置只保留包含该IP且前缀最长的对象
+    """
+    # 对象到所属配置的字段路径，最长前缀匹配按配置分组
+    ip_config_field = 'config'
+
+    @staticmethod
+    def _ip_param(params, name):
+        value = params.get(name)
+        if not value:
+            return None
+        network = ip_network_of(value)
+        if network is None:
+            raise ValidationError({name: f'无效的IP地址或网段: {value}'})
+        start, end, _ = ip_interval(network)
+        return start, end
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+
+        within = self._ip_param(params, 'ip_within')
+        if within:
+            queryset = queryset.filter(ip_start__gte=within[0], ip_end__lte=within[1])
+        overlaps = self._ip_param(params, 'ip_overlaps')
+        if overlaps:
+            queryset = queryset.filter(ip_start__lte=overlaps[1], ip_end__gte=overlaps[0])
+        contains = self._ip_param(params, 'ip_contains')
+        if contains:
+            queryset = queryset.filter(ip_start__lte=contains[0], ip_end__gte=contains[1])
+        lpm = self._ip_param(params, 'ip_lpm')
+        if lpm:
+            queryset = queryset.filter(ip_start__lte=lpm[0], ip_end__gte=lpm[1])
+            longest = (
+                queryset.model.objects
+                .filter(**{self.ip_config_field: OuterRef(self.ip_config_field)},
+                        ip_start__lte=lpm[0], ip_end__gte=lpm[1])
+                .values(self.ip_config_field)
+                .annotate(longest=Max('ip_prefixlen'))
+                .values('longest')
+            )
+            queryset = queryset.filter(ip_prefixlen=Subquery(longest))
+        return queryset
+
 
-class VirtualServerViewSet(viewsets.ModelViewSet):
+class VirtualServerViewSet(IpRangeFilterMixin, viewsets.ModelViewSet):
     queryset = LtmVirtualServer.objects.select_related('config__device').all()  # type: ignore
     serializer_class = VirtualSerializer
     permission_classes = [AllowAny]  # 允许所有访问，生产环境应使用更严格的权限
@@ -258,9 +726,37 @@ class VirtualServerViewSet(viewsets.ModelViewSet):
         latest_configs = DeviceConfig.objects.filter(latest=True)
         latest_virtuals = queryset.filter(config__in=latest_configs)
         return latest_virtuals
-    
 
-class InterfaceViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def graph(self, request, pk=None):
+        """
+        VS的依赖图：VS → pool → member → node
+        - GET /api/virtuals/{id}/graph/
+        """
+        graph = virtual_server_graph(pk)
+        if graph is None:
+            return Response({"success": False, "message": "VS不存在"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(graph)
+
+    @action(detail=False, methods=['get'], url_path='by-backend', filter_backends=[])
+    def by_backend(self, request):
+        """
+        反向查询转发到指定后端的VS，用于评估后端变更的影响范围
+        - GET /api/virtuals/by-backend/?address=10.1.2.3
+        - address可为网段，如 10.1.2.0/24；history=1 包含历史配置
+        """
+        address = request.query_params.get('address')
+        if not address:
+            return Response({"success": False, "message": "缺少address参数"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            virtuals = virtual_servers_for_backend(address, history=request.query_params.get('history') in ('1', 'true'))
+        except ValueError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"success": True, "count": len(virtuals), "virtuals": virtuals})
+
+
+
+class InterfaceViewSet(IpRangeFilterMixin, viewsets.ModelViewSet):
     queryset = Interface.objects.select_related('config__device').all()
     serializer_class = InterfaceSerializer
     permission_classes = [AllowAny]
@@ -277,4 +773,48 @@ class InterfaceViewSet(viewsets.ModelViewSet):
         latest_configs = DeviceConfig.objects.filter(latest=True)
         latest_interfaces = queryset.filter(config__in=latest_configs)
         return latest_interfaces
-    
\ No newline at end of file
+
+
+class PoolMemberViewSet(IpRangeFilterMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = LtmPoolMember.objects.select_related('pool__config__device').all()
+    serializer_class = PoolMemberSerializer
+    permission_classes = [AllowAny]
+    filterset_fields = ['name']
+    ip_config_field = 'pool__config'
+
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        device = self.request.query_params.get('device')
+        if device:
+            queryset = queryset.filter(pool__config__device__pk=device)
+        return queryset.filter(pool__config__latest=True)
+
+
+class ConfigChangeViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    配置对象级变更查询，记录在新版本保存时已计算好
+    - GET /api/config-changes/?device=1&since=2024-01-01&until=2024-02-01
+    - 可选参数: config 指定新版本; object_type 如 ltmvirtualserver/ltmpool/interface; object_name; action
+    """
+    queryset = ConfigChange.objects.select_related('device').all()
+    serializer_class = ConfigChangeSerializer
+    permission_classes = [AllowAny]
+    filterset_fields = ['device', 'config', 'object_type', 'object_name', 'action']
+
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        try:
+            since = parse_time_option(params.get('since'))
+            until = parse_time_option(params.get('until'))
+        except ValueError as e:
+            raise ValidationError({"message": str(e)})
+        if since:
+            queryset = queryset.filter(time__gte=since)
+        if until:
+            queryset = queryset.filter(time__lt=until)
+        return queryset
@@ -0,0 +1,111 @@
+"""
+单写者配置写入队列
+
+SQLite同一时刻只允许一个写事务，大量并发采集各自提交时会争抢写锁并频繁fsync。
+采集协程把待保存的配置交给队列，由唯一的写协程攒批后在一个事务中写入（组提交），
+每个配置使用独立的保存点，单个失败不影响同批其它配置。TTP解析在进入队列前于
+线程池中完成，不占用写事务。
+"""
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# 每个写事务最多包含的配置数
+WRITE_BATCH_SIZE = 50
+# 收到第一个配置后等待更多配置加入同一批的最长秒数
+WRITE_BATCH_DELAY = 0.02
+
+
+class ConfigWriter:
+    """
+    单写者队列，在事件循环内使用：
+
+        async with ConfigWriter() as writer:
+            config = await writer.save(DeviceConfig(device=device, config_text=text))
+    """
+
+    def __init__(self, batch_size=WRITE_BATCH_SIZE, batch_delay=WRITE_BATCH_DELAY):
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.batches = 0
+        self.saved = 0
+        self._queue = None
+        self._task = None
+
+    async def __aenter__(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # None 作为结束标记，写协程处理完之前的配置后退出
+        await self._queue.put(None)
+        await self._task
+
+    async def save(self, config):
+        """
+        解析后排队写入
+
+        Returns:
+            保存后的配置对象；保存失败时抛出原异常
+        """
+        await sync_to_async(config.prepare, thread_sensitive=False)()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((config, future))
+        return await future
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = asyncio.get_running_loop().time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                try:
+                    item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(
+                        self._queue.get(), timeout
+                    )
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                errors = await sync_to_async(self._write_batch)([config for config, _ in batch])
+            except Exception as e:
+                # 事务提交失败时整批失败
+                logger.error(f'批量写入{len(batch)}个配置失败: {str(e)}', exc_info=True)
+                errors = [e] * len(batch)
+            for (config, future), error in zip(batch, errors):
+                if future.cancelled():
+                    continue
+                if error is None:
+                    future.set_result(config)
+                else:
+                    future.set_exception(error)
+
+    def _write_batch(self, configs):
+        """在一个事务中保存一批配置，返回与configs对应的异常（成功为None）"""
+        errors = []
+        with transaction.atomic():
+            for config in configs:
+                try:
+                    with transaction.atomic():
+                        config.save()
+                    errors.append(None)
+                except Exception as e:
+                    logger.error(f'保存设备{config.device.hostname}的配置失败: {str(e)}')
+                    errors.append(e)
+        self.batches += 1
+        self.saved += errors.count(None)
+        logger.debug(f'写入一批配置 {len(configs)} 个，成功 {errors.count(None)} 个')
+        return errors
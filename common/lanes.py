@@ -0,0 +1,184 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Hashable, List, Optional
+
+# 单台设备的人工请求
+INTERACTIVE = "interactive"
+# 批量采集任务
+BULK = "bulk"
+# 调度顺序即优先级
+LANES = (INTERACTIVE, BULK)
+
+
+class _Waiter:
+    __slots__ = ("lane", "key", "enqueued", "future", "granted")
+
+    def __init__(self, lane: str, key: Optional[Hashable]):
+        self.lane = lane
+        self.key = key
+        self.enqueued = time.monotonic()
+        self.future = concurrent.futures.Future()
+        self.granted = False
+
+
+class PriorityLimiter:
+    """
+    分优先级的并发槽位：共 capacity 个槽位，其中 reserved 个只留给交互请求，
+    批量任务最多占用其余槽位；有空闲槽位时先唤醒排队的交互请求，再唤醒批量任务。
+
+    与 SingleFlight 一样使用线程锁和 concurrent.futures.Future，调用方可以位于
+    不同线程的不同事件循环。
+    """
+
+    # 每个通道保留最近多少次排队耗时用于计算分位数
+    WAIT_SAMPLES = 1000
+
+    def __init__(self, capacity: int, reserved: int):
+        """
+        Args:
+            capacity: 槽位总数
+            reserved: 为交互请求预留的槽位数，须小于capacity
+        """
+        if not 0 <= reserved < capacity:
+            raise ValueError(f"预留槽位数应在0到{capacity - 1}之间: {reserved}")
+        self.capacity = capacity
+        self.reserved = reserved
+        self._lock = threading.Lock()
+        self._running = {lane: 0 for lane in LANES}
+        self._waiting: Dict[str, Deque[_Waiter]] = {lane: deque() for lane in LANES}
+        self._waits: Dict[str, Deque[float]] = {lane: deque(maxlen=self.WAIT_SAMPLES) for lane in LANES}
+        self.stats = {
+            lane: {"acquired": 0, "queued": 0, "promoted": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for lane in LANES
+        }
+
+    @property
+    def bulk_capacity(self) -> int:
+        """批量任务最多同时占用的槽位数"""
+        return self.capacity - self.reserved
+
+    def ensure_bulk_capacity(self, slots: int) -> bool:
+        """
+        批量通道不足 slots 个槽位时扩大总槽位数，预留给交互请求的槽位数不变
+
+        Returns:
+            是否扩大了槽位
+        """
+        with self._lock:
+            if slots <= self.capacity - self.reserved:
+                return False
+            self.capacity = slots + self.reserved
+            self._dispatch()
+        return True
+
+    def _can_start(self, lane: str) -> bool:
+        if sum(self._running.values()) >= self.capacity:
+            return False
+        return lane == INTERACTIVE or self._running[BULK] < self.capacity - self.reserved
+
+    def _start(self, lane: str, wait: float):
+        self._running[lane] += 1
+        stats = self.stats[lane]
+        stats["acquired"] += 1
+        stats["wait_total"] += wait
+        stats["wait_max"] = max(stats["wait_max"], wait)
+        self._waits[lane].append(wait)
+
+    def _dispatch(self):
+        for lane in LANES:
+            queue = self._waiting[lane]
+            while queue and self._can_start(lane):
+                waiter = queue.popleft()
+                # 等待方已取消时跳过
+                if not waiter.future.set_running_or_notify_cancel():
+                    continue
+                waiter.granted = True
+                self._start(lane, time.monotonic() - waiter.enqueued)
+                waiter.future.set_result(lane)
+
+    async def acquire(self, lane: str, key: Optional[Hashable] = None) -> str:
+        """
+        占用一个槽位，没有可用槽位时排队等待
+
+        Args:
+            lane: INTERACTIVE 或 BULK
+            key: 可选的请求标识，供 promote 提升排队中的批量请求
+
+        Returns:
+            实际占用槽位的通道，释放时传给 release
+        """
+        if lane not in self._waiting:
+            raise ValueError(f"未知的优先级通道: {lane}")
+        with self._lock:
+            if not self._waiting[lane] and self._can_start(lane):
+                self._start(lane, 0.0)
+                return lane
+            waiter = _Waiter(lane, key)
+            self._waiting[lane].append(waiter)
+            self.stats[lane]["queued"] += 1
+
+        try:
+            return await asyncio.wrap_future(waiter.future)
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._running[waiter.lane] -= 1
+                    self._dispatch()
+                elif waiter in self._waiting[waiter.lane]:
+                    self._waiting[waiter.lane].remove(waiter)
+            raise
+
+    def release(self, lane: str):
+        """释放 acquire 返回的通道上的一个槽位"""
+        with self._lock:
+            self._running[lane] -= 1
+            self._dispatch()
+
+    def promote(self, key: Hashable) -> int:
+        """
+        把排队中key相同的批量请求移入交互通道，例如用户手动采集一台正在批量队列中等待的设备
+
+        Returns:
+            提升的请求数
+        """
+        with self._lock:
+            bulk = self._waiting[BULK]
+            promoted = [waiter for waiter in bulk if waiter.key == key]
+            for waiter in promoted:
+                bulk.remove(waiter)
+                waiter.lane = INTERACTIVE
+                self._waiting[INTERACTIVE].append(waiter)
+            if promoted:
+                self.stats[BULK]["promoted"] += len(promoted)
+                self._dispatch()
+        return len(promoted)
+
+    @asynccontextmanager
+    async def slot(self, lane: str, key: Optional[Hashable] = None):
+        """acquire/release 的上下文管理器形式"""
+        granted = await self.acquire(lane, key)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+    def metrics(self) -> Dict[str, dict]:
+        """各通道的占用、排队数量及排队耗时（秒）"""
+        with self._lock:
+            lanes = {}
+            for lane in LANES:
+                stats = self.stats[lane]
+                waits: List[float] = sorted(self._waits[lane])
+                lanes[lane] = {
+                    "running": self._running[lane],
+                    "waiting": len(self._waiting[lane]),
+                    **stats,
+                    "wait_avg": stats["wait_total"] / stats["acquired"] if stats["acquired"] else 0.0,
+                    "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+                    "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+                }
+            return {"capacity": self.capacity, "reserved": self.reserved, "lanes": lanes}
@@ -0,0 +1,90 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SingleFlight:
+    """
+    进程内请求合并：同一个key同时只执行一次，其余调用等待并共享同一结果；
+    成功结果在 ttl 秒内直接返回，不再执行。
+
+    共享结果使用 concurrent.futures.Future，调用方可以位于不同线程的不同事件循环
+    （例如WSGI下每个请求各自运行异步视图），异常同样传递给所有等待者且不缓存。
+    """
+
+    # 缓存条目超过该数量时清理过期结果
+    MAX_CACHED = 1024
+
+    def __init__(
+        self,
+        ttl: float = 0,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+        from_cache: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        Args:
+            ttl: 成功结果的缓存秒数，0表示只合并并发请求
+            cache_if: 判断结果是否可以缓存，默认全部缓存
+            from_cache: 返回缓存结果前的转换，例如标记结果来自缓存
+        """
+        self.ttl = ttl
+        self.cache_if = cache_if
+        self.from_cache = from_cache
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, concurrent.futures.Future] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self.stats = {"executed": 0, "coalesced": 0, "cached": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或加入key对应的请求
+
+        Args:
+            key: 合并依据，如设备ID
+            fn: 无参协程函数，只有第一个调用方会执行
+
+        Returns:
+            fn的返回值
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self.stats["cached"] += 1
+                return self.from_cache(cached[1]) if self.from_cache else cached[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+                self.stats["executed"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            if self.ttl and (self.cache_if is None or self.cache_if(result)):
+                now = time.monotonic()
+                if len(self._results) >= self.MAX_CACHED:
+                    self._results = {k: v for k, v in self._results.items() if v[0] > now}
+                self._results[key] = (now + self.ttl, result)
+        future.set_result(result)
+        return result
+
+    def forget(self, key: Hashable = None):
+        """清除缓存的结果，key为None时清除全部"""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
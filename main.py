@@ -28,7 +28,8 @@ async def root():
         "version": "1.0.0",
         "description": "API for getting device configurations using Netmiko",
         "endpoints": {
-            "get_device_config": "/get-device-config"
+            "get_device_config": "/get-device-config",
+            "metrics": "/metrics"
         }
     }
 
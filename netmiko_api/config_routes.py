@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import APIRouter, HTTPException
+from common.lanes import INTERACTIVE, PriorityLimiter
+from common.singleflight import SingleFlight
 from .netmiko_service import NetmikoService
 from .device_models import DeviceInfo, ConfigResponse
 
@@ -20,6 +25,30 @@ logger.addHandler(console_handler)
 
 router = APIRouter()
 
+# 同一设备的并发请求共用一个SSH会话，成功结果缓存数秒供紧接着的重复请求使用
+CONFIG_CACHE_TTL = 10
+config_flight = SingleFlight(ttl=CONFIG_CACHE_TTL)
+
+# SSH工作线程数，其中预留给交互请求的数量；批量任务占满其余线程时单台设备的请求仍可立即执行
+COLLECTOR_WORKERS = 32
+COLLECTOR_INTERACTIVE_WORKERS = 4
+collector_limiter = PriorityLimiter(capacity=COLLECTOR_WORKERS, reserved=COLLECTOR_INTERACTIVE_WORKERS)
+_executor = ThreadPoolExecutor(max_workers=COLLECTOR_WORKERS, thread_name_prefix="netmiko")
+
+
+def _flight_key(device: DeviceInfo):
+    """合并依据：地址、设备类型与登录凭据，凭据不同的请求不共享结果"""
+    secret = hashlib.sha256(f"{device.username}\0{device.password}".encode()).hexdigest()
+    return device.address, device.device_type, secret
+
+
+async def _collect(device: DeviceInfo, key):
+    """按优先级通道占用工作线程后采集配置"""
+    async with collector_limiter.slot(device.priority, key):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, NetmikoService.get_device_config, device.dict())
+
+
 @router.post("/get-device-config", response_model=ConfigResponse)
 async def get_device_config(device: DeviceInfo) -> ConfigResponse:
     """
@@ -29,12 +58,14 @@ async def get_device_config(device: DeviceInfo) -> ConfigResponse:
     logger.debug(f"Device info: {device.dict()}")
     
     try:
-        # Convert Pydantic model to dictionary
-        device_dict = device.dict()
-        
-        # Get configuration using Netmiko service
-        logger.info(f"Calling NetmikoService.get_device_config for {device.hostname}")
-        config = NetmikoService.get_device_config(device_dict)
+        key = _flight_key(device)
+        if device.priority == INTERACTIVE:
+            # Move a queued bulk request for the same device ahead; this request joins it
+            collector_limiter.promote(key)
+
+        # Get configuration using Netmiko service in a worker thread, sharing in-flight sessions
+        logger.info(f"Calling NetmikoService.get_device_config for {device.hostname} ({device.priority})")
+        config = await config_flight.do(key, lambda: _collect(device, key))
         logger.debug(f"Successfully got config for {device.hostname}")
         
         response = ConfigResponse(
@@ -48,3 +79,11 @@ async def get_device_config(device: DeviceInfo) -> ConfigResponse:
     except Exception as e:
         logger.error(f"Failed to get config for {device.hostname}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to get config: {str(e)}")
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Worker pool metrics: per-lane running/queued counts and queue wait (seconds), plus session coalescing counters
+    """
+    return {**collector_limiter.metrics(), "coalescing": dict(config_flight.stats)}
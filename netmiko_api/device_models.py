@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic import BaseModel
 
 class DeviceInfo(BaseModel):
@@ -9,6 +10,8 @@ class DeviceInfo(BaseModel):
     username: str
     password: str
     device_type: str
+    # 优先级通道：单台设备的人工采集为interactive，批量任务为bulk
+    priority: Literal["interactive", "bulk"] = "interactive"
 
 class ConfigResponse(BaseModel):
     """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -111,13 +112,50 @@ WSGI_APPLICATION = 'netops.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite生产参数：WAL允许读写并发；synchronous=NORMAL在WAL下只在检查点时fsync；
+# cache_size为负数时单位是KiB；mmap减少读路径的系统调用；temp_store让排序等临时表留在内存
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # 保持连接，避免每个请求重新打开数据库并重复执行PRAGMA
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # 等待写锁的秒数（busy_timeout），超时才报 database is locked
+            'timeout': 20,
+            # 写事务开始即获取写锁，避免读事务升级为写事务时直接失败
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+        },
     }
 }
 
+# 设置 NETOPS_DB_ENGINE=postgresql 时使用PostgreSQL（需安装 postgres 可选依赖中的 psycopg 3），
+# 提取对象的批量写入自动改用COPY；连接参数由以下环境变量提供
+if os.environ.get('NETOPS_DB_ENGINE') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('NETOPS_DB_NAME', 'netops'),
+            'USER': os.environ.get('NETOPS_DB_USER', 'netops'),
+            'PASSWORD': os.environ.get('NETOPS_DB_PASSWORD', ''),
+            'HOST': os.environ.get('NETOPS_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('NETOPS_DB_PORT', '5432'),
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -172,6 +210,47 @@ REST_FRAMEWORK = {
     ]
 }
 
+# CMDB配置解析策略
+# 'all': 保存每个配置版本时都立即解析并提取对象
+# 'latest': 只立即解析最新版本，历史版本在首次通过 /api/configs/{id}/ 访问时再解析；
+#           未访问过的历史版本不会出现在导出（history=1）与历史检索结果中
+CMDB_PARSE_POLICY = 'all'
+
+# 配置全文检索
+# CMDB_SEARCH_ENGINE: 检索引擎类路径，为空时SQLite使用FTS5索引，其它数据库使用全表扫描
+# CMDB_SEARCH_HISTORY: 是否同时索引历史版本，默认只索引各设备的最新配置
+CMDB_SEARCH_ENGINE = None
+CMDB_SEARCH_HISTORY = False
+
+# 配置历史保留策略（compact_configs命令使用），各设备的最新配置始终保留
+# keep_all_days: 该天数内的版本全部保留
+# daily_days: 该天数内每天保留最新一份，更早的每周保留最新一份
+# weekly_days: 超过该天数的历史版本全部删除，None表示按周永久保留
+CMDB_RETENTION = {
+    'keep_all_days': 30,
+    'daily_days': 180,
+    'weekly_days': None,
+}
+
+# 冷数据归档（仅SQLite），archive_configs命令把早于 CMDB_ARCHIVE_AFTER_DAYS 天的历史配置
+# 移入单独的数据库文件，每个连接自动挂载，历史查询同时覆盖两个文件；为None时不启用
+CMDB_ARCHIVE_DATABASE = None
+CMDB_ARCHIVE_AFTER_DAYS = 365
+
+# 设备连接熔断（批量采集使用），单台设备的人工采集不受限制
+# threshold: 连续失败该次数后熔断，退避期内批量采集跳过该设备
+# base_minutes: 首次熔断的退避分钟数，此后每多失败一次加倍，最长 max_hours 小时
+# 退避期满后的下一次批量采集放行一次探测，成功即恢复
+CMDB_BREAKER = {
+    'threshold': 3,
+    'base_minutes': 15,
+    'max_hours': 24,
+}
+
+# 批量采集前从本机并发探测各设备的SSH端口，不可达的设备不再交给采集服务
+# 采集服务与本机不在同一网络（可达性不同）时应关闭
+CMDB_FETCH_PROBE = True
+
 # CORS Configuration
 CORS_ORIGIN_ALLOW_ALL = True
 